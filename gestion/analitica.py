@@ -0,0 +1,269 @@
+"""
+Métricas de flujo del kanban a partir del registro de transiciones
+(TransicionTarea):
+
+- lead time: del alta de la tarea a su primera llegada a 'completada';
+- cycle time: de la primera llegada a 'progreso' a la primera a 'completada';
+- tiempo en estado: cuánto estuvo la tarea en cada columna antes de salir
+  (diferencia con la transición anterior de la misma tarea, con LAG);
+- throughput: tareas completadas por semana, con la media móvil de las
+  últimas 4 semanas con datos y el acumulado.
+
+Todo se calcula en la base con funciones de ventana (LAG, ROW_NUMBER, COUNT y
+AVG ... OVER) en SQL portable entre PostgreSQL y SQLite; sólo la diferencia
+de fechas y el truncado a semana dependen del motor. Las consultas parten
+de las transiciones del rango pedido (índices por sanatorio/proyecto/empleado,
+hacia y momento) y recién después leen la historia de esas tareas por el índice
+(tarea_id, momento), así el costo depende del rango y no del tamaño del
+registro. Los percentiles son el valor en la posición ceil(p·n) de cada grupo.
+"""
+import datetime
+
+from django.db import connections, router
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import TransicionTarea
+from .particiones import filtro_fechas
+from .tenencia import sanatorio_actual
+
+
+TABLA = TransicionTarea._meta.db_table
+AGRUPACIONES = {
+    'proyecto': 'proyecto_id',
+    'empleado': 'empleado_id',
+    'total': "'total'",
+}
+# Los GROUP BY son por posición: PostgreSQL no admite agrupar por una
+# constante ('total') y así la expresión de la semana no se repite
+SEMANAS_POR_DEFECTO = 12
+
+
+def sql_segundos(vendor, fin, inicio):
+    if vendor == 'postgresql':
+        return f'EXTRACT(EPOCH FROM ({fin} - {inicio}))'
+    if vendor == 'mysql':
+        return f'TIMESTAMPDIFF(MICROSECOND, {inicio}, {fin}) / 1000000.0'
+    return f'(julianday({fin}) - julianday({inicio})) * 86400.0'
+
+
+def sql_semana(vendor, columna):
+    """Lunes de la semana de `columna`, como texto AAAA-MM-DD."""
+    if vendor == 'postgresql':
+        return f"to_char(date_trunc('week', {columna}), 'YYYY-MM-DD')"
+    if vendor == 'mysql':
+        return f"DATE_FORMAT(DATE_SUB({columna}, INTERVAL WEEKDAY({columna}) DAY), '%%Y-%%m-%%d')"
+    return f"date({columna}, 'weekday 0', '-6 days')"
+
+
+class Consulta:
+    """Rango, filtros y agrupación de una consulta de analítica."""
+
+    def __init__(self, desde, hasta, proyecto=None, empleado=None, agrupar='proyecto', using='default'):
+        self.desde = desde
+        self.hasta = hasta
+        self.proyecto = proyecto
+        self.empleado = empleado
+        self.agrupar = agrupar
+        self.using = using
+        self.conexion = connections[using]
+        self.vendor = self.conexion.vendor
+
+    def rango(self):
+        """[desde, hasta + 1 día) como valores de DateTimeField para el motor."""
+        inicio = timezone.make_aware(datetime.datetime.combine(self.desde, datetime.time.min))
+        fin = timezone.make_aware(datetime.datetime.combine(self.hasta + datetime.timedelta(days=1), datetime.time.min))
+        return [self.conexion.ops.adapt_datetimefield_value(valor) for valor in (inicio, fin)]
+
+    def filtros(self):
+        sql, parametros = '', []
+        sanatorio = sanatorio_actual()
+        if sanatorio is not None:
+            sql += ' AND sanatorio_id = %s'
+            parametros.append(sanatorio)
+        if self.proyecto is not None:
+            sql += ' AND proyecto_id = %s'
+            parametros.append(self.proyecto)
+        if self.empleado is not None:
+            sql += ' AND empleado_id = %s'
+            parametros.append(self.empleado)
+        return sql, parametros
+
+    def grupo(self, momento):
+        if self.agrupar == 'semana':
+            return sql_semana(self.vendor, momento)
+        return AGRUPACIONES[self.agrupar]
+
+    def ejecutar(self, sql, parametros):
+        with self.conexion.cursor() as cursor:
+            cursor.execute(sql, parametros)
+            return cursor.fetchall()
+
+
+def consulta_desde_request(request, agrupaciones):
+    """
+    Consulta a partir de `?desde`/`?hasta` (por defecto las últimas 12
+    semanas), `?proyecto`, `?empleado` y `?agrupar` (la primera de
+    `agrupaciones` si no viene).
+    """
+    rango = filtro_fechas(request)
+    hasta = rango.get('fecha__lte') or timezone.localdate()
+    desde = rango.get('fecha__gte') or hasta - datetime.timedelta(weeks=SEMANAS_POR_DEFECTO)
+    errores = {}
+    if desde > hasta:
+        errores['desde'] = 'Debe ser anterior o igual a hasta'
+
+    ids = {}
+    for parametro in ('proyecto', 'empleado'):
+        valor = request.query_params.get(parametro)
+        if valor is None:
+            continue
+        if not valor.isdigit():
+            errores[parametro] = 'Debe ser un id numérico'
+        else:
+            ids[parametro] = int(valor)
+
+    agrupar = request.query_params.get('agrupar', agrupaciones[0])
+    if agrupar not in agrupaciones:
+        errores['agrupar'] = f'Valores posibles: {", ".join(agrupaciones)}'
+    if errores:
+        raise serializers.ValidationError(errores)
+    return Consulta(desde, hasta, agrupar=agrupar, using=router.db_for_read(TransicionTarea), **ids)
+
+
+def _horas(segundos):
+    return None if segundos is None else round(float(segundos) / 3600, 2)
+
+
+def tiempos(consulta):
+    """Lead time, cycle time y tiempo en cada estado por grupo, para las tareas completadas en el rango."""
+    segundos = lambda fin, inicio: sql_segundos(consulta.vendor, fin, inicio)
+    filtros, parametros_filtros = consulta.filtros()
+    # hacia IN (...) deja usar los índices (…, hacia, momento) para el rango
+    estados = ', '.join(f"'{estado}'" for estado, _ in TransicionTarea._meta.get_field('hacia').choices)
+
+    sql_completadas = f"""
+        WITH completadas AS (
+            SELECT tarea_id, MIN(proyecto_id) AS proyecto_id, MIN(empleado_id) AS empleado_id,
+                   MIN(momento) AS completada
+            FROM {TABLA}
+            WHERE hacia = 'completada' AND momento >= %s AND momento < %s{filtros}
+            GROUP BY tarea_id
+        ),
+        hitos AS (
+            SELECT c.proyecto_id, c.empleado_id, c.completada,
+                   MIN(CASE WHEN t.desde IS NULL THEN t.momento END) AS creada,
+                   MIN(CASE WHEN t.hacia = 'progreso' THEN t.momento END) AS iniciada
+            FROM completadas c
+            JOIN {TABLA} t ON t.tarea_id = c.tarea_id AND t.momento <= c.completada
+            GROUP BY c.tarea_id, c.proyecto_id, c.empleado_id, c.completada
+        ),
+        duraciones AS (
+            SELECT {consulta.grupo('completada')} AS grupo,
+                   {segundos('completada', 'creada')} AS lead_time,
+                   {segundos('completada', 'iniciada')} AS cycle_time
+            FROM hitos
+        ),
+        ordenadas AS (
+            SELECT grupo, lead_time, cycle_time,
+                   ROW_NUMBER() OVER (PARTITION BY grupo ORDER BY CASE WHEN lead_time IS NULL THEN 1 ELSE 0 END, lead_time) AS posicion_lead,
+                   ROW_NUMBER() OVER (PARTITION BY grupo ORDER BY CASE WHEN cycle_time IS NULL THEN 1 ELSE 0 END, cycle_time) AS posicion_ciclo,
+                   COUNT(lead_time) OVER (PARTITION BY grupo) AS total_lead,
+                   COUNT(cycle_time) OVER (PARTITION BY grupo) AS total_ciclo
+            FROM duraciones
+        )
+        SELECT grupo, COUNT(*),
+               AVG(lead_time),
+               MAX(CASE WHEN posicion_lead = (total_lead + 1) / 2 THEN lead_time END),
+               MAX(CASE WHEN posicion_lead = (85 * total_lead + 99) / 100 THEN lead_time END),
+               AVG(cycle_time),
+               MAX(CASE WHEN posicion_ciclo = (total_ciclo + 1) / 2 THEN cycle_time END),
+               MAX(CASE WHEN posicion_ciclo = (85 * total_ciclo + 99) / 100 THEN cycle_time END)
+        FROM ordenadas
+        GROUP BY grupo
+        ORDER BY grupo
+    """
+    sql_estados = f"""
+        WITH tareas AS (
+            SELECT DISTINCT tarea_id FROM {TABLA}
+            WHERE hacia IN ({estados}) AND momento >= %s AND momento < %s AND desde IS NOT NULL{filtros}
+        ),
+        pasos AS (
+            SELECT t.sanatorio_id, t.proyecto_id, t.empleado_id, t.desde, t.momento,
+                   LAG(t.momento) OVER (PARTITION BY t.tarea_id ORDER BY t.momento, t.id) AS anterior
+            FROM {TABLA} t
+            WHERE t.tarea_id IN (SELECT tarea_id FROM tareas) AND t.momento < %s
+        )
+        SELECT {consulta.grupo('momento')} AS grupo, desde, COUNT(*), AVG({segundos('momento', 'anterior')})
+        FROM pasos
+        WHERE desde IS NOT NULL AND anterior IS NOT NULL AND momento >= %s{filtros}
+        GROUP BY 1, 2
+    """
+    inicio, fin = consulta.rango()
+
+    grupos = {}
+
+    def grupo(clave):
+        return grupos.setdefault(clave, {
+            'completadas': 0,
+            'lead_time_horas': None,
+            'cycle_time_horas': None,
+            'tiempo_en_estado_horas': {},
+        })
+
+    for clave, total, lead, lead_50, lead_85, ciclo, ciclo_50, ciclo_85 in consulta.ejecutar(
+        sql_completadas, [inicio, fin, *parametros_filtros]
+    ):
+        datos = grupo(clave)
+        datos['completadas'] = total
+        datos['lead_time_horas'] = {'media': _horas(lead), 'p50': _horas(lead_50), 'p85': _horas(lead_85)}
+        datos['cycle_time_horas'] = {'media': _horas(ciclo), 'p50': _horas(ciclo_50), 'p85': _horas(ciclo_85)}
+
+    for clave, estado, total, media in consulta.ejecutar(
+        sql_estados, [inicio, fin, *parametros_filtros, fin, inicio, *parametros_filtros]
+    ):
+        grupo(clave)['tiempo_en_estado_horas'][estado] = {'transiciones': total, 'media': _horas(media)}
+
+    return [_con_clave(consulta, clave, datos) for clave, datos in sorted(grupos.items(), key=lambda par: str(par[0]))]
+
+
+def throughput(consulta):
+    """Tareas completadas por semana (primera llegada a 'completada') por grupo."""
+    filtros, parametros_filtros = consulta.filtros()
+    semana = sql_semana(consulta.vendor, 'momento')
+    grupo = AGRUPACIONES[consulta.agrupar]
+    sql = f"""
+        WITH completadas AS (
+            SELECT tarea_id, MIN(proyecto_id) AS proyecto_id, MIN(empleado_id) AS empleado_id,
+                   MIN(momento) AS momento
+            FROM {TABLA}
+            WHERE hacia = 'completada' AND momento >= %s AND momento < %s{filtros}
+            GROUP BY tarea_id
+        ),
+        semanas AS (
+            SELECT {grupo} AS grupo, {semana} AS semana, COUNT(*) AS completadas
+            FROM completadas
+            GROUP BY 1, 2
+        )
+        SELECT grupo, semana, completadas,
+               AVG(completadas) OVER (PARTITION BY grupo ORDER BY semana ROWS BETWEEN 3 PRECEDING AND CURRENT ROW),
+               SUM(completadas) OVER (PARTITION BY grupo ORDER BY semana ROWS UNBOUNDED PRECEDING)
+        FROM semanas
+        ORDER BY grupo, semana
+    """
+    inicio, fin = consulta.rango()
+    grupos = {}
+    for clave, semana_inicio, completadas, media, acumuladas in consulta.ejecutar(sql, [inicio, fin, *parametros_filtros]):
+        grupos.setdefault(clave, []).append({
+            'semana': str(semana_inicio),
+            'completadas': completadas,
+            'media_4_semanas': round(float(media), 2),
+            'acumuladas': int(acumuladas),
+        })
+    return [_con_clave(consulta, clave, {'semanas': semanas}) for clave, semanas in grupos.items()]
+
+
+def _con_clave(consulta, clave, datos):
+    if consulta.agrupar == 'total':
+        return datos
+    return {consulta.agrupar: str(clave) if consulta.agrupar == 'semana' else clave, **datos}
@@ -0,0 +1,101 @@
+"""
+Archivo de tareas completadas.
+
+Las tareas completadas con `fecha` anterior a ARCHIVO_TAREAS_DIAS días se
+mueven de Tarea a TareaArchivada, así los tableros, los Max('orden') y las
+renumeraciones del kanban trabajan sobre una tabla que no crece con los años.
+Se usa `fecha` y no `updated_at` porque las compactaciones de columna
+actualizan `updated_at` de las tareas completadas.
+
+`manage.py archivar_tareas` las mueve en lotes chicos, cada uno en su propia
+transacción: toma las filas con SELECT ... FOR UPDATE SKIP LOCKED (las que
+otro request tiene bloqueadas quedan para la próxima pasada), las copia, las
+borra de Tarea y deja la lápida para los backups incrementales y el evento
+'tarea.archivada' en el outbox. Los bloqueos duran lo que tarda un lote.
+
+Los listados de tareas las siguen mostrando con `?include_archived=true`.
+"""
+import heapq
+from datetime import timedelta
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .eventos import CAMPOS_TAREA, datos_de, registrar_evento
+from .kanban import incrementar_versiones
+from .models import Borrado, Tarea, TareaArchivada
+from .trabajos import encolar_compactacion
+
+
+TABLA = Tarea._meta.db_table
+VALORES_VERDADEROS = {'1', 'true', 'si', 'sí', 'yes'}
+
+
+def fecha_limite(dias=None):
+    """Se archivan las tareas completadas con fecha anterior a esta."""
+    if dias is None:
+        dias = settings.ARCHIVO_TAREAS_DIAS
+    return timezone.localdate() - timedelta(days=dias)
+
+
+def candidatas(limite):
+    return Tarea.objects.filter(estado='completada', fecha__lt=limite)
+
+
+def archivar_lote(limite, tam_lote=500):
+    """Archiva hasta `tam_lote` tareas en una transacción; devuelve cuántas movió."""
+    with transaction.atomic():
+        tareas = list(
+            candidatas(limite).select_for_update(skip_locked=True).order_by('id')[:tam_lote]
+        )
+        if not tareas:
+            return 0
+        ids = [tarea.id for tarea in tareas]
+
+        TareaArchivada.objects.bulk_create([
+            TareaArchivada(**{
+                campo.attname: getattr(tarea, campo.attname)
+                for campo in Tarea._meta.concrete_fields
+                if campo.attname != 'updated_at'
+            })
+            for tarea in tareas
+        ])
+        # DELETE directo y no .delete(): las señales post_delete de Tarea
+        # dejarían un evento 'tarea.eliminada' por fila, cuando esto es un
+        # archivado ('tarea.archivada', abajo), y la lápida se crea aquí en
+        # lote. Nada referencia a Tarea con FK, así que no hay cascadas que
+        # el DELETE se saltee
+        marcadores = ', '.join(['%s'] * len(ids))
+        with connections[router.db_for_write(Tarea)].cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{TABLA}" WHERE id IN ({marcadores})', ids)
+        Borrado.objects.bulk_create([
+            Borrado(modelo=Tarea._meta.label_lower, objeto_id=tarea_id) for tarea_id in ids
+        ])
+        for tarea in tareas:
+            registrar_evento('tarea.archivada', tarea.proyecto_id, tarea.id, datos_de(tarea, CAMPOS_TAREA))
+
+        # La columna 'completada' cambió: versión nueva y renumeración diferida
+        for proyecto_id, empleado_id in sorted({(t.proyecto_id, t.empleado_id) for t in tareas}):
+            incrementar_versiones(proyecto_id, empleado_id, ['completada'])
+            encolar_compactacion(proyecto_id, empleado_id, 'completada')
+    return len(tareas)
+
+
+def incluye_archivadas(request):
+    return request.query_params.get('include_archived', '').lower() in VALORES_VERDADEROS
+
+
+def tareas_con_archivadas(request, tareas, orden, **filtros):
+    """
+    Con `?include_archived=true` agrega a `tareas` (ya ordenadas por `orden`)
+    las archivadas que cumplen `filtros`, intercaladas con el mismo orden.
+    Sin el parámetro devuelve `tareas` tal cual.
+    """
+    if not incluye_archivadas(request):
+        return tareas
+    archivadas = TareaArchivada.objects.filter(**filtros).select_related(
+        'empleado', 'proyecto__encargado'
+    ).order_by(*orden)
+    return list(heapq.merge(tareas, archivadas, key=attrgetter(*orden)))
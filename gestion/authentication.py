@@ -1,11 +1,25 @@
 # gestion/authentication.py
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 from .models import Usuario
+from .tenencia import activar, sanatorio_actual
 
 class CustomJWTAuthentication(JWTAuthentication):
     def get_user(self, validated_token):
+        # Sanatorio del token; el del host (si lo hay) tiene prioridad y deben coincidir
+        actual = sanatorio_actual()
+        sanatorio = validated_token.get('sanatorio')
+        if sanatorio is not None and actual is not None and sanatorio != actual:
+            raise AuthenticationFailed('El token es de otro sanatorio', code='sanatorio_distinto')
+        if actual is None and sanatorio is not None:
+            activar(sanatorio)
         try:
             user_id = validated_token['user_id']
-            return Usuario.objects.get(pk=user_id)
+            user = Usuario.objects.get(pk=user_id)
         except Usuario.DoesNotExist:
-            return None
\ No newline at end of file
+            # Borrado, o de otro sanatorio que el del host
+            raise AuthenticationFailed('Usuario no encontrado', code='user_not_found')
+        if sanatorio_actual() is None:
+            # Tokens emitidos antes del claim
+            activar(user.sanatorio_id)
+        return user
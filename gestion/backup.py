@@ -0,0 +1,203 @@
+"""
+Backups compactos e incrementales de la app gestion.
+
+Cada snapshot es un archivo gzip con un objeto JSON por línea: una cabecera,
+las lápidas (`Borrado`) de lo eliminado desde la marca de agua anterior y las
+filas modificadas desde entonces (`updated_at`). `Permiso` no tiene
+`updated_at`, así que se copia completo en cada snapshot (es una tabla chica).
+
+Durante una restauración los borrados no escriben lápidas ni eventos de
+dominio (ver `restaurando`): el snapshot ya trae los borrados del origen.
+"""
+import gzip
+import json
+from contextvars import ContextVar
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from .importacion import ORDEN_DEPENDENCIAS, MODELOS, reiniciar_secuencias, sin_auto_now
+from .models import Proyecto, Permiso, Tarea, Borrado
+from .particiones import esta_particionada
+
+
+FORMATO = 'gestion-backup'
+VERSION = 1
+
+_restaurando = ContextVar('restaurando', default=False)
+
+
+def restaurando():
+    """True mientras `restaurar_snapshot` aplica un snapshot en el contexto actual."""
+    return _restaurando.get()
+
+
+def leer_cabecera(ruta):
+    with gzip.open(ruta, 'rt', encoding='utf-8') as fh:
+        cabecera = json.loads(fh.readline())
+    if cabecera.get('formato') != FORMATO:
+        raise ValueError(f'{ruta} no es un backup de gestion')
+    return cabecera
+
+
+def _campos(modelo):
+    return [campo.attname for campo in modelo._meta.concrete_fields]
+
+
+def escribir_snapshot(ruta, desde=None, using=DEFAULT_DB_ALIAS, tam_lote=2000):
+    """
+    Escribe un snapshot completo (`desde=None`) o incremental. Devuelve la
+    cabecera con la marca de agua (`hasta`) y la cantidad de filas por modelo.
+    """
+    # La marca se toma antes de leer: lo que cambie durante el backup
+    # se vuelve a copiar en el siguiente incremental.
+    hasta = timezone.now()
+    conteo = {}
+    encoder = DjangoJSONEncoder(separators=(',', ':'), ensure_ascii=False)
+
+    with gzip.open(ruta, 'wt', encoding='utf-8', compresslevel=6) as fh:
+        cabecera = {
+            'formato': FORMATO,
+            'version': VERSION,
+            'tipo': 'incremental' if desde else 'completo',
+            'desde': desde,
+            'hasta': hasta,
+        }
+        fh.write(encoder.encode(cabecera) + '\n')
+
+        # Las lápidas van primero: al restaurar, un pk borrado y vuelto a crear
+        # termina con la fila nueva
+        if desde:
+            borrados = Borrado.objects.using(using).filter(borrado_en__gt=desde).order_by('pk')
+            conteo['borrados'] = 0
+            for modelo_borrado, objeto_id in borrados.values_list('modelo', 'objeto_id').iterator(chunk_size=tam_lote):
+                fh.write(encoder.encode({'m': modelo_borrado, 'pk': objeto_id, 'borrado': True}) + '\n')
+                conteo['borrados'] += 1
+
+        for modelo in ORDEN_DEPENDENCIAS:
+            etiqueta = modelo._meta.label_lower
+            filas = modelo._base_manager.using(using).order_by('pk')
+            if desde and modelo is not Permiso:
+                filas = filas.filter(updated_at__gt=desde)
+
+            conteo[etiqueta] = 0
+            lote = []
+            for fila in filas.values(*_campos(modelo)).iterator(chunk_size=tam_lote):
+                lote.append(fila)
+                if len(lote) >= tam_lote:
+                    _escribir_lote(fh, encoder, modelo, lote, using)
+                    conteo[etiqueta] += len(lote)
+                    lote = []
+            if lote:
+                _escribir_lote(fh, encoder, modelo, lote, using)
+                conteo[etiqueta] += len(lote)
+
+    cabecera['conteo'] = conteo
+    return cabecera
+
+
+def _escribir_lote(fh, encoder, modelo, filas, using):
+    empleados = {}
+    if modelo is Proyecto:
+        # Un solo query por lote para el M2M
+        relaciones = Proyecto.empleados.through._base_manager.using(using).filter(
+            proyecto_id__in=[fila['id'] for fila in filas]
+        ).values_list('proyecto_id', 'usuario_id')
+        for proyecto_id, usuario_id in relaciones:
+            empleados.setdefault(proyecto_id, []).append(usuario_id)
+
+    etiqueta = modelo._meta.label_lower
+    for fila in filas:
+        pk = fila.pop('id')
+        if modelo is Proyecto:
+            fila['empleados'] = empleados.get(pk, [])
+        fh.write(encoder.encode({'m': etiqueta, 'pk': pk, 'f': fila}) + '\n')
+
+
+def restaurar_snapshot(ruta, using=DEFAULT_DB_ALIAS, tam_lote=2000):
+    """
+    Aplica un snapshot sobre la base: los borrados y luego las filas con
+    upserts masivos, todo en una transacción (las FK se verifican al final).
+    """
+    token = _restaurando.set(True)
+    try:
+        cabecera, conteo = _aplicar(ruta, using, tam_lote)
+    finally:
+        _restaurando.reset(token)
+
+    reiniciar_secuencias(using)
+    return cabecera, conteo
+
+
+def _aplicar(ruta, using, tam_lote):
+    cabecera = None
+    conteo = {}
+    lotes = {modelo: [] for modelo in ORDEN_DEPENDENCIAS}
+    empleados = {}
+    with gzip.open(ruta, 'rt', encoding='utf-8') as fh, transaction.atomic(using=using):
+        for linea in fh:
+            registro = json.loads(linea)
+            if cabecera is None:
+                cabecera = registro
+                if cabecera.get('formato') != FORMATO:
+                    raise ValueError(f'{ruta} no es un backup de gestion')
+                continue
+
+            modelo = MODELOS[registro['m']]
+            if registro.get('borrado'):
+                modelo._base_manager.using(using).filter(pk=registro['pk']).delete()
+                conteo['borrados'] = conteo.get('borrados', 0) + 1
+                continue
+
+            campos = registro['f']
+            if modelo is Proyecto:
+                empleados[registro['pk']] = campos.pop('empleados', [])
+            lotes[modelo].append(modelo(pk=registro['pk'], **campos))
+            if len(lotes[modelo]) >= tam_lote:
+                _vaciar(lotes, empleados, using, conteo, tam_lote)
+
+        _vaciar(lotes, empleados, using, conteo, tam_lote)
+    return cabecera, conteo
+
+
+def _vaciar(lotes, empleados, using, conteo, tam_lote):
+    for modelo in ORDEN_DEPENDENCIAS:
+        objetos = lotes[modelo]
+        if not objetos:
+            continue
+        campos = [
+            campo.name for campo in modelo._meta.concrete_fields
+            if not campo.primary_key
+        ]
+        filas = modelo._base_manager.using(using)
+        with sin_auto_now([modelo]):
+            if modelo is Tarea and esta_particionada(using):
+                # Sin índice único sobre id no hay upsert (ver gestion/particiones.py)
+                filas.filter(pk__in=[objeto.pk for objeto in objetos]).delete()
+                filas.bulk_create(objetos, batch_size=tam_lote)
+            else:
+                filas.bulk_create(
+                    objetos,
+                    batch_size=tam_lote,
+                    update_conflicts=True,
+                    unique_fields=['id'],
+                    update_fields=campos,
+                )
+        conteo[modelo._meta.label_lower] = conteo.get(modelo._meta.label_lower, 0) + len(objetos)
+        lotes[modelo] = []
+
+    if empleados:
+        Relacion = Proyecto.empleados.through
+        relaciones = Relacion._base_manager.using(using)
+        relaciones.filter(proyecto_id__in=list(empleados)).delete()
+        relaciones.bulk_create(
+            [
+                Relacion(proyecto_id=proyecto_id, usuario_id=usuario_id)
+                for proyecto_id, usuarios in empleados.items()
+                for usuario_id in usuarios
+            ],
+            batch_size=tam_lote,
+        )
+        empleados.clear()
+
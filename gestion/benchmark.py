@@ -0,0 +1,1183 @@
+"""
+Suite de benchmarks de la API.
+
+Siembra organizaciones sintéticas deterministas y recorre los endpoints de
+gestion/urls.py con el cliente de pruebas de Django, midiendo latencia
+(p50/p95/p99) y cantidad de consultas. Sólo mide: lo que el código tiene
+que cumplir (aislamiento entre sanatorios, límites, uso de índices) se
+verifica en gestion/tests/. La suite de carga reparte requests
+entre varios hilos para medir throughput. Los resultados se guardan en JSON
+para comparar entre commits (ver el comando `benchmark`).
+
+Las suites se registran con el decorador `@suite`.
+"""
+import datetime
+import io
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.db import close_old_connections, connection, connections
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .metricas import Medicion
+from .models import Usuario, Proyecto, Tarea
+
+
+PASSWORD_BENCHMARK = 'benchmark123'
+
+SUITES = {}
+
+
+def suite(nombre):
+    """Registra una función `suite(datos, opciones) -> dict` bajo `nombre`."""
+    def registrar(funcion):
+        SUITES[nombre] = funcion
+        return funcion
+    return registrar
+
+
+# ----------------------------------------------------------------------
+# Datos sintéticos
+# ----------------------------------------------------------------------
+class DatosBenchmark:
+    def __init__(self):
+        self.encargados = []
+        self.empleados = []
+        self.proyectos = []
+        self.tareas = []
+        self.empleados_por_encargado = {}
+
+
+def sembrar(encargados=5, empleados=20, proyectos=4, tareas=25, semilla=42, dominio='bench.local'):
+    """
+    Crea `encargados` encargados, cada uno con `empleados` empleados y
+    `proyectos` proyectos, y `tareas` tareas por empleado. Con la misma
+    semilla se generan siempre los mismos datos. Los emails son
+    @`dominio` (únicos entre sanatorios).
+    """
+    rng = random.Random(semilla)
+    datos = DatosBenchmark()
+    # Un único hash (con sal fija) para todos: sembrar no debe medir pbkdf2
+    password = make_password(PASSWORD_BENCHMARK, salt='benchmarksemilla')
+    estados = [estado for estado, _ in Tarea.ESTADOS]
+    inicio = datetime.date(2024, 1, 1)
+
+    jefes = Usuario.objects.bulk_create([
+        Usuario(nombre=f'Encargado {i}', email=f'encargado{i}@{dominio}', password=password, rol='encargado')
+        for i in range(encargados)
+    ])
+    datos.encargados = [u.id for u in jefes]
+
+    for jefe in jefes:
+        equipo = Usuario.objects.bulk_create([
+            Usuario(
+                nombre=f'Empleado {jefe.id}-{j}',
+                email=f'empleado{jefe.id}-{j}@{dominio}',
+                password=password,
+                rol='empleado',
+                encargado=jefe,
+            )
+            for j in range(empleados)
+        ])
+        datos.empleados_por_encargado[jefe.id] = [u.id for u in equipo]
+        datos.empleados.extend(u.id for u in equipo)
+
+        creados = Proyecto.objects.bulk_create([
+            Proyecto(
+                nombre=f'Proyecto {jefe.id}-{k}',
+                descripcion='Proyecto sintético de benchmark',
+                fecha_inicio=inicio + datetime.timedelta(days=rng.randrange(365)),
+                estado=rng.choice(['pendiente', 'progreso']),
+                encargado=jefe,
+            )
+            for k in range(proyectos)
+        ])
+        datos.proyectos.extend(p.id for p in creados)
+
+        Relacion = Proyecto.empleados.through
+        asignaciones = {}
+        relaciones = []
+        for empleado in equipo:
+            asignados = rng.sample(creados, k=max(1, min(len(creados), rng.randint(1, 2))))
+            asignaciones[empleado.id] = asignados
+            relaciones.extend(Relacion(proyecto_id=p.id, usuario_id=empleado.id) for p in asignados)
+        Relacion.objects.bulk_create(relaciones)
+
+        nuevas = []
+        ordenes = {}
+        for empleado in equipo:
+            for n in range(tareas):
+                proyecto = rng.choice(asignaciones[empleado.id])
+                estado = rng.choice(estados)
+                clave = (proyecto.id, empleado.id, estado)
+                ordenes[clave] = ordenes.get(clave, 0) + 1
+                nuevas.append(Tarea(
+                    titulo=f'Tarea {empleado.id}-{n}',
+                    descripcion='Tarea sintética de benchmark',
+                    proyecto=proyecto,
+                    fecha=proyecto.fecha_inicio + datetime.timedelta(days=rng.randrange(120)),
+                    horas_invertidas=rng.randint(1, 8),
+                    empleado=empleado,
+                    estado=estado,
+                    orden=ordenes[clave],
+                ))
+        datos.tareas.extend(t.id for t in Tarea.objects.bulk_create(nuevas, batch_size=1000))
+
+    return datos
+
+
+# ----------------------------------------------------------------------
+# Medición
+# ----------------------------------------------------------------------
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+def resumir(latencias, consultas=None, errores=0, segundos=None):
+    """Estadísticas en milisegundos de una lista de latencias en segundos."""
+    ms = [valor * 1000 for valor in latencias]
+    resumen = {
+        'requests': len(ms),
+        'errores': errores,
+        'media_ms': round(sum(ms) / len(ms), 3) if ms else 0.0,
+        'p50_ms': round(percentil(ms, 50), 3),
+        'p95_ms': round(percentil(ms, 95), 3),
+        'p99_ms': round(percentil(ms, 99), 3),
+    }
+    if consultas:
+        resumen['consultas_media'] = round(sum(consultas) / len(consultas), 2)
+        resumen['consultas_max'] = max(consultas)
+    if segundos:
+        resumen['requests_por_segundo'] = round(len(ms) / segundos, 1)
+    return resumen
+
+
+def cliente_autenticado(usuario_id):
+    usuario = Usuario.objects.get(pk=usuario_id)
+    refresh = RefreshToken.for_user(usuario)
+    refresh['sanatorio'] = usuario.sanatorio_id
+    return Client(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+
+def ejecutar(cliente, escenario, rng):
+    """Ejecuta un escenario y devuelve (duración, consultas, código)."""
+    metodo, ruta, cuerpo = escenario['request'](rng)
+    medicion = Medicion()
+    with connection.execute_wrapper(medicion):
+        inicio = time.perf_counter()
+        response = getattr(cliente, metodo)(ruta, data=cuerpo, content_type='application/json')
+        duracion = time.perf_counter() - inicio
+    return duracion, medicion.consultas, response.status_code
+
+
+def escenarios_api(datos):
+    """Un escenario por endpoint de gestion/urls.py (más el CRUD del router)."""
+    encargado = datos.encargados[0]
+    empleados = datos.empleados_por_encargado[encargado]
+    empleado = empleados[0]
+    proyecto = Proyecto.objects.filter(empleados=empleado).values_list('id', flat=True).first()
+    tareas = list(Tarea.objects.filter(empleado__in=empleados).values_list('id', flat=True))
+    creadas = []
+
+    def mover(rng):
+        return 'post', '/api/tareas/actualizar/', {
+            'id': rng.choice(tareas),
+            'nuevo_estado': rng.choice(['pendiente', 'progreso', 'completada']),
+            'nuevo_orden': rng.randint(1, 5),
+        }
+
+    def crear(rng):
+        return 'post', '/api/tareas/', {
+            'titulo': 'Tarea creada en benchmark',
+            'descripcion': 'benchmark',
+            'proyecto': proyecto,
+            'fecha': '2024-06-01',
+            'horas_invertidas': 2,
+            'empleado': empleado,
+        }
+
+    def detalle(rng):
+        return 'get', f'/api/tareas/{rng.choice(tareas)}/', None
+
+    def editar(rng):
+        return 'patch', f'/api/tareas/{rng.choice(tareas)}/', {'horas_invertidas': rng.randint(1, 8)}
+
+    def borrar(rng):
+        if not creadas:
+            creadas.extend(Tarea.objects.filter(titulo='Tarea creada en benchmark').values_list('id', flat=True))
+        return 'delete', f'/api/tareas/{creadas.pop()}/' if creadas else '/api/tareas/0/', None
+
+    def get(ruta):
+        return lambda rng: ('get', ruta, None)
+
+    return [
+        {'nombre': 'login', 'repeticiones': 5, 'anonimo': True, 'request': lambda rng: (
+            'post', '/api/auth/login/',
+            {'email': 'encargado0@bench.local', 'password': PASSWORD_BENCHMARK},
+        )},
+        {'nombre': 'me', 'request': get('/api/me/')},
+        {'nombre': 'bootstrap', 'request': get('/api/bootstrap/')},
+        {'nombre': 'empleados-por-encargado', 'request': get(f'/api/empleados-por-encargado/{encargado}/')},
+        {'nombre': 'empleados-por-encargado-carga', 'request': get(f'/api/empleados-por-encargado/{encargado}/?carga=true')},
+        {'nombre': 'proyectos-por-encargado', 'request': get(f'/api/proyectos-por-encargado/{encargado}/')},
+        {'nombre': 'proyectos-asignados-empleado', 'request': get(f'/api/proyectos-asignados-empleado/{empleado}/')},
+        {'nombre': 'tareas-empleado', 'request': get(f'/api/tareas-empleado/{empleado}/')},
+        {'nombre': 'tareas-proyecto', 'request': get(f'/api/tareas-proyecto/{proyecto}/')},
+        {'nombre': 'tareas-empleados-encargado', 'request': get(f'/api/tareas-empleados-encargado/{encargado}/')},
+        {'nombre': 'tareas-usuario-proyecto', 'request': get(f'/api/tareas-usuario-proyecto/{empleado}/{proyecto}/')},
+        {'nombre': 'usuarios-lista', 'request': get('/api/usuarios/')},
+        {'nombre': 'proyectos-lista', 'request': get('/api/proyectos/')},
+        {'nombre': 'tareas-lista', 'request': get('/api/tareas/')},
+        {'nombre': 'tareas-lista-fields', 'request': get('/api/tareas/?fields=id,titulo,estado,orden,empleado')},
+        {'nombre': 'tareas-lista-expand', 'request': get('/api/tareas/?fields=id,titulo,estado,proyecto.nombre&expand=empleado')},
+        {'nombre': 'tareas-detalle', 'request': detalle},
+        {'nombre': 'tareas-crear', 'request': crear},
+        {'nombre': 'tareas-editar', 'request': editar},
+        {'nombre': 'tareas-borrar', 'request': borrar},
+        {'nombre': 'tareas-mover', 'request': mover},
+    ]
+
+
+@suite('api')
+def suite_api(datos, opciones):
+    """Cada endpoint por separado, secuencialmente."""
+    rng = random.Random(opciones['semilla'])
+    cliente = cliente_autenticado(datos.encargados[0])
+    anonimo = Client()
+    resultados = {}
+
+    for escenario in escenarios_api(datos):
+        repeticiones = min(opciones['repeticiones'], escenario.get('repeticiones', opciones['repeticiones']))
+        actual = anonimo if escenario.get('anonimo') else cliente
+        ejecutar(actual, escenario, rng)  # calentamiento
+
+        latencias, consultas, errores = [], [], 0
+        for _ in range(repeticiones):
+            duracion, cantidad, codigo = ejecutar(actual, escenario, rng)
+            latencias.append(duracion)
+            consultas.append(cantidad)
+            errores += codigo >= 400
+        resultados[escenario['nombre']] = resumir(latencias, consultas, errores)
+
+    return resultados
+
+
+# Mezcla de la carga: lecturas de tableros con algunos movimientos de tareas
+PESOS_CARGA = {
+    'me': 2,
+    'tareas-empleados-encargado': 3,
+    'tareas-empleado': 5,
+    'tareas-proyecto': 3,
+    'proyectos-por-encargado': 2,
+    'empleados-por-encargado': 2,
+    'tareas-mover': 2,
+}
+
+
+@suite('carga')
+def suite_carga(datos, opciones):
+    """Generador de carga en proceso: varios hilos con la mezcla PESOS_CARGA."""
+    escenarios = [e for e in escenarios_api(datos) if e['nombre'] in PESOS_CARGA]
+    pesos = [PESOS_CARGA[e['nombre']] for e in escenarios]
+    por_hilo = max(1, opciones['requests'] // opciones['hilos'])
+    lock = threading.Lock()
+    latencias, consultas = [], []
+    errores = [0]
+
+    def trabajador(indice):
+        rng = random.Random(opciones['semilla'] + indice)
+        cliente = cliente_autenticado(datos.encargados[indice % len(datos.encargados)])
+        propias, propias_consultas, propios_errores = [], [], 0
+        try:
+            for _ in range(por_hilo):
+                escenario = rng.choices(escenarios, weights=pesos)[0]
+                try:
+                    duracion, cantidad, codigo = ejecutar(cliente, escenario, rng)
+                except Exception:
+                    propios_errores += 1
+                    continue
+                propias.append(duracion)
+                propias_consultas.append(cantidad)
+                propios_errores += codigo >= 400
+        finally:
+            connections.close_all()
+        with lock:
+            latencias.extend(propias)
+            consultas.extend(propias_consultas)
+            errores[0] += propios_errores
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=opciones['hilos']) as executor:
+        list(executor.map(trabajador, range(opciones['hilos'])))
+    segundos = time.perf_counter() - inicio
+
+    return {'mezcla': resumir(latencias, consultas, errores[0], segundos), 'hilos': opciones['hilos']}
+
+
+def comparar(anterior, actual, umbral=0.10):
+    """Lista las métricas p95 y de consultas que empeoraron más que `umbral` entre dos resultados."""
+    regresiones = []
+    for suite_nombre, resultados in actual.get('suites', {}).items():
+        previos = anterior.get('suites', {}).get(suite_nombre, {})
+        for nombre, valores in resultados.items():
+            if not isinstance(valores, dict) or nombre not in previos:
+                continue
+            for metrica in ('p95_ms', 'consultas_media'):
+                antes, ahora = previos[nombre].get(metrica), valores.get(metrica)
+                if antes and ahora and ahora > antes * (1 + umbral):
+                    regresiones.append((f'{suite_nombre}/{nombre}', metrica, antes, ahora))
+    return regresiones
+
+
+def guardar(ruta, resultados):
+    with open(ruta, 'w', encoding='utf-8') as fh:
+        json.dump(resultados, fh, indent=2, sort_keys=True)
+
+
+@suite('conexiones')
+def suite_conexiones(datos, opciones):
+    """
+    Costo de abrir la conexión frente a reutilizarla: el mismo endpoint con
+    CONN_MAX_AGE=0 (una conexión nueva por request) y con conexiones
+    persistentes. El cliente de pruebas desconecta `close_old_connections`
+    de las señales del request, así que se llama después de cada request,
+    como hace el servidor. Sólo se mide contra una base en archivo o
+    PostgreSQL: la base SQLite en memoria nunca se cierra.
+    """
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        return {'conexiones': 'no disponible con SQLite en memoria (usar PostgreSQL o una base en archivo)'}
+
+    rng = random.Random(opciones['semilla'])
+    cliente = cliente_autenticado(datos.encargados[0])
+    escenario = {'request': lambda rng: ('get', '/api/me/', None)}
+    original = connection.settings_dict['CONN_MAX_AGE']
+    resultados = {}
+
+    def request_completo():
+        duracion, _, codigo = ejecutar(cliente, escenario, rng)
+        inicio = time.perf_counter()
+        close_old_connections()
+        return duracion + time.perf_counter() - inicio, codigo, connection.connection is None
+
+    try:
+        # Apertura de conexión aislada
+        latencias = []
+        for _ in range(opciones['repeticiones']):
+            connection.close()
+            inicio = time.perf_counter()
+            connection.ensure_connection()
+            latencias.append(time.perf_counter() - inicio)
+        resultados['apertura'] = resumir(latencias)
+
+        for nombre, max_age in (('sin-persistencia', 0), ('persistente', 600)):
+            connection.settings_dict['CONN_MAX_AGE'] = max_age
+            connection.close()
+            request_completo()
+            latencias, errores, cerradas = [], 0, 0
+            for _ in range(opciones['repeticiones']):
+                duracion, codigo, cerrada = request_completo()
+                latencias.append(duracion)
+                errores += codigo >= 400
+                cerradas += cerrada
+            resumen = resumir(latencias, errores=errores)
+            # Con CONN_MAX_AGE=0 se cierra después de cada request; persistente, nunca
+            resumen['conexiones_cerradas'] = cerradas
+            resultados[nombre] = resumen
+    finally:
+        connection.settings_dict['CONN_MAX_AGE'] = original
+        connection.close()
+
+    return resultados
+
+
+@suite('concurrencia')
+def suite_concurrencia(datos, opciones):
+    """
+    Muchos hilos moviendo tareas del mismo tablero (un empleado) a la vez,
+    con bloqueo de filas y con concurrencia optimista. Los 409 son conflictos
+    detectados; los errores 5xx incluyen deadlocks y esperas de bloqueo agotadas.
+    La espera de bloqueo es el tiempo de cada request en las sentencias que
+    toman los candados del tablero (versiones de columna y SELECT ... FOR
+    UPDATE de la tarea). Sólo se mide contra PostgreSQL: SQLite no tiene
+    bloqueo de filas, serializa las escrituras y en memoria rechaza las
+    concurrentes ("database table is locked").
+    """
+    from django.test import override_settings
+
+    if connection.vendor == 'sqlite':
+        return {'concurrencia': 'no disponible con SQLite (sin bloqueo de filas; usar PostgreSQL)'}
+
+    empleado = datos.empleados[0]
+    tareas = list(Tarea.objects.filter(empleado_id=empleado).values_list('id', flat=True))
+    por_hilo = max(1, opciones['requests'] // opciones['hilos'])
+    resultados = {}
+
+    def toma_candado(sql):
+        return 'FOR UPDATE' in sql or (
+            'gestion_versioncolumna' in sql and not sql.lstrip().startswith('SELECT')
+        )
+
+    for modo in ('bloqueo', 'optimista'):
+        lock = threading.Lock()
+        latencias, codigos, esperas = [], [], []
+
+        def movedor(indice):
+            rng = random.Random(opciones['semilla'] + indice)
+            cliente = cliente_autenticado(datos.encargados[0])
+            propias, propios_codigos, propias_esperas = [], [], []
+            espera = [0.0]
+
+            def medir_espera(execute, sql, params, many, context):
+                if not toma_candado(sql):
+                    return execute(sql, params, many, context)
+                inicio = time.perf_counter()
+                try:
+                    return execute(sql, params, many, context)
+                finally:
+                    espera[0] += time.perf_counter() - inicio
+
+            try:
+                for _ in range(por_hilo):
+                    cuerpo = {
+                        'id': rng.choice(tareas),
+                        'nuevo_estado': rng.choice(['pendiente', 'progreso', 'completada']),
+                        'nuevo_orden': rng.randint(1, 5),
+                    }
+                    espera[0] = 0.0
+                    inicio = time.perf_counter()
+                    try:
+                        with connection.execute_wrapper(medir_espera):
+                            codigo = cliente.post(
+                                '/api/tareas/actualizar/', cuerpo, content_type='application/json'
+                            ).status_code
+                    except Exception:
+                        codigo = 500
+                    propias.append(time.perf_counter() - inicio)
+                    propios_codigos.append(codigo)
+                    propias_esperas.append(espera[0])
+            finally:
+                connections.close_all()
+            with lock:
+                latencias.extend(propias)
+                codigos.extend(propios_codigos)
+                esperas.extend(propias_esperas)
+
+        with override_settings(KANBAN_CONCURRENCIA=modo):
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=opciones['hilos']) as executor:
+                list(executor.map(movedor, range(opciones['hilos'])))
+            segundos = time.perf_counter() - inicio
+
+        resumen = resumir(latencias, errores=sum(c >= 500 for c in codigos), segundos=segundos)
+        resumen['conflictos'] = sum(c == 409 for c in codigos)
+        resumen['exitosos'] = sum(c < 300 for c in codigos)
+        en_ms = [valor * 1000 for valor in esperas]
+        resumen['espera_bloqueo_p50_ms'] = round(percentil(en_ms, 50), 3)
+        resumen['espera_bloqueo_p95_ms'] = round(percentil(en_ms, 95), 3)
+        resumen['espera_bloqueo_fraccion'] = round(sum(esperas) / sum(latencias), 3) if latencias else 0.0
+        resultados[modo] = resumen
+
+    return resultados
+
+
+@suite('throttling')
+def suite_throttling(datos, opciones):
+    """
+    Sobrecarga del token bucket: el mismo endpoint sin límites y con límites
+    (tasas altas, para que ningún request se rechace) en cada almacén.
+    """
+    from django.test import override_settings
+
+    from .throttling import AlmacenCache, AlmacenMemoria
+
+    rng = random.Random(opciones['semilla'])
+    cliente = cliente_autenticado(datos.encargados[0])
+    escenario = {'request': lambda rng: ('get', '/api/me/', None)}
+    sin_limite = {ambito: {'*': '1000000/s'} for ambito in ('autenticacion', 'lectura', 'escritura')}
+    resultados = {}
+
+    # Costo aislado de consumir una ficha
+    for nombre, almacen in (('memoria', AlmacenMemoria()), ('cache', AlmacenCache())):
+        latencias = []
+        for i in range(opciones['repeticiones'] * 20):
+            inicio = time.perf_counter()
+            almacen.consumir(f'benchmark:{i % 50}', 1000000, 1, time.time())
+            latencias.append(time.perf_counter() - inicio)
+        almacen.limpiar()
+        resumen = resumir(latencias)
+        resumen['us_media'] = round(sum(latencias) / len(latencias) * 1e6, 2)
+        resultados[f'consumir-{nombre}'] = resumen
+
+    configuraciones = (
+        ('sin-throttle', {'THROTTLE_ACTIVO': False}),
+        ('memoria', {'THROTTLE_ACTIVO': True, 'THROTTLE_ALMACEN': 'memoria', 'THROTTLE_TASAS': sin_limite}),
+        ('cache', {'THROTTLE_ACTIVO': True, 'THROTTLE_ALMACEN': 'cache', 'THROTTLE_TASAS': sin_limite}),
+    )
+    for nombre, valores in configuraciones:
+        with override_settings(**valores):
+            ejecutar(cliente, escenario, rng)
+            latencias, errores = [], 0
+            for _ in range(opciones['repeticiones']):
+                duracion, _, codigo = ejecutar(cliente, escenario, rng)
+                latencias.append(duracion)
+                errores += codigo >= 400
+            resultados[nombre] = resumir(latencias, errores=errores)
+
+    return resultados
+
+
+@suite('respuestas')
+def suite_respuestas(datos, opciones):
+    """
+    Tamaño y tiempo de render del listado más grande (tareas de los empleados
+    de un encargado): renderer de DRF frente al de orjson, forma anidada
+    frente a normalizada, y bytes transferidos con cada codificación.
+    """
+    from rest_framework.renderers import JSONRenderer
+
+    from .renderers import JSONRapidoRenderer, normalizar
+
+    encargado = datos.encargados[0]
+    cliente = cliente_autenticado(encargado)
+    ruta = f'/api/tareas-empleados-encargado/{encargado}/'
+    resultados = {}
+
+    datos_listado = json.loads(cliente.get(ruta).content)
+    for nombre, renderer in (('drf', JSONRenderer()), ('orjson', JSONRapidoRenderer())):
+        latencias = []
+        for _ in range(opciones['repeticiones']):
+            inicio = time.perf_counter()
+            renderer.render(datos_listado)
+            latencias.append(time.perf_counter() - inicio)
+        resultados[f'render-{nombre}'] = resumir(latencias)
+
+    tamanos = {}
+    for forma, sufijo in (('anidada', ''), ('normalizada', '?formato=normalizado')):
+        for codificacion in ('identity', 'gzip', 'br'):
+            response = cliente.get(ruta + sufijo, HTTP_ACCEPT_ENCODING=codificacion)
+            tamanos[f'{forma}-{response.get("Content-Encoding", "identity")}'] = len(response.content)
+    resultados['bytes'] = tamanos
+
+    inicio = time.perf_counter()
+    normalizar(json.loads(json.dumps(datos_listado)))
+    resultados['normalizar_ms'] = round((time.perf_counter() - inicio) * 1000, 3)
+    return resultados
+
+
+@suite('binario')
+def suite_binario(datos, opciones):
+    """
+    JSON frente a MessagePack y CBOR en los tableros que leen los clientes
+    móviles (tareas de un empleado y de un proyecto): tiempo de codificación,
+    de decodificación y tamaño, sin y con gzip. Los formatos cuya librería no
+    está instalada se omiten.
+    """
+    import gzip
+
+    from rest_framework.parsers import JSONParser
+
+    from .parsers import CBORParser, MessagePackParser
+    from .renderers import CBORRenderer, JSONRapidoRenderer, MessagePackRenderer, cbor2, msgpack
+
+    cliente = cliente_autenticado(datos.encargados[0])
+    tableros = {
+        'tareas-empleado': f'/api/tareas-empleado/{datos.empleados[0]}/',
+        'tareas-proyecto': f'/api/tareas-proyecto/{datos.proyectos[0]}/',
+    }
+    formatos = [('json', JSONRapidoRenderer(), JSONParser())]
+    if msgpack is not None:
+        formatos.append(('msgpack', MessagePackRenderer(), MessagePackParser()))
+    if cbor2 is not None:
+        formatos.append(('cbor', CBORRenderer(), CBORParser()))
+
+    resultados = {}
+    for tablero, ruta in tableros.items():
+        contenido = json.loads(cliente.get(ruta).content)
+        for nombre, renderer, parser in formatos:
+            codificar, decodificar = [], []
+            for _ in range(opciones['repeticiones']):
+                inicio = time.perf_counter()
+                cuerpo = renderer.render(contenido)
+                codificar.append(time.perf_counter() - inicio)
+                inicio = time.perf_counter()
+                parser.parse(io.BytesIO(cuerpo))
+                decodificar.append(time.perf_counter() - inicio)
+            resultados[f'{tablero}-{nombre}-codificar'] = resumir(codificar)
+            resultados[f'{tablero}-{nombre}-decodificar'] = resumir(decodificar)
+            resultados[f'{tablero}-{nombre}-bytes'] = {
+                'plano': len(cuerpo),
+                'gzip': len(gzip.compress(cuerpo, mtime=0)),
+            }
+    return resultados
+
+
+@suite('particiones')
+def suite_particiones(datos, opciones):
+    """
+    Consultas acotadas por fecha sobre un histórico sintético grande
+    (`--tareas-historicas` tareas repartidas en los cinco años anteriores a
+    los datos sembrados): conteo de un mes, tablero de un proyecto en un mes,
+    horas por empleado en un trimestre y, como referencia, el conteo de un
+    proyecto sin filtro de fecha. En PostgreSQL se mide antes y después de
+    convertir la tabla en particionada (mensual) y se informa cuántas
+    particiones hay; en otros motores sólo la tabla con sus índices.
+    El histórico se borra al final para no alterar las demás suites.
+    """
+    from django.db.models import Sum
+
+    from . import particiones
+
+    rng = random.Random(opciones['semilla'])
+    desde_historico = datetime.date(2019, 1, 1)
+    hasta_historico = datetime.date(2024, 1, 1)  # Los datos sembrados empiezan acá
+    dias = (hasta_historico - desde_historico).days
+    asignaciones = list(
+        Proyecto.empleados.through.objects.filter(proyecto_id__in=datos.proyectos)
+        .values_list('proyecto_id', 'usuario_id')
+    )
+    estados = ['completada'] * 8 + ['pendiente', 'progreso']
+    resultados = {}
+
+    inicio = time.perf_counter()
+    restantes = opciones['tareas_historicas']
+    while restantes > 0:
+        lote = []
+        for _ in range(min(restantes, 5000)):
+            proyecto_id, empleado_id = rng.choice(asignaciones)
+            lote.append(Tarea(
+                titulo='Tarea histórica',
+                descripcion='Tarea sintética de benchmark',
+                proyecto_id=proyecto_id,
+                empleado_id=empleado_id,
+                fecha=desde_historico + datetime.timedelta(days=rng.randrange(dias)),
+                horas_invertidas=rng.randint(1, 8),
+                estado=rng.choice(estados),
+            ))
+        Tarea.objects.bulk_create(lote)
+        restantes -= len(lote)
+    resultados['siembra_s'] = round(time.perf_counter() - inicio, 2)
+
+    proyecto_id = asignaciones[0][0]
+    mes = {'fecha__gte': datetime.date(2022, 3, 1), 'fecha__lt': datetime.date(2022, 4, 1)}
+    trimestre = {'fecha__gte': datetime.date(2022, 7, 1), 'fecha__lt': datetime.date(2022, 10, 1)}
+    consultas = {
+        'conteo-mes': lambda: Tarea.objects.filter(**mes).count(),
+        'proyecto-mes': lambda: list(
+            Tarea.objects.filter(proyecto_id=proyecto_id, **mes).select_related('empleado').order_by('estado', 'orden')
+        ),
+        'horas-trimestre': lambda: list(
+            Tarea.objects.filter(**trimestre).values('empleado_id').annotate(horas=Sum('horas_invertidas'))
+        ),
+        'proyecto-sin-fecha': lambda: Tarea.objects.filter(proyecto_id=proyecto_id).count(),
+    }
+
+    def medir(etiqueta):
+        for nombre, consulta in consultas.items():
+            latencias = []
+            for _ in range(opciones['repeticiones']):
+                inicio = time.perf_counter()
+                consulta()
+                latencias.append(time.perf_counter() - inicio)
+            resultados[f'{etiqueta}-{nombre}'] = resumir(latencias)
+
+    try:
+        medir('tabla')
+        if particiones.disponible(connection.alias):
+            inicio = time.perf_counter()
+            particiones.convertir('mensual', futuras=0, using=connection.alias)
+            resultados['conversion_s'] = round(time.perf_counter() - inicio, 2)
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE "{particiones.TABLA}"')
+            medir('particionada')
+            resultados['particiones'] = len(particiones.particiones(connection.alias))
+        else:
+            resultados['particionada'] = f'no disponible en {connection.vendor} (sólo PostgreSQL)'
+    finally:
+        Tarea.objects.filter(fecha__lt=hasta_historico)._raw_delete(connection.alias)
+    return resultados
+
+
+@suite('analitica')
+def suite_analitica(datos, opciones):
+    """
+    Lead/cycle time y throughput sobre un registro sintético de
+    `--transiciones` transiciones (tareas que pasan por pendiente, progreso y
+    completada, a veces con un retroceso, durante el último año). Mide cada
+    endpoint de analítica con sus agrupaciones y con filtro de proyecto. Las
+    transiciones sintéticas usan ids de tarea propios y se borran al final.
+    """
+    from django.utils import timezone
+
+    from .models import TransicionTarea
+
+    rng = random.Random(opciones['semilla'])
+    base_ids = 10 ** 9  # Fuera del rango de las tareas reales
+    asignaciones = list(
+        Proyecto.empleados.through.objects.filter(proyecto_id__in=datos.proyectos)
+        .values_list('proyecto_id', 'usuario_id')
+    )
+    ahora = timezone.now()
+    resultados = {}
+
+    inicio = time.perf_counter()
+    lote, tarea_id, total = [], base_ids, 0
+    while total < opciones['transiciones']:
+        tarea_id += 1
+        proyecto_id, empleado_id = rng.choice(asignaciones)
+        momento = ahora - datetime.timedelta(days=rng.uniform(0, 365))
+        pasos = [(None, 'pendiente'), ('pendiente', 'progreso')]
+        if rng.random() < 0.2:
+            pasos += [('progreso', 'pendiente'), ('pendiente', 'progreso')]
+        pasos.append(('progreso', 'completada'))
+        for desde, hacia in pasos:
+            lote.append(TransicionTarea(
+                tarea_id=tarea_id, proyecto_id=proyecto_id, empleado_id=empleado_id,
+                desde=desde, hacia=hacia, momento=momento,
+            ))
+            momento += datetime.timedelta(hours=rng.expovariate(1 / 30))
+        if len(lote) >= 5000:
+            TransicionTarea.objects.bulk_create(lote)
+            total += len(lote)
+            lote = []
+    if lote:
+        TransicionTarea.objects.bulk_create(lote)
+        total += len(lote)
+    resultados['transiciones'] = total
+    resultados['siembra_s'] = round(time.perf_counter() - inicio, 2)
+
+    cliente = cliente_autenticado(datos.encargados[0])
+    hasta = timezone.localdate()
+    rango = f'desde={hasta - datetime.timedelta(weeks=26)}&hasta={hasta}'
+    rutas = {
+        'tiempos-proyecto': f'/api/analitica/tiempos/?{rango}&agrupar=proyecto',
+        'tiempos-semana': f'/api/analitica/tiempos/?{rango}&agrupar=semana',
+        'tiempos-un-proyecto': f'/api/analitica/tiempos/?{rango}&agrupar=semana&proyecto={asignaciones[0][0]}',
+        'throughput-total': f'/api/analitica/throughput/?{rango}',
+        'throughput-empleado': f'/api/analitica/throughput/?{rango}&agrupar=empleado',
+    }
+    try:
+        for nombre, ruta in rutas.items():
+            escenario = {'request': lambda rng, ruta=ruta: ('get', ruta, None)}
+            latencias, consultas, errores = [], [], 0
+            for _ in range(max(1, opciones['repeticiones'] // 5)):
+                duracion, cantidad, codigo = ejecutar(cliente, escenario, rng)
+                latencias.append(duracion)
+                consultas.append(cantidad)
+                errores += codigo != 200
+            resultados[nombre] = resumir(latencias, consultas, errores)
+    finally:
+        TransicionTarea.objects.filter(tarea_id__gt=base_ids)._raw_delete(connection.alias)
+    return resultados
+
+
+@suite('revocacion')
+def suite_revocacion(datos, opciones):
+    """
+    Refresh con rotación sobre una lista de `--revocados` tokens revocados
+    (la mitad ya vencidos): latencia y consultas del refresh, costo de la
+    consulta "¿está revocado?" con y sin el frente en memoria, y duración
+    de la purga de los vencidos.
+    """
+    import uuid
+
+    from django.utils import timezone
+
+    from . import revocacion
+    from .models import TokenRevocado
+
+    ahora = timezone.now()
+    resultados = {}
+    inicio = time.perf_counter()
+    TokenRevocado.objects.bulk_create([
+        TokenRevocado(
+            jti=uuid.uuid4().hex,
+            expira_en=ahora + datetime.timedelta(days=1 if indice % 2 else -1),
+        )
+        for indice in range(opciones['revocados'])
+    ], batch_size=5000)
+    resultados['siembra_s'] = round(time.perf_counter() - inicio, 2)
+    revocacion.frente.reiniciar()
+
+    cliente = Client()
+    rng = random.Random(opciones['semilla'])
+    tokens = [str(RefreshToken.for_user(Usuario.objects.get(pk=pk))) for pk in datos.empleados[:10]]
+    latencias, consultas, errores = [], [], 0
+    for _ in range(opciones['repeticiones']):
+        indice = rng.randrange(len(tokens))
+        medicion = Medicion()
+        with connection.execute_wrapper(medicion):
+            inicio = time.perf_counter()
+            response = cliente.post(
+                '/api/auth/refresh/', data={'refresh': tokens[indice]}, content_type='application/json'
+            )
+            latencias.append(time.perf_counter() - inicio)
+        consultas.append(medicion.consultas)
+        if response.status_code == 200:
+            tokens[indice] = response.json()['refresh']
+        else:
+            errores += 1
+    resultados['refresh'] = resumir(latencias, consultas, errores)
+
+    jtis = [uuid.uuid4().hex for _ in range(opciones['repeticiones'])]
+    for etiqueta, consulta in (
+        ('chequeo-frente', revocacion.esta_revocado),
+        ('chequeo-base', lambda jti: TokenRevocado.objects.filter(jti=jti).exists()),
+    ):
+        latencias = []
+        for jti in jtis:
+            inicio = time.perf_counter()
+            consulta(jti)
+            latencias.append(time.perf_counter() - inicio)
+        resultados[etiqueta] = resumir(latencias)
+    resultados['bloom_bytes'] = len(revocacion.frente.filtro.arreglo)
+
+    inicio = time.perf_counter()
+    resultados['purgados'] = revocacion.purgar_vencidos()
+    resultados['purga_s'] = round(time.perf_counter() - inicio, 2)
+    TokenRevocado.objects.all()._raw_delete(connection.alias)
+    revocacion.frente.reiniciar()
+    return resultados
+
+
+@suite('jerarquia')
+def suite_jerarquia(datos, opciones):
+    """
+    Subordinados y tareas "de todo lo que está debajo de mí" sobre dos
+    árboles sintéticos: uno profundo (`--profundidad` encargados en cadena)
+    y uno ancho (`--ancho` encargados bajo una misma raíz), con 5 empleados
+    por encargado y 3 tareas por empleado. Compara el CTE recursivo con el
+    recorrido nivel por nivel (una consulta por nivel) y mide el endpoint
+    tareas-empleados-encargado con ?jerarquia=true. Los árboles se borran al
+    final.
+    """
+    from django.conf import settings
+
+    from . import jerarquia
+
+    password = make_password(PASSWORD_BENCHMARK, salt='benchmarksemilla')
+    proyecto_id = datos.proyectos[0]
+    creados = []
+
+    def encargado(nombre, jefe_id):
+        usuario = Usuario.objects.create(
+            nombre=nombre, email=f'{nombre}@jerarquia.bench.local', password=password,
+            rol='encargado', encargado_id=jefe_id,
+        )
+        creados.append(usuario.id)
+        return usuario.id
+
+    def equipo(jefe_id):
+        empleados = Usuario.objects.bulk_create([
+            Usuario(
+                nombre=f'Empleado {jefe_id}-{j}', email=f'empleado{jefe_id}-{j}@jerarquia.bench.local',
+                password=password, rol='empleado', encargado_id=jefe_id,
+            )
+            for j in range(5)
+        ])
+        creados.extend(u.id for u in empleados)
+        Tarea.objects.bulk_create([
+            Tarea(
+                titulo=f'Tarea {empleado.id}-{n}', descripcion='Tarea sintética de benchmark',
+                proyecto_id=proyecto_id, fecha=datetime.date(2024, 1, 1), horas_invertidas=1,
+                empleado_id=empleado.id, estado='pendiente', orden=n + 1,
+            )
+            for empleado in empleados for n in range(3)
+        ])
+
+    profundidad = min(opciones['profundidad'], settings.JERARQUIA_MAX_NIVELES - 1)
+    raiz_profunda = jefe = encargado('profundo-0', None)
+    for nivel in range(1, profundidad):
+        jefe = encargado(f'profundo-{nivel}', jefe)
+        equipo(jefe)
+
+    raiz_ancha = encargado('ancho-raiz', None)
+    for indice in range(opciones['ancho']):
+        equipo(encargado(f'ancho-{indice}', raiz_ancha))
+
+    def nivel_por_nivel(raiz):
+        ids, frontera = [], [raiz]
+        while frontera:
+            frontera = list(Usuario.objects.filter(encargado_id__in=frontera).values_list('id', flat=True))
+            ids.extend(frontera)
+        return ids
+
+    resultados = {'profundidad': profundidad, 'ancho': opciones['ancho']}
+    try:
+        for arbol, raiz in (('profundo', raiz_profunda), ('ancho', raiz_ancha)):
+            cliente = cliente_autenticado(raiz)
+            variantes = {
+                'cte': lambda raiz=raiz: list(jerarquia.subordinados(raiz).values_list('id', flat=True)),
+                'nivel-por-nivel': lambda raiz=raiz: nivel_por_nivel(raiz),
+                'tareas-endpoint': lambda raiz=raiz, cliente=cliente: cliente.get(
+                    f'/api/tareas-empleados-encargado/{raiz}/?jerarquia=true'
+                ),
+            }
+            for nombre, variante in variantes.items():
+                latencias, consultas = [], []
+                for _ in range(max(1, opciones['repeticiones'] // 5)):
+                    medicion = Medicion()
+                    with connection.execute_wrapper(medicion):
+                        inicio = time.perf_counter()
+                        variante()
+                        latencias.append(time.perf_counter() - inicio)
+                    consultas.append(medicion.consultas)
+                resultados[f'{arbol}-{nombre}'] = resumir(latencias, consultas)
+    finally:
+        Tarea.objects.filter(empleado_id__in=creados)._raw_delete(connection.alias)
+        Usuario.objects.filter(id__in=creados)._raw_delete(connection.alias)
+    return resultados
+
+
+@suite('sanatorios')
+def suite_sanatorios(datos, opciones):
+    """
+    `--sanatorios` sanatorios de tamaños desparejos (el i-ésimo tiene
+    ~N/i encargados, con N = 4·`--encargados`), cada uno con 10 empleados
+    y 2 proyectos por encargado y 10 tareas por empleado. Varios hilos
+    reparten requests de encargados eligiendo el sanatorio al azar y se
+    compara la latencia en los sanatorios grandes (el primer 20 %) con la
+    de los chicos (la mitad de abajo). Todo lo sembrado se borra al final.
+    """
+    from .models import Permiso, Sanatorio, TareaArchivada, TransicionTarea
+    from .tenencia import en_sanatorio
+
+    cantidad = max(2, opciones['sanatorios'])
+    maximo = 4 * opciones['encargados']
+    sanatorios = Sanatorio.objects.bulk_create([
+        Sanatorio(nombre=f'Sanatorio {i}', slug=f'bench-{i}') for i in range(cantidad)
+    ])
+    ids = [s.id for s in sanatorios]
+
+    por_sanatorio = {}
+    resultados = {'sanatorios': cantidad}
+    inicio = time.perf_counter()
+    try:
+        for indice, sanatorio in enumerate(sanatorios):
+            with en_sanatorio(sanatorio.id):
+                por_sanatorio[sanatorio.id] = sembrar(
+                    encargados=max(1, round(maximo / (indice + 1))), empleados=10, proyectos=2, tareas=10,
+                    semilla=opciones['semilla'] + indice, dominio=f'{sanatorio.slug}.bench.local',
+                )
+        resultados['siembra_s'] = round(time.perf_counter() - inicio, 2)
+        resultados['tareas_por_sanatorio'] = {
+            'max': max(len(d.tareas) for d in por_sanatorio.values()),
+            'min': min(len(d.tareas) for d in por_sanatorio.values()),
+        }
+        grandes = set(ids[:max(1, cantidad // 5)])
+        chicos = set(ids[cantidad // 2:])
+
+        def escenarios(sanatorio_id):
+            d = por_sanatorio[sanatorio_id]
+            encargado = d.encargados[0]
+            return [
+                f'/api/empleados-por-encargado/{encargado}/',
+                f'/api/tareas-empleados-encargado/{encargado}/',
+                f'/api/tareas-proyecto/{d.proyectos[0]}/',
+                '/api/proyectos/',
+            ]
+
+        clientes = {sanatorio_id: cliente_autenticado(por_sanatorio[sanatorio_id].encargados[0]) for sanatorio_id in ids}
+        por_hilo = max(1, opciones['requests'] // opciones['hilos'])
+        lock = threading.Lock()
+        latencias = {'grandes': [], 'chicos': []}
+        consultas = {'grandes': [], 'chicos': []}
+        errores = [0]
+
+        def trabajador(indice):
+            rng = random.Random(opciones['semilla'] + indice)
+            propias = {'grandes': [], 'chicos': []}
+            propias_consultas = {'grandes': [], 'chicos': []}
+            propios_errores = 0
+            try:
+                for _ in range(por_hilo):
+                    sanatorio_id = rng.choice(ids)
+                    ruta = rng.choice(escenarios(sanatorio_id))
+                    medicion = Medicion()
+                    with connection.execute_wrapper(medicion):
+                        inicio = time.perf_counter()
+                        response = clientes[sanatorio_id].get(ruta)
+                        duracion = time.perf_counter() - inicio
+                    propios_errores += response.status_code >= 400
+                    grupo = 'grandes' if sanatorio_id in grandes else 'chicos' if sanatorio_id in chicos else None
+                    if grupo:
+                        propias[grupo].append(duracion)
+                        propias_consultas[grupo].append(medicion.consultas)
+            finally:
+                connections.close_all()
+            with lock:
+                for grupo in latencias:
+                    latencias[grupo].extend(propias[grupo])
+                    consultas[grupo].extend(propias_consultas[grupo])
+                errores[0] += propios_errores
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=opciones['hilos']) as executor:
+            list(executor.map(trabajador, range(opciones['hilos'])))
+        segundos = time.perf_counter() - inicio
+        for grupo in latencias:
+            resultados[grupo] = resumir(latencias[grupo], consultas[grupo])
+        resultados['errores'] = errores[0]
+        resultados['requests_por_segundo'] = round(por_hilo * opciones['hilos'] / segundos, 1)
+    finally:
+        for modelo in (TransicionTarea, TareaArchivada, Tarea, Permiso):
+            modelo._base_manager.filter(sanatorio_id__in=ids)._raw_delete(connection.alias)
+        Proyecto.empleados.through.objects.filter(proyecto__sanatorio_id__in=ids).delete()
+        Proyecto._base_manager.filter(sanatorio_id__in=ids)._raw_delete(connection.alias)
+        Usuario._base_manager.filter(sanatorio_id__in=ids)._raw_delete(connection.alias)
+        Sanatorio.objects.filter(id__in=ids)._raw_delete(connection.alias)
+    return resultados
+
+
+@suite('cronograma')
+def suite_cronograma(datos, opciones):
+    """
+    Cronograma sobre `--proyectos-historicos` proyectos sintéticos repartidos
+    entre 2000 y 2024 (de 10 a 120 días, 1 % sin fecha_fin): la consulta de
+    proyectos vigentes en una ventana de 30 días reciente y en una antigua,
+    contra traer todos los proyectos y filtrarlos en Python, y el endpoint
+    cronograma/ con las tareas de la siembra. Los proyectos se borran al
+    final.
+    """
+    from .cronograma import proyectos_vigentes
+    from .tenencia import en_sanatorio, sanatorio_por_defecto
+
+    rng = random.Random(opciones['semilla'])
+    encargado = datos.encargados[0]
+    base = datetime.date(2000, 1, 1)
+    historicos = []
+    for indice in range(opciones['proyectos_historicos']):
+        inicio = base + datetime.timedelta(days=rng.randrange(9131))
+        historicos.append(Proyecto(
+            nombre=f'Histórico {indice}', descripcion='Proyecto histórico de benchmark', estado='completado',
+            fecha_inicio=inicio, encargado_id=encargado,
+            fecha_fin=None if rng.random() < 0.01 else inicio + datetime.timedelta(days=rng.randint(10, 120)),
+        ))
+    ids = [p.id for p in Proyecto.objects.bulk_create(historicos, batch_size=5000)]
+
+    ventanas = {
+        'reciente': (datetime.date(2024, 3, 1), datetime.date(2024, 3, 30)),
+        'antigua': (datetime.date(2010, 3, 1), datetime.date(2010, 3, 30)),
+    }
+
+    def en_python(desde, hasta):
+        return [
+            p for p in Proyecto.objects.only('fecha_inicio', 'fecha_fin')
+            if p.fecha_inicio <= hasta and (p.fecha_fin is None or p.fecha_fin >= desde)
+        ]
+
+    resultados = {'proyectos': Proyecto.objects.count()}
+    cliente = cliente_autenticado(encargado)
+    try:
+        variantes = {}
+        for nombre, (desde, hasta) in ventanas.items():
+            variantes[f'vigentes-{nombre}'] = lambda desde=desde, hasta=hasta: list(
+                proyectos_vigentes(desde, hasta).values_list('id', flat=True)
+            )
+            variantes[f'python-{nombre}'] = lambda desde=desde, hasta=hasta: en_python(desde, hasta)
+            variantes[f'endpoint-{nombre}'] = lambda desde=desde, hasta=hasta: cliente.get(
+                f'/api/cronograma/?desde={desde}&hasta={hasta}'
+            )
+        # Como en un request: con el sanatorio activo, que encabeza el índice
+        with en_sanatorio(sanatorio_por_defecto()):
+            for nombre, variante in variantes.items():
+                latencias, consultas = [], []
+                for _ in range(max(1, opciones['repeticiones'] // 5)):
+                    medicion = Medicion()
+                    with connection.execute_wrapper(medicion):
+                        inicio = time.perf_counter()
+                        variante()
+                        latencias.append(time.perf_counter() - inicio)
+                    consultas.append(medicion.consultas)
+                resultados[nombre] = resumir(latencias, consultas)
+    finally:
+        Proyecto.objects.filter(id__in=ids)._raw_delete(connection.alias)
+    return resultados
+
+
+@suite('ciclo')
+def suite_ciclo(datos, opciones):
+    """
+    Transiciones de ciclo de vida sobre proyectos sintéticos de 10
+    empleados con `--tareas` tareas cada uno (estados al azar): completar
+    el proyecto con un tareas/actualizar/ por tarea (lo que hacía el
+    cliente) contra la acción completar/, y reasignar-tareas/ y
+    quitar-empleado/ sobre otro proyecto. Los proyectos se borran al final.
+    """
+    from .models import EventoDominio, TransicionTarea, VersionColumna
+
+    rng = random.Random(opciones['semilla'])
+    encargado = datos.encargados[0]
+    empleados = datos.empleados_por_encargado[encargado][:10]
+    estados = [estado for estado, _ in Tarea.ESTADOS]
+    cliente = cliente_autenticado(encargado)
+
+    def proyecto(nombre):
+        creado = Proyecto.objects.create(
+            nombre=nombre, descripcion='Proyecto de benchmark de ciclo de vida', estado='progreso',
+            fecha_inicio=datetime.date(2024, 1, 1), encargado_id=encargado,
+        )
+        creado.empleados.add(*empleados)
+        ordenes = {}
+        nuevas = []
+        for empleado in empleados:
+            for n in range(opciones['tareas']):
+                estado = rng.choice(estados)
+                ordenes[(empleado, estado)] = ordenes.get((empleado, estado), 0) + 1
+                nuevas.append(Tarea(
+                    titulo=f'Tarea {nombre} {empleado}-{n}', descripcion='Tarea sintética de benchmark',
+                    proyecto=creado, fecha=datetime.date(2024, 1, 2), horas_invertidas=1,
+                    empleado_id=empleado, estado=estado, orden=ordenes[(empleado, estado)],
+                ))
+        Tarea.objects.bulk_create(nuevas)
+        return creado
+
+    def medir(funcion):
+        medicion = Medicion()
+        with connection.execute_wrapper(medicion):
+            inicio = time.perf_counter()
+            respuesta = funcion()
+            duracion = time.perf_counter() - inicio
+        return {'ms': round(duracion * 1000, 1), 'consultas': medicion.consultas, 'respuesta': respuesta}
+
+    creados = [proyecto('por-tarea'), proyecto('en-lote'), proyecto('reasignar')]
+    por_tarea, en_lote, reasignar = creados
+    resultados = {'tareas_por_proyecto': len(empleados) * opciones['tareas']}
+    try:
+        def uno_por_uno():
+            pendientes = list(Tarea.objects.filter(proyecto=por_tarea).exclude(estado='completada').values_list('id', flat=True))
+            for tarea_id in pendientes:
+                cliente.post(
+                    '/api/tareas/actualizar/', data={'id': tarea_id, 'nuevo_estado': 'completada'},
+                    content_type='application/json',
+                )
+            return {'tareas_movidas': len(pendientes)}
+
+        resultados['completar-por-tarea'] = medir(uno_por_uno)
+        resultados['completar-en-lote'] = medir(
+            lambda: cliente.post(f'/api/proyectos/{en_lote.pk}/completar/').json()
+        )
+        resultados['reasignar-tareas'] = medir(lambda: cliente.post(
+            f'/api/proyectos/{reasignar.pk}/reasignar-tareas/',
+            data={'origen': empleados[0], 'destino': empleados[1]}, content_type='application/json',
+        ).json())
+        resultados['quitar-empleado'] = medir(lambda: cliente.post(
+            f'/api/proyectos/{reasignar.pk}/quitar-empleado/',
+            data={'empleado': empleados[1], 'destino': empleados[2]}, content_type='application/json',
+        ).json())
+    finally:
+        ids = [p.pk for p in creados]
+        for modelo in (TransicionTarea, VersionColumna, EventoDominio):
+            modelo.objects.filter(proyecto_id__in=ids)._raw_delete(connection.alias)
+        Tarea.objects.filter(proyecto_id__in=ids)._raw_delete(connection.alias)
+        Proyecto.empleados.through.objects.filter(proyecto_id__in=ids).delete()
+        Proyecto.objects.filter(id__in=ids)._raw_delete(connection.alias)
+    return resultados
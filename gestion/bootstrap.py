@@ -0,0 +1,98 @@
+"""
+Carga inicial del tablero en un solo request.
+
+Reemplaza la secuencia me/ → empleados-por-encargado/ → proyectos-por-encargado/
+→ tareas-empleados-encargado/ que hace el front al abrir la app. La respuesta
+tiene la forma normalizada de `?formato=normalizado` (ver renderers.py): las
+tareas y los proyectos referencian usuarios y proyectos por id y cada objeto
+aparece una sola vez en `incluidos`.
+
+Los objetos se cargan con una cantidad fija de consultas, sin importar el
+tamaño del equipo: equipo, proyectos, tareas, proyectos de las tareas que
+faltaban, asignaciones de empleados y, al final, los usuarios referenciados
+que todavía no estaban en el mapa de identidad (por ejemplo el encargado del
+usuario, o empleados de otro equipo asignados a sus proyectos).
+"""
+from .models import Proyecto, Tarea, Usuario
+from .serializers import EmpleadosPorEncargadoSerializer, ProyectoBootstrapSerializer, TareaColumnaSerializer
+
+
+class MapaIdentidad:
+    """Una instancia por (modelo, pk) durante el request."""
+
+    def __init__(self):
+        self.objetos = {Usuario: {}, Proyecto: {}}
+
+    def agregar(self, objetos):
+        for objeto in objetos:
+            self.objetos[type(objeto)].setdefault(objeto.pk, objeto)
+        return objetos
+
+    def completar(self, modelo, ids):
+        """Carga en una sola consulta los `ids` que todavía no están en el mapa."""
+        faltantes = {pk for pk in ids if pk is not None} - self.objetos[modelo].keys()
+        if faltantes:
+            self.agregar(modelo.objects.filter(pk__in=faltantes))
+
+    def serializar(self, modelo, serializer_class):
+        instancias = sorted(self.objetos[modelo].values(), key=lambda objeto: objeto.pk)
+        return {fila['id']: fila for fila in serializer_class(instancias, many=True).data}
+
+
+def construir_bootstrap(usuario, filtros_tareas=None):
+    mapa = MapaIdentidad()
+    mapa.agregar([usuario])
+
+    if usuario.rol == 'empleado':
+        equipo = []
+        proyectos = mapa.agregar(list(usuario.proyectos_asignados.order_by('-created_at')))
+        tareas = Tarea.objects.filter(empleado=usuario)
+    else:
+        equipo = mapa.agregar(list(
+            Usuario.objects.filter(encargado=usuario, rol='empleado').order_by('-created_at')
+        ))
+        proyectos = mapa.agregar(list(Proyecto.objects.filter(encargado=usuario).order_by('-created_at')))
+        tareas = Tarea.objects.filter(empleado_id__in=[empleado.id for empleado in equipo])
+
+    columnas = {estado: [] for estado, _ in Tarea.ESTADOS}
+    tareas = list(tareas.filter(**(filtros_tareas or {})).order_by('estado', 'orden', 'id'))
+    mapa.completar(Proyecto, [tarea.proyecto_id for tarea in tareas])
+
+    asignaciones = {proyecto_id: [] for proyecto_id in mapa.objetos[Proyecto]}
+    for proyecto_id, empleado_id in Proyecto.empleados.through.objects.filter(
+        proyecto_id__in=list(asignaciones)
+    ).order_by('id').values_list('proyecto_id', 'usuario_id'):
+        asignaciones[proyecto_id].append(empleado_id)
+
+    mapa.completar(Usuario, [
+        usuario.encargado_id,
+        *(tarea.empleado_id for tarea in tareas),
+        *(proyecto.encargado_id for proyecto in mapa.objetos[Proyecto].values()),
+        *(empleado_id for ids in asignaciones.values() for empleado_id in ids),
+    ])
+
+    for tarea in TareaColumnaSerializer(tareas, many=True).data:
+        columnas[tarea['estado']].append(tarea)
+
+    proyectos_serializados = mapa.serializar(Proyecto, ProyectoBootstrapSerializer)
+    for proyecto_id, empleados in asignaciones.items():
+        proyectos_serializados[proyecto_id]['empleados'] = empleados
+
+    return {
+        'usuario': {
+            'id': usuario.id,
+            'nombre': usuario.nombre,
+            'email': usuario.email,
+            'rol': usuario.rol,
+            'encargado': usuario.encargado_id,
+            'created_at': usuario.created_at,
+            'updated_at': usuario.updated_at,
+        },
+        'equipo': [empleado.id for empleado in equipo],
+        'proyectos': [proyecto.id for proyecto in proyectos],
+        'columnas': columnas,
+        'incluidos': {
+            'usuarios': mapa.serializar(Usuario, EmpleadosPorEncargadoSerializer),
+            'proyectos': proyectos_serializados,
+        },
+    }
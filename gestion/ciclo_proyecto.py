@@ -0,0 +1,51 @@
+"""
+Transiciones del ciclo de vida de un proyecto que arrastran a sus tareas:
+
+- completar el proyecto: todas las tareas sin completar pasan a
+  'completada', al final de la columna de su empleado;
+- reasignar todas las tareas de un empleado a otro (cada una en su mismo
+  estado, al final de la columna del nuevo empleado);
+- quitar a un empleado del proyecto, reasignando antes sus tareas.
+
+Cada operación es una transacción con unas pocas sentencias sobre el
+conjunto de tareas (ver `kanban.mover_en_lote`), en lugar de un
+tareas/actualizar/ por tarea, y devuelve cuántas filas movió.
+"""
+from django.db import transaction
+
+from .kanban import mover_en_lote
+from .models import Tarea
+
+
+def completar_proyecto(proyecto, actor_id=None):
+    with transaction.atomic():
+        resultado = mover_en_lote(
+            proyecto.pk, Tarea.objects.filter(proyecto=proyecto).exclude(estado='completada'),
+            estado='completada', actor_id=actor_id,
+        )
+        if proyecto.estado != 'completado':
+            proyecto.estado = 'completado'
+            proyecto.save(update_fields=['estado', 'updated_at'])
+    return {'proyecto': proyecto.pk, 'estado': proyecto.estado, **resultado}
+
+
+def reasignar_tareas(proyecto, origen_id, destino_id, actor_id=None):
+    """Pasa las tareas de `origen_id` en el proyecto a `destino_id`, asignándolo si no lo estaba."""
+    with transaction.atomic():
+        if not proyecto.empleados.filter(pk=destino_id).exists():
+            proyecto.empleados.add(destino_id)
+        resultado = mover_en_lote(
+            proyecto.pk, Tarea.objects.filter(proyecto=proyecto, empleado_id=origen_id),
+            empleado_id=destino_id, actor_id=actor_id,
+        )
+    return {'proyecto': proyecto.pk, **resultado}
+
+
+def quitar_empleado(proyecto, empleado_id, destino_id=None, actor_id=None):
+    """Quita a `empleado_id` del proyecto; sus tareas pasan antes a `destino_id`."""
+    with transaction.atomic():
+        resultado = {'proyecto': proyecto.pk, 'tareas_movidas': 0, 'columnas': 0, 'transiciones': 0}
+        if destino_id is not None:
+            resultado = reasignar_tareas(proyecto, empleado_id, destino_id, actor_id)
+        proyecto.empleados.remove(empleado_id)
+    return resultado
@@ -0,0 +1,135 @@
+"""
+Cronograma (Gantt) de proyectos: los proyectos vigentes en una ventana de
+fechas y sus tareas agrupadas por día.
+
+Un proyecto está vigente en [desde, hasta] si empezó antes del final de la
+ventana y no terminó antes de su inicio (`fecha_fin` nula es un proyecto
+abierto). Un proyecto con `fecha_fin` anterior a `fecha_inicio` no está
+vigente en ningún día, en los dos motores: sus fechas no forman un rango.
+Para que el costo dependa de la ventana y no de la historia de proyectos:
+
+- en PostgreSQL la condición es un solapamiento de rangos (`&&`) sobre
+  `daterange(fecha_inicio, fecha_fin, '[]')`, con un índice GiST sobre
+  (sanatorio_id, esa misma expresión), para que el filtro del sanatorio
+  activo también se resuelva en el índice (migración 0018, con btree_gist;
+  sólo en ese motor);
+- en el resto de los motores se recorre el índice btree
+  (sanatorio, fecha_fin, fecha_inicio) desde `desde`, más los proyectos
+  abiertos (fecha_fin nula), y `fecha_inicio` (contra la ventana y contra
+  `fecha_fin`) se descarta dentro del índice.
+  El costo es el de los proyectos que terminan después de `desde`: chico
+  para las ventanas recientes, que son las que pide el tablero.
+
+Las tareas de esos proyectos se leen por el índice (proyecto, fecha),
+acotadas a la ventana.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, F, Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from rest_framework import serializers
+
+from .archivo import incluye_archivadas
+from .models import Proyecto, Tarea, TareaArchivada
+from .particiones import filtro_fechas
+
+
+TABLA = Proyecto._meta.db_table
+DIAS_POR_DEFECTO = 30
+INDICE_GIST = 'proyecto_vigencia_gist'
+CAMPOS_TAREA = ['id', 'proyecto_id', 'fecha', 'titulo', 'estado', 'orden', 'empleado_id', 'horas_invertidas']
+
+
+def rango_proyecto(tabla=TABLA):
+    """
+    Vigencia del proyecto como daterange cerrado. Con `fecha_fin` anterior al
+    inicio es el rango vacío, que no se solapa con ninguno (daterange no
+    admite rangos invertidos). Tiene que coincidir con la expresión del
+    índice GiST (migraciones 0016 y 0018).
+    """
+    inicio, fin = f'"{tabla}"."fecha_inicio"', f'"{tabla}"."fecha_fin"'
+    return f"CASE WHEN {fin} < {inicio} THEN 'empty'::daterange ELSE daterange({inicio}, {fin}, '[]') END"
+
+
+def proyectos_vigentes(desde, hasta, queryset=None):
+    """
+    Proyectos de `queryset` (por defecto, todos) vigentes en algún día de
+    [desde, hasta]. Fuera de PostgreSQL es una unión: admite ordenar,
+    `values()` y contar, pero no más filtros (van en `queryset`).
+    """
+    queryset = Proyecto.objects.all() if queryset is None else queryset
+    if connections[queryset.db].vendor == 'postgresql':
+        return queryset.filter(RawSQL(
+            f"{rango_proyecto()} && daterange(%s, %s, '[]')", [desde, hasta], output_field=BooleanField()
+        ))
+    # Dos rangos del índice (los que terminan desde `desde` y los abiertos)
+    # en lugar de un OR, que sin estadísticas el planificador de SQLite no
+    # parte en dos búsquedas
+    return queryset.filter(
+        Q(fecha_fin__gte=F('fecha_inicio')), fecha_fin__gte=desde, fecha_inicio__lte=hasta
+    ).union(
+        queryset.filter(fecha_fin__isnull=True, fecha_inicio__lte=hasta), all=True
+    )
+
+
+def filtros_desde_request(request):
+    """
+    Ventana [desde, hasta] a partir de `?desde`/`?hasta` (por defecto, los
+    próximos DIAS_POR_DEFECTO días, a lo sumo CRONOGRAMA_MAX_DIAS) y filtros
+    de proyectos por `?encargado` y `?empleado` (asignado).
+    """
+    rango = filtro_fechas(request)
+    desde = rango.get('fecha__gte') or timezone.localdate()
+    hasta = rango.get('fecha__lte') or desde + datetime.timedelta(days=DIAS_POR_DEFECTO - 1)
+    errores = {}
+    if desde > hasta:
+        errores['desde'] = 'Debe ser anterior o igual a hasta'
+    elif (hasta - desde).days + 1 > settings.CRONOGRAMA_MAX_DIAS:
+        errores['hasta'] = f'La ventana no puede superar {settings.CRONOGRAMA_MAX_DIAS} días'
+
+    filtros = {}
+    for parametro, lookup in (('encargado', 'encargado_id'), ('empleado', 'empleados')):
+        valor = request.query_params.get(parametro)
+        if valor is None:
+            continue
+        if not valor.isdigit():
+            errores[parametro] = 'Debe ser un id numérico'
+        else:
+            filtros[lookup] = int(valor)
+    if errores:
+        raise serializers.ValidationError(errores)
+    return desde, hasta, filtros
+
+
+def construir_cronograma(request):
+    desde, hasta, filtros = filtros_desde_request(request)
+    proyectos = list(
+        proyectos_vigentes(desde, hasta, Proyecto.objects.filter(**filtros)).order_by('fecha_inicio', 'id').values(
+            'id', 'nombre', 'estado', 'fecha_inicio', 'fecha_fin', 'encargado_id'
+        )
+    )
+    ids = [proyecto['id'] for proyecto in proyectos]
+
+    tareas = list(
+        Tarea.objects.filter(proyecto_id__in=ids, fecha__range=(desde, hasta)).values(*CAMPOS_TAREA)
+    )
+    if ids and incluye_archivadas(request):
+        tareas += TareaArchivada.objects.filter(proyecto_id__in=ids, fecha__range=(desde, hasta)).values(*CAMPOS_TAREA)
+    tareas.sort(key=lambda tarea: (tarea['fecha'], tarea['orden'], tarea['id']))
+
+    dias = {proyecto_id: {} for proyecto_id in ids}
+    for tarea in tareas:
+        dia = dias[tarea.pop('proyecto_id')].setdefault(tarea.pop('fecha'), {'tareas': [], 'horas': 0})
+        dia['tareas'].append(tarea)
+        dia['horas'] += tarea['horas_invertidas']
+
+    for proyecto in proyectos:
+        proyecto['encargado'] = proyecto.pop('encargado_id')
+        proyecto['dias'] = [
+            {'fecha': fecha, 'horas': dia['horas'], 'tareas': dia['tareas']}
+            for fecha, dia in dias[proyecto['id']].items()
+        ]
+    return {'desde': desde, 'hasta': hasta, 'proyectos': proyectos}
@@ -0,0 +1,176 @@
+"""
+Detector de consultas N+1 y consultas lentas para desarrollo y staging.
+
+Agrupa el SQL ejecutado en cada request por sentencia normalizada y sitio
+de llamada (la primera línea de código del proyecto en el stack). Una misma
+sentencia repetida desde el mismo sitio más de DETECTOR_UMBRAL_REPETICIONES
+veces se reporta como N+1. Las consultas que superan DETECTOR_UMBRAL_LENTO_MS
+se registran con la salida de EXPLAIN. Se observan todas las conexiones
+(`DATABASES`), así también se ven las lecturas que van a las réplicas.
+"""
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+_LISTA_IN = re.compile(r'IN \((?:%s, )*%s\)')
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_ESPACIOS = re.compile(r'\s+')
+
+_RAIZ_PROYECTO = str(Path(__file__).resolve().parent.parent)
+
+
+class ConsultasRepetidas(AssertionError):
+    """Se detectó un patrón N+1; hereda de AssertionError para hacer fallar los tests."""
+
+
+def normalizar_sql(sql):
+    sql = _LISTA_IN.sub('IN (...)', sql)
+    sql = _LITERALES.sub('?', sql)
+    return _ESPACIOS.sub(' ', sql).strip()
+
+
+def sitio_llamada():
+    """Primera línea de código del proyecto (fuera de Django y de este módulo) en el stack."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        archivo = frame.f_code.co_filename
+        if (
+            archivo.startswith(_RAIZ_PROYECTO)
+            and archivo != __file__
+            and 'site-packages' not in archivo
+        ):
+            relativo = archivo[len(_RAIZ_PROYECTO) + 1:]
+            return f'{relativo}:{frame.f_lineno} en {frame.f_code.co_name}'
+        frame = frame.f_back
+    return 'desconocido'
+
+
+class DetectorConsultas:
+    """execute_wrapper que registra cada consulta con su sitio de llamada."""
+
+    def __init__(self, umbral_repeticiones=None, umbral_lento_ms=None, explicar=True):
+        self.umbral_repeticiones = umbral_repeticiones or getattr(settings, 'DETECTOR_UMBRAL_REPETICIONES', 5)
+        self.umbral_lento = (umbral_lento_ms or getattr(settings, 'DETECTOR_UMBRAL_LENTO_MS', 100)) / 1000
+        self.explicar = explicar
+        self.grupos = {}
+        self.lentas = []
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.total += 1
+            clave = (normalizar_sql(sql), sitio_llamada())
+            self.grupos[clave] = self.grupos.get(clave, 0) + 1
+            if duracion >= self.umbral_lento and not many:
+                self.lentas.append((context['connection'].alias, sql, params, clave[1], duracion))
+
+    @contextmanager
+    def observar(self, aliases=None):
+        """Instala el detector en las conexiones `aliases` (por defecto, todas) del hilo actual."""
+        with ExitStack() as pila:
+            for alias in aliases or connections:
+                pila.enter_context(connections[alias].execute_wrapper(self))
+            yield self
+
+    def repetidas(self):
+        return [
+            {'sql': sql, 'sitio': sitio, 'veces': veces}
+            for (sql, sitio), veces in sorted(self.grupos.items(), key=lambda item: -item[1])
+            if veces > self.umbral_repeticiones
+        ]
+
+    def explain(self, alias, sql, params):
+        connection = connections[alias]
+        if not self.explicar or not sql.lstrip().upper().startswith('SELECT'):
+            return ''
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(connection.ops.explain_query_prefix() + ' ' + sql, params)
+                return '\n'.join(' '.join(str(col) for col in fila) for fila in cursor.fetchall())
+        except Exception as e:  # el EXPLAIN es informativo, nunca debe romper el request
+            return f'(EXPLAIN falló: {e})'
+
+    def lentas_explicadas(self):
+        return [
+            {
+                'sql': normalizar_sql(sql),
+                'sitio': sitio,
+                'ms': round(duracion * 1000, 1),
+                'explain': self.explain(alias, sql, params),
+            }
+            for alias, sql, params, sitio, duracion in self.lentas
+        ]
+
+
+class ReporteConsultas:
+    """
+    Reporte acumulado por endpoint. Sin tiempos en las repeticiones, para que
+    dos reportes de versiones distintas se puedan comparar con un diff.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def agregar(self, endpoint, detector, lentas):
+        with self._lock:
+            datos = self.endpoints.setdefault(endpoint, {
+                'requests': 0, 'consultas_max': 0, 'repetidas': {}, 'lentas': {},
+            })
+            datos['requests'] += 1
+            datos['consultas_max'] = max(datos['consultas_max'], detector.total)
+            for item in detector.repetidas():
+                clave = f"{item['sitio']} | {item['sql']}"
+                datos['repetidas'][clave] = max(datos['repetidas'].get(clave, 0), item['veces'])
+            for item in lentas:
+                datos['lentas'][f"{item['sitio']} | {item['sql']}"] = item['explain']
+
+    def como_dict(self):
+        with self._lock:
+            return json.loads(json.dumps(self.endpoints, sort_keys=True))
+
+    def escribir(self, ruta):
+        Path(ruta).write_text(json.dumps(self.como_dict(), indent=2, sort_keys=True, ensure_ascii=False))
+
+
+reporte = ReporteConsultas()
+
+
+@contextmanager
+def detectar_consultas(aliases=None, umbral_repeticiones=None, fallar=True):
+    """
+    Para usar en tests:
+
+        with detectar_consultas():
+            self.client.get(url)
+
+    Lanza ConsultasRepetidas si dentro del bloque hay un patrón N+1 en
+    alguna de las conexiones `aliases` (por defecto, todas).
+    """
+    detector = DetectorConsultas(umbral_repeticiones=umbral_repeticiones, explicar=False)
+    with detector.observar(aliases):
+        yield detector
+    repetidas = detector.repetidas()
+    if repetidas and fallar:
+        raise ConsultasRepetidas(describir(repetidas))
+
+
+def describir(repetidas):
+    return 'Consultas repetidas (posible N+1):\n' + '\n'.join(
+        f"  {item['veces']}x {item['sitio']}: {item['sql'][:200]}" for item in repetidas
+    )
@@ -0,0 +1,108 @@
+"""
+Anotaciones OpenAPI de las vistas sin importar drf_spectacular al arrancar.
+
+`extend_schema` de drf_spectacular arma la clase de esquema al decorar
+(importando drf_spectacular.openapi, su plumbing y PyYAML), o sea en cada
+worker al importar las vistas, aunque nunca se pida la documentación. Los
+decoradores de este módulo tienen la misma firma pero sólo registran la
+anotación: `aplicar_anotaciones`, que está en PREPROCESSING_HOOKS de
+SPECTACULAR_SETTINGS, aplica los de drf_spectacular la primera vez que se
+genera el esquema, por cualquier camino (EsquemaAPIView,
+`precomputar_esquema` o `manage.py spectacular`).
+
+    from .documentacion import OpenApiParameter, extend_schema
+
+    @extend_schema(parameters=[OpenApiParameter('desde', str)])
+    class MiVista(APIView): ...
+
+Por lo mismo DEFAULT_SCHEMA_CLASS es `gestion.documentacion.AutoSchema`: el
+router de DRF lee `schema` de cada viewset al armar las URLs, y hasta que se
+genera el esquema eso resuelve a un ViewInspector vacío; después, al
+AutoSchema de drf_spectacular.
+"""
+import threading
+
+from rest_framework.schemas.inspectors import ViewInspector
+
+_pendientes = []
+_lock = threading.Lock()
+_aplicadas = False
+
+
+def __getattr__(nombre):
+    if nombre == 'AutoSchema':
+        if not _aplicadas:
+            return ViewInspector
+        from drf_spectacular.openapi import AutoSchema
+
+        return AutoSchema
+    raise AttributeError(f'module {__name__!r} has no attribute {nombre!r}')
+
+
+class Anotacion:
+    """Un decorador de drf_spectacular.utils y sus argumentos, sin aplicar."""
+
+    def __init__(self, decorador, argumentos):
+        self.decorador = decorador
+        self.argumentos = argumentos
+
+    def __call__(self, objetivo):
+        with _lock:
+            _pendientes.append((objetivo, self))
+        return objetivo
+
+    def real(self):
+        from drf_spectacular import utils
+
+        return getattr(utils, self.decorador)(**_resolver(self.argumentos))
+
+
+class OpenApiParameter:
+    """Mismos argumentos que drf_spectacular.utils.OpenApiParameter."""
+
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+
+def extend_schema(**kwargs):
+    return Anotacion('extend_schema', kwargs)
+
+
+def extend_schema_view(**kwargs):
+    return Anotacion('extend_schema_view', kwargs)
+
+
+def _resolver(valor):
+    if isinstance(valor, Anotacion):
+        return valor.real()
+    if isinstance(valor, OpenApiParameter):
+        from drf_spectacular.utils import OpenApiParameter as Parametro
+
+        return Parametro(*valor.args, **valor.kwargs)
+    if isinstance(valor, (list, tuple)):
+        return type(valor)(_resolver(item) for item in valor)
+    if isinstance(valor, dict):
+        return {clave: _resolver(item) for clave, item in valor.items()}
+    return valor
+
+
+def aplicar_anotaciones(endpoints=None):
+    """
+    Aplica, en el orden en que se decoraron, las anotaciones pendientes.
+    Tiene la firma de un PREPROCESSING_HOOK: devuelve `endpoints` sin tocar.
+    """
+    global _aplicadas
+
+    with _lock:
+        if not _aplicadas:
+            from rest_framework.settings import api_settings
+
+            # DRF ya cacheó el ViewInspector de DEFAULT_SCHEMA_CLASS
+            _aplicadas = True
+            api_settings.reload()
+        pendientes = list(_pendientes)
+        _pendientes.clear()
+        for objetivo, anotacion in pendientes:
+            anotacion.real()(objetivo)
+    return endpoints
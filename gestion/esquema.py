@@ -0,0 +1,90 @@
+"""
+Esquema OpenAPI precomputado y carga diferida de las vistas de documentación.
+
+En el perfil de arranque 'produccion' el esquema no se genera en cada
+request: `manage.py precomputar_esquema` lo escribe en el build (YAML y JSON,
+con variantes .gz y .br) en ESQUEMA_OPENAPI_DIR y EsquemaAPIView lo sirve tal
+cual, eligiendo la variante comprimida según Accept-Encoding. Si falta el
+archivo, o en desarrollo, se genera con SpectacularAPIView como siempre.
+
+drf_spectacular.views (y con él el generador de esquemas y PyYAML) se
+importa recién cuando alguien pide la documentación, no al arrancar el worker.
+"""
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+from django.views import View
+
+from .middleware import CompresionMiddleware
+
+
+FORMATOS = {
+    'yaml': 'application/vnd.oai.openapi',
+    'json': 'application/vnd.oai.openapi+json',
+}
+EXTENSIONES = {'br': '.br', 'gzip': '.gz'}
+
+
+def vista_diferida(ruta, **initkwargs):
+    """Vista basada en clase que se importa y construye en el primer request."""
+    vista = None
+
+    def despachar(request, *args, **kwargs):
+        nonlocal vista
+        if vista is None:
+            vista = import_string(ruta).as_view(**initkwargs)
+        return vista(request, *args, **kwargs)
+
+    despachar.csrf_exempt = True
+    return despachar
+
+
+def directorio_esquema():
+    return Path(getattr(settings, 'ESQUEMA_OPENAPI_DIR', settings.BASE_DIR / 'esquema'))
+
+
+@lru_cache(maxsize=None)
+def leer_variante(ruta):
+    """Contenido y ETag de un archivo precomputado (una lectura por worker)."""
+    try:
+        contenido = Path(ruta).read_bytes()
+    except FileNotFoundError:
+        return None
+    return contenido, '"%s"' % hashlib.sha256(contenido).hexdigest()[:32]
+
+
+class EsquemaAPIView(View):
+    generar = staticmethod(vista_diferida('drf_spectacular.views.SpectacularAPIView'))
+
+    def get(self, request, *args, **kwargs):
+        if getattr(settings, 'PERFIL_ARRANQUE', 'desarrollo') != 'produccion':
+            return self.generar(request, *args, **kwargs)
+
+        formato = request.GET.get('format') or ('json' if 'json' in request.headers.get('Accept', '') else 'yaml')
+        if formato not in FORMATOS:
+            return self.generar(request, *args, **kwargs)
+
+        base = directorio_esquema() / f'esquema.{formato}'
+        plano = leer_variante(str(base))
+        if plano is None:
+            return self.generar(request, *args, **kwargs)
+
+        # El ETag es el del esquema sin comprimir, igual para todas las variantes
+        etag = plano[1]
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponseNotModified(headers={'ETag': etag})
+
+        codificacion = CompresionMiddleware.negociar(request.headers.get('Accept-Encoding', ''))
+        variante = leer_variante(str(base) + EXTENSIONES[codificacion]) if codificacion else None
+        response = HttpResponse((variante or plano)[0], content_type=FORMATOS[formato])
+        if variante is not None:
+            response['Content-Encoding'] = codificacion
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=300'
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
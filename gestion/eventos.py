@@ -0,0 +1,209 @@
+"""
+Eventos de dominio con outbox transaccional.
+
+Cada alta, modificación, movimiento o baja de una Tarea o un Proyecto, y cada
+cambio en los empleados asignados a un proyecto, escribe una fila
+EventoDominio en la misma transacción que el cambio. Si la transacción se
+revierte, el evento tampoco existe.
+
+`manage.py despachar_eventos` lee los eventos pendientes en orden y los
+envía en lotes a los destinos de EVENTOS_DESTINOS:
+
+- 'webhook': POST JSON a una URL, firmado con HMAC-SHA256 si hay
+  EVENTOS_WEBHOOK_SECRETO (header X-Eventos-Firma).
+- 'archivo': agrega una línea JSON por evento a un archivo.
+
+La entrega es al menos una vez: un lote se marca despachado sólo después de
+que todos los destinos lo aceptaron, así que un consumidor puede recibir un
+evento repetido y debe ignorarlo por (proyecto, secuencia).
+
+La secuencia es correlativa y sin huecos dentro de cada proyecto y la
+asigna el despacho, en orden de id, a los eventos que toma por primera vez
+(un lote reenviado conserva sus números). Numerar al escribir obligaba a
+bloquear un contador por proyecto hasta el commit de cada escritura, y eso
+serializaba todos los movimientos del kanban de un proyecto. El orden de id
+no es exactamente el de commit entre transacciones concurrentes, pero sí
+para los eventos de un mismo objeto: la segunda escritura de una fila espera
+el lock de la primera y recién después inserta su evento.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import urllib.request
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import EventoDominio, SecuenciaEventos
+
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_TAREA = ['id', 'titulo', 'descripcion', 'proyecto_id', 'empleado_id', 'estado', 'orden', 'fecha', 'horas_invertidas']
+CAMPOS_PROYECTO = ['id', 'nombre', 'descripcion', 'estado', 'encargado_id', 'fecha_inicio', 'fecha_fin']
+
+
+def datos_de(instancia, campos):
+    return json.loads(json.dumps({campo: getattr(instancia, campo) for campo in campos}, cls=DjangoJSONEncoder))
+
+
+def reservar_secuencias(proyecto_id, cantidad, using='default'):
+    """Reserva `cantidad` números seguidos de la secuencia del proyecto; devuelve el primero."""
+    contador = SecuenciaEventos.objects.using(using).filter(proyecto_id=proyecto_id)
+    if not contador.update(valor=F('valor') + cantidad):
+        try:
+            with transaction.atomic(using=using):
+                SecuenciaEventos.objects.using(using).create(proyecto_id=proyecto_id, valor=cantidad)
+                return 1
+        except IntegrityError:
+            # Otro despacho creó el contador al mismo tiempo
+            contador.update(valor=F('valor') + cantidad)
+    return contador.values_list('valor', flat=True).get() - cantidad + 1
+
+
+def asignar_secuencias(eventos, using='default'):
+    """
+    Numera, en el orden de `eventos` (por id), los que todavía no tienen
+    secuencia. Debe llamarse en la transacción que los tomó para despachar.
+    """
+    por_proyecto = {}
+    for evento in eventos:
+        if evento.secuencia is None:
+            por_proyecto.setdefault(evento.proyecto_id, []).append(evento)
+    # Los contadores en orden fijo: dos despachos no se esperan en orden cruzado
+    for proyecto_id, del_proyecto in sorted(por_proyecto.items()):
+        primera = reservar_secuencias(proyecto_id, len(del_proyecto), using)
+        for secuencia, evento in enumerate(del_proyecto, primera):
+            evento.secuencia = secuencia
+    numerados = [evento for del_proyecto in por_proyecto.values() for evento in del_proyecto]
+    EventoDominio.objects.using(using).bulk_update(numerados, ['secuencia'])
+
+
+def registrar_evento(tipo, proyecto_id, objeto_id, datos, using='default'):
+    """
+    Escribe el evento en el outbox; debe llamarse dentro de la transacción
+    del cambio. Es un INSERT sin más: la secuencia la asigna el despacho.
+    """
+    return EventoDominio.objects.using(using).create(
+        tipo=tipo,
+        proyecto_id=proyecto_id,
+        objeto_id=objeto_id,
+        datos=datos,
+    )
+
+
+def registrar_movimiento(tarea, estado_anterior, orden_anterior, using='default'):
+    """Evento de un movimiento en el kanban (las vecinas desplazadas no generan eventos propios)."""
+    if (tarea.estado, tarea.orden) == (estado_anterior, orden_anterior):
+        return None
+    return registrar_evento('tarea.movida', tarea.proyecto_id, tarea.pk, {
+        'id': tarea.pk,
+        'empleado_id': tarea.empleado_id,
+        'de': {'estado': estado_anterior, 'orden': orden_anterior},
+        'a': {'estado': tarea.estado, 'orden': tarea.orden},
+    }, using)
+
+
+def como_mensaje(evento):
+    return {
+        'id': evento.id,
+        'tipo': evento.tipo,
+        'proyecto': evento.proyecto_id,
+        'secuencia': evento.secuencia,
+        'objeto': evento.objeto_id,
+        'datos': evento.datos,
+        'fecha': evento.created_at.isoformat(),
+    }
+
+
+# ----------------------------------------------------------------------
+# Destinos
+# ----------------------------------------------------------------------
+class DestinoWebhook:
+    def __init__(self, url, secreto=None, timeout=10):
+        self.url = url
+        self.secreto = secreto if secreto is not None else getattr(settings, 'EVENTOS_WEBHOOK_SECRETO', '')
+        self.timeout = timeout
+
+    def enviar(self, mensajes):
+        cuerpo = json.dumps({'eventos': mensajes}, ensure_ascii=False).encode()
+        headers = {'Content-Type': 'application/json'}
+        if self.secreto:
+            headers['X-Eventos-Firma'] = hmac.new(self.secreto.encode(), cuerpo, hashlib.sha256).hexdigest()
+        solicitud = urllib.request.Request(self.url, data=cuerpo, headers=headers, method='POST')
+        # urlopen lanza HTTPError con cualquier respuesta que no sea 2xx
+        with urllib.request.urlopen(solicitud, timeout=self.timeout):
+            pass
+
+    def __str__(self):
+        return f'webhook {self.url}'
+
+
+class DestinoArchivo:
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+
+    def enviar(self, mensajes):
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        with self.ruta.open('a', encoding='utf-8') as archivo:
+            for mensaje in mensajes:
+                archivo.write(json.dumps(mensaje, ensure_ascii=False) + '\n')
+            archivo.flush()
+
+    def __str__(self):
+        return f'archivo {self.ruta}'
+
+
+DESTINOS = {
+    'webhook': DestinoWebhook,
+    'archivo': DestinoArchivo,
+}
+
+
+def crear_destinos(configuracion=None):
+    """Instancia los destinos de EVENTOS_DESTINOS: [{'tipo': 'webhook', 'url': ...}, ...]."""
+    destinos = []
+    for opciones in configuracion if configuracion is not None else getattr(settings, 'EVENTOS_DESTINOS', []):
+        opciones = dict(opciones)
+        tipo = opciones.pop('tipo')
+        clase = DESTINOS[tipo] if tipo in DESTINOS else import_string(tipo)
+        destinos.append(clase(**opciones))
+    return destinos
+
+
+# ----------------------------------------------------------------------
+# Despacho
+# ----------------------------------------------------------------------
+def despachar_lote(destinos, tam_lote=100):
+    """
+    Numera y envía el próximo lote de eventos pendientes a todos los
+    destinos. Devuelve la cantidad despachada; lanza la excepción del
+    destino que falló (el lote queda pendiente, con sus números).
+    """
+    with transaction.atomic():
+        eventos = list(
+            EventoDominio.objects.select_for_update().filter(despachado_en__isnull=True).order_by('id')[:tam_lote]
+        )
+        if not eventos:
+            return 0
+        asignar_secuencias(eventos)
+
+    mensajes = [como_mensaje(evento) for evento in eventos]
+    for destino in destinos:
+        destino.enviar(mensajes)
+
+    EventoDominio.objects.filter(id__in=[evento.id for evento in eventos]).update(despachado_en=timezone.now())
+    return len(eventos)
+
+
+def purgar_despachados(dias=7):
+    limite = timezone.now() - timedelta(days=dias)
+    eliminados, _ = EventoDominio.objects.filter(despachado_en__lt=limite).delete()
+    return eliminados
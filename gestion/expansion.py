@@ -0,0 +1,202 @@
+"""
+Selección de campos y expansión de relaciones en los viewsets del router.
+
+    GET /api/tareas/?fields=id,titulo,proyecto.nombre
+    GET /api/tareas/?expand=empleado,proyecto.encargado
+    GET /api/proyectos/7/?fields=id,nombre,empleados.email
+
+- `fields`: campos a devolver; con puntos se eligen campos de una relación,
+  lo que implica expandirla.
+- `expand`: relaciones que se devuelven como objeto en lugar de id (o lista
+  de ids en las many-to-many), con todos sus campos salvo que `fields`
+  los restrinja.
+
+A partir de la forma pedida se arma el queryset: `only()` con las columnas
+necesarias, `select_related` para las claves foráneas expandidas y
+`Prefetch` (también con `only()`) para las many-to-many. Sin parámetros el
+viewset responde como siempre, con su serializer y su queryset.
+"""
+from functools import lru_cache
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from .documentacion import OpenApiParameter, extend_schema, extend_schema_view
+from .models import Usuario
+
+
+PROFUNDIDAD_MAXIMA = 3
+
+# Serializers generados que se conservan; `fields`/`expand` vienen del
+# cliente, así que las formas distintas no tienen límite
+SERIALIZERS_CACHEADOS = 256
+
+# Nunca se devuelven con fields/expand
+CAMPOS_PRIVADOS = {
+    Usuario: {'password'},
+}
+
+
+class Forma:
+    """Campos pedidos de un modelo (None = todos) y relaciones expandidas."""
+
+    def __init__(self):
+        self.campos = None
+        self.expandidos = {}
+
+    def incluir(self, nombre):
+        if self.campos is None:
+            self.campos = set()
+        self.campos.add(nombre)
+
+    def hijo(self, nombre):
+        return self.expandidos.setdefault(nombre, Forma())
+
+    def clave(self):
+        return (
+            tuple(sorted(self.campos)) if self.campos is not None else None,
+            tuple(sorted((nombre, hijo.clave()) for nombre, hijo in self.expandidos.items())),
+        )
+
+    # Dos formas con la misma clave comparten serializer (ver serializer_para)
+    def __eq__(self, otra):
+        return isinstance(otra, Forma) and self.clave() == otra.clave()
+
+    def __hash__(self):
+        return hash(self.clave())
+
+
+@lru_cache(maxsize=None)
+def campos_disponibles(modelo):
+    """Columnas, claves foráneas y many-to-many directas del modelo (sin relaciones inversas)."""
+    privados = CAMPOS_PRIVADOS.get(modelo, set())
+    return {
+        campo.name: campo
+        for campo in modelo._meta.get_fields()
+        if (campo.concrete or (campo.many_to_many and not campo.auto_created))
+        and campo.name not in privados
+    }
+
+
+def parsear_forma(modelo, fields, expand):
+    """Arma la Forma pedida validando cada nombre; lanza ValidationError si alguno no existe."""
+    raiz = Forma()
+    errores = []
+
+    def recorrer(partes, ruta_completa, ultima_es_campo):
+        nodo, actual = raiz, modelo
+        if len(partes) > PROFUNDIDAD_MAXIMA + (1 if ultima_es_campo else 0):
+            errores.append(f'{ruta_completa}: se permiten hasta {PROFUNDIDAD_MAXIMA} niveles de expansión')
+            return
+        relaciones = partes[:-1] if ultima_es_campo else partes
+        for nombre in relaciones:
+            campo = campos_disponibles(actual).get(nombre)
+            if campo is None or not campo.is_relation:
+                errores.append(f'{ruta_completa}: {actual.__name__} no tiene la relación "{nombre}"')
+                return
+            # Expandir sin `fields` no restringe los campos del nivel
+            if ultima_es_campo or nodo.campos is not None:
+                nodo.incluir(nombre)
+            nodo, actual = nodo.hijo(nombre), campo.related_model
+        if ultima_es_campo:
+            if partes[-1] not in campos_disponibles(actual):
+                errores.append(f'{ruta_completa}: {actual.__name__} no tiene el campo "{partes[-1]}"')
+                return
+            nodo.incluir(partes[-1])
+
+    for ruta in filter(None, (parte.strip() for parte in (fields or '').split(','))):
+        recorrer(ruta.split('.'), ruta, True)
+    for ruta in filter(None, (parte.strip() for parte in (expand or '').split(','))):
+        recorrer(ruta.split('.'), ruta, False)
+
+    if errores:
+        raise serializers.ValidationError({'fields': errores})
+    return raiz
+
+
+def campos_de(modelo, forma):
+    disponibles = campos_disponibles(modelo)
+    nombres = disponibles if forma.campos is None else [n for n in disponibles if n in forma.campos]
+    return [disponibles[nombre] for nombre in nombres]
+
+
+def aplicar_forma(queryset, forma):
+    """Aplica only/select_related/prefetch_related según la forma pedida."""
+    columnas, select, prefetch = [], [], []
+
+    def recorrer(modelo, forma, prefijo):
+        columnas.append(prefijo + modelo._meta.pk.name)
+        for campo in campos_de(modelo, forma):
+            if campo.many_to_many:
+                continue
+            columnas.append(prefijo + campo.name)
+            if campo.name in forma.expandidos:
+                select.append(prefijo + campo.name)
+                recorrer(campo.related_model, forma.expandidos[campo.name], prefijo + campo.name + '__')
+        for campo in campos_de(modelo, forma):
+            if campo.many_to_many:
+                hijo = forma.expandidos.get(campo.name)
+                relacionado = campo.related_model._default_manager.all()
+                prefetch.append(Prefetch(
+                    prefijo + campo.name,
+                    queryset=aplicar_forma(relacionado, hijo) if hijo else relacionado.only('pk'),
+                ))
+
+    recorrer(queryset.model, forma, '')
+    return queryset.select_related(None).prefetch_related(None).select_related(*select).prefetch_related(
+        *prefetch
+    ).only(*columnas)
+
+
+@lru_cache(maxsize=SERIALIZERS_CACHEADOS)
+def serializer_para(modelo, forma):
+    """Serializer de sólo lectura para la forma pedida (cacheado por forma)."""
+    atributos = {}
+    nombres = []
+    for campo in campos_de(modelo, forma):
+        nombres.append(campo.name)
+        if campo.name in forma.expandidos:
+            anidado = serializer_para(campo.related_model, forma.expandidos[campo.name])
+            atributos[campo.name] = anidado(many=campo.many_to_many, read_only=True)
+        elif campo.many_to_many:
+            atributos[campo.name] = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    meta = type('Meta', (), {'model': modelo, 'fields': nombres, 'read_only_fields': nombres})
+    atributos['Meta'] = meta
+    return type(f'{modelo.__name__}FormaSerializer', (serializers.ModelSerializer,), atributos)
+
+
+class CamposExpandiblesMixin:
+    """Para los ModelViewSet: `?fields=` y `?expand=` en list y retrieve."""
+
+    def forma_pedida(self):
+        if not hasattr(self, '_forma'):
+            self._forma = None
+            parametros = self.request.query_params if self.request is not None else {}
+            if self.request is not None and self.request.method == 'GET' and (
+                parametros.get('fields') or parametros.get('expand')
+            ):
+                self._forma = parsear_forma(self.queryset.model, parametros.get('fields'), parametros.get('expand'))
+        return self._forma
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        forma = self.forma_pedida()
+        return aplicar_forma(queryset, forma) if forma is not None else queryset
+
+    def get_serializer_class(self):
+        forma = self.forma_pedida()
+        if forma is not None:
+            return serializer_para(self.queryset.model, forma)
+        return super().get_serializer_class()
+
+
+PARAMETROS_FORMA = [
+    OpenApiParameter('fields', str, description='Campos a devolver separados por coma; "relacion.campo" expande la relación'),
+    OpenApiParameter('expand', str, description='Relaciones a devolver como objeto, separadas por coma (p. ej. proyecto.encargado)'),
+]
+
+documentar_forma = extend_schema_view(
+    list=extend_schema(parameters=PARAMETROS_FORMA),
+    retrieve=extend_schema(parameters=PARAMETROS_FORMA),
+)
@@ -0,0 +1,390 @@
+"""
+Importación masiva de los modelos de gestion.
+
+Reemplaza a `manage.py loaddata` para volcados grandes: lee el archivo en
+streaming, valida por lotes, resuelve las FK y el M2M `Proyecto.empleados`
+en memoria e inserta con `bulk_create` en orden de dependencias, un lote
+por transacción.
+
+Las contraseñas se hashean siempre, salvo que el volcado las marque como
+ya hasheadas: con `password_hasheado` en los campos del registro (o la
+columna del CSV) o, para todo el volcado, con `passwords_hasheados=True`.
+Reconocer un hash por su forma no alcanza: una contraseña en texto plano
+como 'md5$a$b' pasaría sin hashear y quedaría guardada tal cual.
+"""
+import csv
+import io
+import json
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.utils import timezone
+
+from .models import Sanatorio, Usuario, Proyecto, Permiso, Tarea, TareaArchivada
+
+
+# Orden en el que se insertan los modelos (cada uno depende de los anteriores)
+ORDEN_DEPENDENCIAS = [Sanatorio, Usuario, Proyecto, Permiso, Tarea, TareaArchivada]
+
+MODELOS = {modelo._meta.label_lower: modelo for modelo in ORDEN_DEPENDENCIAS}
+
+
+def abrir_texto(fh):
+    """Envuelve un archivo binario detectando UTF-8/UTF-16 (con o sin BOM)."""
+    inicio = fh.peek(4)[:4] if hasattr(fh, 'peek') else b''
+    if inicio.startswith((b'\xff\xfe', b'\xfe\xff')):
+        encoding = 'utf-16'
+    elif inicio.startswith(b'\xef\xbb\xbf'):
+        encoding = 'utf-8-sig'
+    elif len(inicio) >= 2 and inicio[1:2] == b'\x00':
+        encoding = 'utf-16-le'
+    else:
+        encoding = 'utf-8'
+    return io.TextIOWrapper(fh, encoding=encoding, newline='')
+
+
+def iterar_json(texto, tam_bloque=1 << 16):
+    """
+    Recorre un arreglo JSON (formato de `dumpdata`) objeto por objeto sin
+    cargar el archivo completo en memoria.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    dentro = False
+    fin_archivo = False
+
+    while True:
+        # Saltar espacios, la apertura del arreglo y los separadores
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,[':
+            if buffer[pos] == '[':
+                dentro = True
+            pos += 1
+
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+
+        if pos >= len(buffer):
+            if fin_archivo:
+                return
+            buffer = buffer[pos:] + texto.read(tam_bloque)
+            pos = 0
+            fin_archivo = len(buffer) == 0
+            continue
+
+        if not dentro:
+            raise ValueError('El archivo JSON debe contener un arreglo de objetos')
+
+        try:
+            objeto, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if fin_archivo:
+                raise
+            bloque = texto.read(tam_bloque)
+            fin_archivo = not bloque
+            buffer = buffer[pos:] + bloque
+            pos = 0
+            continue
+
+        yield objeto
+
+
+def iterar_csv(texto, etiqueta):
+    """Convierte cada fila de un CSV en un registro con la forma de `dumpdata`."""
+    for fila in csv.DictReader(texto):
+        pk = fila.pop('pk', None) or fila.pop('id', None)
+        if 'empleados' in fila:
+            fila['empleados'] = [int(x) for x in (fila['empleados'] or '').split(';') if x]
+        yield {'model': etiqueta, 'pk': pk, 'fields': fila}
+
+
+VERDADEROS = {'1', 'true', 'si', 'sí', 'yes'}
+
+
+def marcado_como_hasheado(valor):
+    """`password_hasheado` de un registro: booleano en JSON, texto en CSV."""
+    if isinstance(valor, str):
+        return valor.strip().lower() in VERDADEROS
+    return bool(valor)
+
+
+def reiniciar_secuencias(using=DEFAULT_DB_ALIAS):
+    """Igual que loaddata: tras insertar pks explícitos hay que mover las secuencias."""
+    connection = connections[using]
+    sentencias = connection.ops.sequence_reset_sql(no_style(), ORDEN_DEPENDENCIAS)
+    if sentencias:
+        with connection.cursor() as cursor:
+            for sql in sentencias:
+                cursor.execute(sql)
+
+
+@contextmanager
+def sin_auto_now(modelos):
+    """
+    Desactiva temporalmente `auto_now`/`auto_now_add` para conservar las
+    fechas originales del volcado en `bulk_create`.
+    """
+    campos = [
+        (campo, campo.auto_now, campo.auto_now_add)
+        for modelo in modelos
+        for campo in modelo._meta.concrete_fields
+        if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)
+    ]
+    for campo, _, _ in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in campos:
+            campo.auto_now = auto_now
+            campo.auto_now_add = auto_now_add
+
+
+class ImportadorGestion:
+    """
+    Acumula registros validados por modelo y los inserta en lotes.
+
+    Las claves primarias del archivo se conservan. Los registros cuyo pk ya
+    existe en la base se omiten, y los que referencian una fila que aún no
+    apareció se difieren hasta el final de la importación.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, tam_lote=1000, ignorar_errores=False, hilos=4,
+                 passwords_hasheados=False):
+        self.using = using
+        self.tam_lote = tam_lote
+        self.ignorar_errores = ignorar_errores
+        self.hilos = hilos
+        self.passwords_hasheados = passwords_hasheados
+
+        self.pendientes = {modelo: [] for modelo in ORDEN_DEPENDENCIAS}
+        self.diferidos = {modelo: [] for modelo in ORDEN_DEPENDENCIAS}
+        self.confirmados = {
+            modelo: set(modelo._base_manager.using(using).values_list('pk', flat=True))
+            for modelo in ORDEN_DEPENDENCIAS
+        }
+        self.vistos = {modelo: set() for modelo in ORDEN_DEPENDENCIAS}
+        self.emails = set(Usuario._base_manager.using(using).values_list('email', flat=True))
+
+        self.asignaciones = []          # (proyecto_id, usuario_id) de Proyecto.empleados
+        self.encargados_diferidos = []  # (usuario_id, encargado_id)
+
+        self.insertados = defaultdict(int)
+        self.omitidos = defaultdict(int)
+        self.errores = []
+        self.inicio = time.perf_counter()
+
+    # ------------------------------------------------------------------
+    # Entrada de registros
+    # ------------------------------------------------------------------
+    def agregar(self, registro):
+        modelo = MODELOS.get(registro.get('model'))
+        if modelo is None:
+            self.omitidos[registro.get('model')] += 1
+            return
+
+        pk = registro.get('pk')
+        pk = modelo._meta.pk.to_python(pk) if pk not in (None, '') else None
+        if pk is not None and (pk in self.confirmados[modelo] or pk in self.vistos[modelo]):
+            self.omitidos[modelo._meta.label_lower] += 1
+            return
+
+        try:
+            objeto, faltantes = self._construir(modelo, pk, dict(registro.get('fields') or {}))
+        except ValidationError as e:
+            self._registrar_error(modelo, pk, e)
+            return
+
+        if faltantes:
+            self.diferidos[modelo].append(objeto)
+        else:
+            self._encolar(modelo, objeto)
+
+    def _construir(self, modelo, pk, campos):
+        """Convierte y valida un registro. Devuelve el objeto y sus FK faltantes."""
+        valores = {}
+        faltantes = []
+        excluir = []
+
+        for campo in modelo._meta.concrete_fields:
+            if campo.primary_key:
+                continue
+            if campo.name in campos:
+                valor = campos[campo.name]
+            elif campo.attname in campos:
+                valor = campos[campo.attname]
+            elif getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False):
+                valor = timezone.now()
+            elif campo.has_default():
+                valor = campo.get_default()
+            else:
+                valor = None
+
+            if valor == '' and campo.null and not isinstance(campo, (models.CharField, models.TextField)):
+                valor = None
+
+            if campo.is_relation:
+                excluir.append(campo.name)
+                valor = campo.target_field.to_python(valor) if valor not in (None, '') else None
+                if valor is not None:
+                    destino = campo.related_model
+                    if valor not in self.confirmados[destino]:
+                        if destino is modelo:
+                            # Autorreferencia (Usuario.encargado): se asigna al final
+                            self.encargados_diferidos.append((pk, valor))
+                            valor = None
+                        elif valor not in self.vistos[destino]:
+                            faltantes.append((destino, valor))
+                valores[campo.attname] = valor
+            else:
+                valores[campo.attname] = valor
+
+        objeto = modelo(pk=pk, **valores)
+        objeto.clean_fields(exclude=excluir)
+
+        if modelo is Usuario:
+            objeto._password_hasheado = marcado_como_hasheado(
+                campos.get('password_hasheado', self.passwords_hasheados)
+            )
+            if objeto._password_hasheado:
+                try:
+                    identify_hasher(objeto.password)
+                except ValueError:
+                    raise ValidationError({'password': 'Está marcada como hasheada pero no es un hash conocido.'})
+            if objeto.email in self.emails:
+                raise ValidationError({'email': 'Ya existe un usuario con este email.'})
+            self.emails.add(objeto.email)
+        if modelo is Proyecto:
+            for usuario_id in campos.get('empleados') or []:
+                self.asignaciones.append((pk, int(usuario_id)))
+
+        objeto._faltantes = faltantes
+        if pk is not None and not faltantes:
+            # Los diferidos no cuentan como vistos: sus dependientes también se difieren
+            self.vistos[modelo].add(pk)
+        return objeto, faltantes
+
+    def _registrar_error(self, modelo, pk, error):
+        mensaje = f'{modelo._meta.label_lower} pk={pk}: {"; ".join(error.messages)}'
+        if not self.ignorar_errores:
+            raise ValueError(mensaje)
+        self.errores.append(mensaje)
+
+    def _encolar(self, modelo, objeto):
+        self.pendientes[modelo].append(objeto)
+        if len(self.pendientes[modelo]) >= self.tam_lote:
+            self._vaciar_hasta(modelo)
+
+    # ------------------------------------------------------------------
+    # Inserción
+    # ------------------------------------------------------------------
+    def _vaciar_hasta(self, modelo):
+        # Primero se insertan los modelos de los que depende este
+        for dependencia in ORDEN_DEPENDENCIAS[:ORDEN_DEPENDENCIAS.index(modelo) + 1]:
+            self._insertar(dependencia, self.pendientes[dependencia])
+            self.pendientes[dependencia] = []
+
+    def _insertar(self, modelo, objetos):
+        if not objetos:
+            return
+        if modelo is Usuario:
+            self._hashear_passwords(objetos)
+
+        with transaction.atomic(using=self.using), sin_auto_now([modelo]):
+            creados = modelo._base_manager.using(self.using).bulk_create(objetos, batch_size=self.tam_lote)
+
+        for objeto in creados:
+            self.confirmados[modelo].add(objeto.pk)
+        self.insertados[modelo._meta.label_lower] += len(creados)
+
+    def _hashear_passwords(self, usuarios):
+        # pbkdf2 libera el GIL, así que los hashes de un lote se calculan en paralelo
+        en_texto_plano = [u for u in usuarios if not u._password_hasheado]
+        with ThreadPoolExecutor(max_workers=max(1, self.hilos)) as executor:
+            hashes = executor.map(make_password, [u.password for u in en_texto_plano])
+            for usuario, password in zip(en_texto_plano, hashes):
+                usuario.password = password
+
+    def finalizar(self):
+        """Inserta lo pendiente, resuelve referencias diferidas y devuelve el resumen."""
+        for modelo in ORDEN_DEPENDENCIAS:
+            self._vaciar_hasta(modelo)
+
+        for modelo in ORDEN_DEPENDENCIAS:
+            resueltos = []
+            for objeto in self._diferidos_sin_repetir(modelo):
+                faltante = next(
+                    ((destino, pk) for destino, pk in objeto._faltantes if pk not in self.confirmados[destino]),
+                    None
+                )
+                if faltante is None:
+                    resueltos.append(objeto)
+                else:
+                    destino, pk = faltante
+                    self._registrar_error(
+                        modelo, objeto.pk,
+                        ValidationError(f'Referencia a {destino._meta.label_lower} pk={pk} inexistente.')
+                    )
+            self._insertar(modelo, resueltos)
+
+        self._asignar_encargados()
+        self._asignar_empleados()
+        reiniciar_secuencias(self.using)
+
+        segundos = time.perf_counter() - self.inicio
+        total = sum(self.insertados.values())
+        return {
+            'insertados': dict(self.insertados),
+            'omitidos': dict(self.omitidos),
+            'errores': self.errores,
+            'segundos': segundos,
+            'filas_por_segundo': total / segundos if segundos else 0,
+        }
+
+    def _diferidos_sin_repetir(self, modelo):
+        """
+        Los diferidos no cuentan como vistos, así que un pk puede estar
+        repetido en la lista o haberse insertado ya en la primera pasada: se
+        queda la primera aparición y el resto se omite, como en `agregar`.
+        """
+        pks = set(self.confirmados[modelo])
+        for objeto in self.diferidos[modelo]:
+            if objeto.pk is not None:
+                if objeto.pk in pks:
+                    self.omitidos[modelo._meta.label_lower] += 1
+                    continue
+                pks.add(objeto.pk)
+            yield objeto
+
+    def _asignar_encargados(self):
+        usuarios = Usuario._base_manager.using(self.using)
+        validos = [
+            Usuario(pk=usuario_id, encargado_id=encargado_id)
+            for usuario_id, encargado_id in self.encargados_diferidos
+            if encargado_id in self.confirmados[Usuario] and usuario_id in self.confirmados[Usuario]
+        ]
+        for i in range(0, len(validos), self.tam_lote):
+            with transaction.atomic(using=self.using):
+                usuarios.bulk_update(validos[i:i + self.tam_lote], ['encargado'])
+
+    def _asignar_empleados(self):
+        Relacion = Proyecto.empleados.through
+        relaciones = [
+            Relacion(proyecto_id=proyecto_id, usuario_id=usuario_id)
+            for proyecto_id, usuario_id in self.asignaciones
+            if proyecto_id in self.confirmados[Proyecto] and usuario_id in self.confirmados[Usuario]
+        ]
+        for i in range(0, len(relaciones), self.tam_lote):
+            with transaction.atomic(using=self.using):
+                Relacion._base_manager.using(self.using).bulk_create(
+                    relaciones[i:i + self.tam_lote], ignore_conflicts=True
+                )
+        if relaciones:
+            self.insertados[Relacion._meta.label_lower] += len(relaciones)
+
@@ -0,0 +1,77 @@
+"""
+Jerarquía de usuarios por `Usuario.encargado` (supervisores sobre
+encargados, encargados sobre empleados, con cualquier cantidad de niveles).
+
+Los descendientes y los ancestros de un usuario se resuelven en una sola
+sentencia con un CTE recursivo (WITH RECURSIVE, en PostgreSQL, SQLite y
+MySQL 8) que recorre el índice de `encargado_id`. Se eligió sobre una
+tabla de clausura porque la restauración de backups, la importación y el
+benchmark escriben `encargado` con bulk_create/bulk_update, sin señales que
+la mantengan; el CTE siempre refleja la tabla. La recursión se corta en
+JERARQUIA_MAX_NIVELES, así un ciclo cargado por esas vías no la deja
+colgada (los serializers no permiten crearlo).
+
+`descendientes()` devuelve una expresión para `filter(id__in=...)`, así la
+consulta recursiva va como subconsulta de la del listado y no agrega un
+viaje a la base.
+"""
+from django.conf import settings
+from django.db import connections, router
+from django.db.models.expressions import RawSQL
+
+from .models import Usuario
+
+
+TABLA = Usuario._meta.db_table
+
+
+def _niveles(max_niveles):
+    return settings.JERARQUIA_MAX_NIVELES if max_niveles is None else max_niveles
+
+
+def sql_descendientes(incluir_propio=False):
+    """SQL (con parámetros raíz y niveles) de los ids debajo de un usuario."""
+    base = f'SELECT id, 0 FROM {TABLA} WHERE id = %s' if incluir_propio else f'SELECT id, 1 FROM {TABLA} WHERE encargado_id = %s'
+    return f"""
+        WITH RECURSIVE arbol(id, nivel) AS (
+            {base}
+            UNION ALL
+            SELECT u.id, a.nivel + 1
+            FROM {TABLA} u JOIN arbol a ON u.encargado_id = a.id
+            WHERE a.nivel < %s
+        )
+        SELECT id FROM arbol
+    """
+
+
+def descendientes(usuario_id, incluir_propio=False, max_niveles=None):
+    """Expresión con los ids de todos los usuarios debajo de `usuario_id`."""
+    return RawSQL(sql_descendientes(incluir_propio), [usuario_id, _niveles(max_niveles)])
+
+
+def subordinados(usuario_id, incluir_propio=False, max_niveles=None):
+    return Usuario.objects.filter(id__in=descendientes(usuario_id, incluir_propio, max_niveles))
+
+
+def ancestros(usuario_id, max_niveles=None, using=None):
+    """Ids de la cadena de encargados de `usuario_id`, del inmediato hacia arriba."""
+    sql = f"""
+        WITH RECURSIVE cadena(id, nivel) AS (
+            SELECT encargado_id, 1 FROM {TABLA} WHERE id = %s AND encargado_id IS NOT NULL
+            UNION ALL
+            SELECT u.encargado_id, c.nivel + 1
+            FROM {TABLA} u JOIN cadena c ON u.id = c.id
+            WHERE u.encargado_id IS NOT NULL AND c.nivel < %s
+        )
+        SELECT id FROM cadena ORDER BY nivel
+    """
+    with connections[using or router.db_for_read(Usuario)].cursor() as cursor:
+        cursor.execute(sql, [usuario_id, _niveles(max_niveles)])
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+def crearia_ciclo(usuario_id, encargado_id):
+    """True si asignar `encargado_id` como encargado de `usuario_id` cerraría un ciclo."""
+    if usuario_id is None or encargado_id is None:
+        return False
+    return encargado_id == usuario_id or usuario_id in ancestros(encargado_id, using=router.db_for_write(Usuario))
@@ -0,0 +1,294 @@
+"""
+Movimientos de tareas en el kanban con concurrencia optimista.
+
+En lugar de bloquear la tarea con select_for_update y reescribir la columna
+completa, cada movimiento:
+
+1. incrementa la versión de las columnas de origen y destino (en orden fijo,
+   así dos movimientos nunca se esperan en orden cruzado); si el cliente
+   envió la versión que conoce de la columna de origen, el incremento es
+   condicional y un desfasaje es un conflicto;
+2. escribe la tarea con una sola actualización condicionada a que siga en
+   el estado y orden que se leyeron;
+3. desplaza a las vecinas con UPDATE ... SET orden = orden ± 1.
+
+El chequeo de versión y la escritura de `orden` no son un único UPDATE: la
+versión es de la columna (una fila de VersionColumna para todas sus tareas)
+y el orden es de cada tarea, en otra tabla, y actualizar dos tablas en una
+sentencia sólo se puede en PostgreSQL (un CTE con UPDATE). Tampoco hace
+falta: el incremento condicional del paso 1 deja tomada la fila de la
+versión hasta el commit, y todo lo que escribe `orden` en una columna
+(movimientos en ambos modos, lotes, compactación) toma antes su versión, así
+que la lectura de posiciones y las escrituras de los pasos 2 y 3 no se
+intercalan con otras sobre la misma columna.
+
+Las columnas pueden tener huecos en `orden` (la compactación es diferida,
+el archivo y los movimientos en lote los dejan), así que la posición que
+pide el cliente se traduce al `orden` de la tarea que hoy ocupa ese lugar
+(ver `orden_en_posicion`).
+
+Los conflictos se informan con ConflictoColumna, que lleva el estado actual
+de las columnas para que el cliente se resincronice.
+
+Las operaciones sobre muchas tareas a la vez (completar un proyecto,
+reasignar las tareas de un empleado) usan `mover_en_lote`: la posición de
+cada tarea en su columna de destino se calcula en la base con ROW_NUMBER() y
+se escribe con un solo UPDATE ... CASE por lote (bulk_update).
+"""
+from django.db import transaction
+from django.db.models import Case, F, Max, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .eventos import registrar_evento, registrar_movimiento
+from .models import Tarea, TransicionTarea, VersionColumna
+
+
+class ConflictoColumna(Exception):
+    def __init__(self, columnas):
+        super().__init__('La columna fue modificada por otro usuario')
+        self.columnas = columnas
+
+
+def incrementar_versiones(proyecto_id, empleado_id, estados, origen=None, esperada=None):
+    """
+    Incrementa la versión de cada columna y devuelve {estado: versión nueva}.
+    Si `esperada` no es None, la columna `origen` debe estar en esa versión.
+    """
+    estados = sorted(set(estados))
+    VersionColumna.objects.bulk_create(
+        [VersionColumna(proyecto_id=proyecto_id, empleado_id=empleado_id, estado=estado) for estado in estados],
+        ignore_conflicts=True,
+    )
+    for estado in estados:
+        filas = VersionColumna.objects.filter(proyecto_id=proyecto_id, empleado_id=empleado_id, estado=estado)
+        if esperada is not None and estado == origen:
+            filas = filas.filter(version=esperada)
+        if not filas.update(version=F('version') + 1):
+            return None
+    return dict(
+        VersionColumna.objects.filter(
+            proyecto_id=proyecto_id, empleado_id=empleado_id, estado__in=estados
+        ).values_list('estado', 'version')
+    )
+
+
+def incrementar_versiones_en_lote(proyecto_id, empleados, estados):
+    """
+    Incrementa con un solo UPDATE la versión de las columnas `empleados` x
+    `estados` del proyecto. Devuelve cuántas columnas incrementó.
+    """
+    empleados, estados = sorted(set(empleados)), sorted(set(estados))
+    VersionColumna.objects.bulk_create(
+        [
+            VersionColumna(proyecto_id=proyecto_id, empleado_id=empleado_id, estado=estado)
+            for empleado_id in empleados for estado in estados
+        ],
+        ignore_conflicts=True,
+    )
+    return VersionColumna.objects.filter(
+        proyecto_id=proyecto_id, empleado_id__in=empleados, estado__in=estados
+    ).update(version=F('version') + 1)
+
+
+def estado_columnas(proyecto_id, empleado_id, estados):
+    """Versión y orden actual de las tareas de cada columna."""
+    estados = sorted(set(estados))
+    versiones = dict(
+        VersionColumna.objects.filter(
+            proyecto_id=proyecto_id, empleado_id=empleado_id, estado__in=estados
+        ).values_list('estado', 'version')
+    )
+    tareas = Tarea.objects.filter(
+        proyecto_id=proyecto_id, empleado_id=empleado_id, estado__in=estados
+    ).order_by('estado', 'orden').values('id', 'estado', 'orden')
+
+    columnas = {estado: {'estado': estado, 'version': versiones.get(estado, 0), 'tareas': []} for estado in estados}
+    for tarea in tareas:
+        columnas[tarea['estado']]['tareas'].append({'id': tarea['id'], 'orden': tarea['orden']})
+    return list(columnas.values())
+
+
+def orden_en_posicion(columna, tarea_id, posicion, orden_anterior=None):
+    """
+    Valor de `orden` que deja a la tarea `tarea_id` en la `posicion` (desde
+    1; None es al final) de `columna`, sin contarla a ella. Con
+    `orden_anterior` la tarea ya está en la columna y se reordena dentro de
+    ella: se desplazan las vecinas entre `orden_anterior` y el valor devuelto.
+    """
+    ordenes = list(columna.exclude(pk=tarea_id).order_by('orden', 'id').values_list('orden', flat=True))
+    if orden_anterior is None:
+        if posicion is None or posicion > len(ordenes):
+            return ordenes[-1] + 1 if ordenes else 1
+        return ordenes[posicion - 1]
+
+    actual = sum(orden < orden_anterior for orden in ordenes) + 1
+    posicion = min(posicion, len(ordenes) + 1)
+    if posicion > actual:
+        # Queda detrás de la que hoy está en esa posición, que sube una
+        return ordenes[posicion - 2]
+    if posicion < actual:
+        return ordenes[posicion - 1]
+    return orden_anterior
+
+
+def registrar_transicion(tarea, estado_anterior, actor_id=None, momento=None):
+    """
+    Agrega al registro de transiciones el cambio de estado de `tarea` (con
+    `estado_anterior` None para el alta). Un reordenamiento dentro de la
+    misma columna no es una transición y no escribe nada.
+    """
+    if estado_anterior == tarea.estado:
+        return None
+    return TransicionTarea.objects.create(
+        tarea_id=tarea.pk,
+        proyecto_id=tarea.proyecto_id,
+        empleado_id=tarea.empleado_id,
+        desde=estado_anterior,
+        hacia=tarea.estado,
+        momento=momento or timezone.now(),
+        actor_id=actor_id,
+        sanatorio_id=tarea.sanatorio_id,
+    )
+
+
+def mover_tarea(tarea, nuevo_estado, nuevo_orden=None, version=None, actor_id=None):
+    """
+    Mueve `tarea` (tal como se leyó) a `nuevo_estado`/`nuevo_orden`.
+    Devuelve (estado, orden, versiones) o lanza ConflictoColumna.
+    """
+    estado_anterior = tarea.estado
+    orden_anterior = tarea.orden
+    columna = Tarea.objects.filter(proyecto_id=tarea.proyecto_id, empleado_id=tarea.empleado_id)
+    estados = [estado_anterior, nuevo_estado]
+
+    try:
+        with transaction.atomic():
+            # Desde acá la columna es de este movimiento hasta el commit (ver el docstring del módulo)
+            versiones = incrementar_versiones(
+                tarea.proyecto_id, tarea.empleado_id, estados, origen=estado_anterior, esperada=version
+            )
+            if versiones is None:
+                raise ConflictoColumna(None)
+
+            ahora = timezone.now()
+            actual = Tarea.objects.filter(pk=tarea.pk, estado=estado_anterior, orden=orden_anterior)
+
+            if estado_anterior != nuevo_estado:
+                nuevo_orden = orden_en_posicion(columna.filter(estado=nuevo_estado), tarea.pk, nuevo_orden)
+
+                if not actual.update(estado=nuevo_estado, orden=nuevo_orden, updated_at=ahora):
+                    raise ConflictoColumna(None)
+
+                columna.filter(
+                    estado=estado_anterior, orden__gt=orden_anterior
+                ).update(orden=F('orden') - 1, updated_at=ahora)
+                columna.filter(
+                    estado=nuevo_estado, orden__gte=nuevo_orden
+                ).exclude(pk=tarea.pk).update(orden=F('orden') + 1, updated_at=ahora)
+
+            else:
+                if nuevo_orden:
+                    nuevo_orden = orden_en_posicion(
+                        columna.filter(estado=estado_anterior), tarea.pk, nuevo_orden, orden_anterior
+                    )
+                nuevo_orden = nuevo_orden or orden_anterior
+
+                if nuevo_orden != orden_anterior:
+                    if not actual.update(orden=nuevo_orden, updated_at=ahora):
+                        raise ConflictoColumna(None)
+
+                    vecinas = columna.filter(estado=estado_anterior).exclude(pk=tarea.pk)
+                    if nuevo_orden > orden_anterior:
+                        vecinas.filter(
+                            orden__gt=orden_anterior, orden__lte=nuevo_orden
+                        ).update(orden=F('orden') - 1, updated_at=ahora)
+                    else:
+                        vecinas.filter(
+                            orden__lt=orden_anterior, orden__gte=nuevo_orden
+                        ).update(orden=F('orden') + 1, updated_at=ahora)
+
+            tarea.estado = nuevo_estado
+            tarea.orden = nuevo_orden
+            registrar_movimiento(tarea, estado_anterior, orden_anterior)
+            registrar_transicion(tarea, estado_anterior, actor_id, ahora)
+
+    except ConflictoColumna:
+        tarea.estado = estado_anterior
+        tarea.orden = orden_anterior
+        raise ConflictoColumna(estado_columnas(tarea.proyecto_id, tarea.empleado_id, estados))
+
+    return nuevo_estado, nuevo_orden, versiones
+
+
+def mover_en_lote(proyecto_id, tareas, empleado_id=None, estado=None, actor_id=None, tam_lote=500):
+    """
+    Mueve todas las `tareas` (un queryset del proyecto) a la columna de
+    `empleado_id` en `estado`; si alguno es None, cada tarea conserva el
+    suyo. Las tareas van al final de su columna de destino, sin cambiar su
+    orden relativo (y las que estaban más avanzadas primero). Pensado para
+    vaciar columnas completas: no cierra huecos en las de origen. Debe
+    llamarse dentro de una transacción.
+
+    Devuelve {'tareas_movidas', 'columnas', 'transiciones'}.
+    """
+    ahora = timezone.now()
+    columnas = list(tareas.order_by().values_list('empleado_id', 'estado').distinct())
+    if not columnas:
+        return {'tareas_movidas': 0, 'columnas': 0, 'transiciones': 0}
+
+    def destino(fila_empleado, fila_estado):
+        return (empleado_id or fila_empleado, estado or fila_estado)
+
+    # Primero las versiones, igual que mover_tarea: los movimientos
+    # individuales de estas columnas esperan o fallan por conflicto
+    afectadas = set(columnas) | {destino(*columna) for columna in columnas}
+    incrementar_versiones_en_lote(
+        proyecto_id, {columna[0] for columna in afectadas}, {columna[1] for columna in afectadas}
+    )
+
+    particion = [F(campo) for campo, fijo in (('empleado_id', empleado_id), ('estado', estado)) if fijo is None]
+    avance = Case(
+        *(When(estado=valor, then=Value(indice)) for indice, (valor, _) in enumerate(reversed(Tarea.ESTADOS))),
+        default=Value(len(Tarea.ESTADOS)),
+    )
+    filas = list(
+        tareas.annotate(posicion=Window(
+            RowNumber(), partition_by=particion or None, order_by=[avance.asc(), F('orden').asc(), F('id').asc()],
+        )).values_list('id', 'empleado_id', 'estado', 'orden', 'sanatorio_id', 'posicion')
+    )
+
+    destinos = {destino(fila[1], fila[2]) for fila in filas}
+    ultimos = {
+        (fila['empleado_id'], fila['estado']): fila['ultimo']
+        for fila in Tarea.objects.filter(
+            proyecto_id=proyecto_id,
+            empleado_id__in={empleado for empleado, _ in destinos},
+            estado__in={estado for _, estado in destinos},
+        ).exclude(pk__in=tareas.values('pk')).order_by().values('empleado_id', 'estado').annotate(ultimo=Max('orden'))
+    }
+
+    movidas, transiciones, movimientos = [], [], []
+    for pk, empleado_anterior, estado_anterior, orden_anterior, sanatorio_id, posicion in filas:
+        nuevo_empleado, nuevo_estado = destino(empleado_anterior, estado_anterior)
+        nuevo_orden = (ultimos.get((nuevo_empleado, nuevo_estado)) or 0) + posicion
+        movidas.append(Tarea(
+            pk=pk, empleado_id=nuevo_empleado, estado=nuevo_estado, orden=nuevo_orden, updated_at=ahora,
+        ))
+        if nuevo_estado != estado_anterior:
+            transiciones.append(TransicionTarea(
+                tarea_id=pk, proyecto_id=proyecto_id, empleado_id=nuevo_empleado, desde=estado_anterior,
+                hacia=nuevo_estado, momento=ahora, actor_id=actor_id, sanatorio_id=sanatorio_id,
+            ))
+        movimientos.append({
+            'id': pk,
+            'de': {'empleado_id': empleado_anterior, 'estado': estado_anterior, 'orden': orden_anterior},
+            'a': {'empleado_id': nuevo_empleado, 'estado': nuevo_estado, 'orden': nuevo_orden},
+        })
+
+    Tarea.objects.bulk_update(movidas, ['empleado', 'estado', 'orden', 'updated_at'], batch_size=tam_lote)
+    TransicionTarea.objects.bulk_create(transiciones, batch_size=tam_lote)
+    # Un solo evento para todo el lote, en lugar de un tarea.movida por tarea
+    registrar_evento('tareas.movidas', proyecto_id, proyecto_id, {'tareas': movimientos})
+
+    return {'tareas_movidas': len(movidas), 'columnas': len(destinos), 'transiciones': len(transiciones)}
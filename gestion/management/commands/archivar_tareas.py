@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from gestion.archivo import archivar_lote, candidatas, fecha_limite
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve a TareaArchivada las tareas completadas con fecha anterior a '
+        'ARCHIVO_TAREAS_DIAS días, en lotes de una transacción cada uno.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, help='Antigüedad mínima (por defecto ARCHIVO_TAREAS_DIAS)')
+        parser.add_argument('--lote', type=int, help='Tareas por transacción (por defecto ARCHIVO_TAREAS_LOTE)')
+        parser.add_argument('--pausa', type=float, default=0.1, help='Segundos entre lotes, para no competir con los requests')
+        parser.add_argument('--max-lotes', type=int, help='Cortar después de esta cantidad de lotes')
+        parser.add_argument('--simular', action='store_true', help='Sólo contar las tareas a archivar')
+
+    def handle(self, *args, **options):
+        limite = fecha_limite(options['dias'])
+        tam_lote = options['lote'] or settings.ARCHIVO_TAREAS_LOTE
+
+        if options['simular']:
+            self.stdout.write(f'{candidatas(limite).count()} tareas completadas con fecha anterior a {limite}')
+            return
+
+        archivadas = lotes = 0
+        inicio = time.perf_counter()
+        while options['max_lotes'] is None or lotes < options['max_lotes']:
+            close_old_connections()
+            movidas = archivar_lote(limite, tam_lote)
+            if not movidas:
+                break
+            archivadas += movidas
+            lotes += 1
+            self.stdout.write(f'  Lote {lotes}: {movidas} tareas ({archivadas} en total)')
+            if movidas < tam_lote:
+                break
+            time.sleep(options['pausa'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{archivadas} tareas archivadas en {lotes} lotes ({time.perf_counter() - inicio:.1f} s)'
+        ))
@@ -0,0 +1,126 @@
+import json
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.utils import timezone
+
+from gestion.benchmark import SUITES, comparar, guardar, sembrar
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta la suite de benchmarks de la API sobre una base de pruebas con '
+        'datos sintéticos y guarda los resultados (p50/p95/p99, consultas, '
+        'throughput) en JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--suite', action='append', choices=sorted(SUITES),
+            help='Suites a ejecutar (se puede repetir). Por defecto: todas.'
+        )
+        parser.add_argument('--encargados', type=int, default=5)
+        parser.add_argument('--empleados', type=int, default=20, help='Empleados por encargado')
+        parser.add_argument('--proyectos', type=int, default=4, help='Proyectos por encargado')
+        parser.add_argument('--tareas', type=int, default=25, help='Tareas por empleado')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--repeticiones', type=int, default=50, help='Requests por endpoint en la suite api')
+        parser.add_argument('--hilos', type=int, default=4, help='Hilos del generador de carga')
+        parser.add_argument('--requests', type=int, default=400, help='Requests totales de la suite de carga')
+        parser.add_argument(
+            '--tareas-historicas', type=int, default=100000,
+            help='Tareas del histórico sintético de la suite particiones'
+        )
+        parser.add_argument(
+            '--transiciones', type=int, default=200000,
+            help='Transiciones del registro sintético de la suite analitica'
+        )
+        parser.add_argument(
+            '--revocados', type=int, default=100000,
+            help='Tokens revocados sembrados para la suite revocacion'
+        )
+        parser.add_argument('--profundidad', type=int, default=15, help='Niveles del árbol profundo de la suite jerarquia')
+        parser.add_argument('--ancho', type=int, default=100, help='Encargados bajo la raíz del árbol ancho de la suite jerarquia')
+        parser.add_argument(
+            '--proyectos-historicos', type=int, default=50000,
+            help='Proyectos sintéticos de la suite cronograma'
+        )
+        parser.add_argument('--sanatorios', type=int, default=20, help='Sanatorios de la suite sanatorios')
+        parser.add_argument('--salida', default='benchmark.json')
+        parser.add_argument('--comparar', help='Resultado anterior para marcar regresiones')
+        parser.add_argument('--umbral', type=float, default=0.10, help='Empeoramiento tolerado al comparar')
+
+    def handle(self, *args, **options):
+        suites = options['suite'] or sorted(SUITES)
+
+        # Igual que el test runner: una base aparte que se descarta al final
+        setup_test_environment()
+        bases = setup_databases(verbosity=0, interactive=False)
+        try:
+            datos = sembrar(
+                encargados=options['encargados'],
+                empleados=options['empleados'],
+                proyectos=options['proyectos'],
+                tareas=options['tareas'],
+                semilla=options['semilla'],
+            )
+            resultados = {
+                'fecha': timezone.now().isoformat(),
+                'commit': self._commit(),
+                'parametros': {
+                    clave: options[clave] for clave in (
+                        'encargados', 'empleados', 'proyectos', 'tareas',
+                        'semilla', 'repeticiones', 'hilos', 'requests',
+                    )
+                },
+                'suites': {},
+            }
+            # Los límites de requests falsearían la carga; la suite throttling los activa por su cuenta
+            with override_settings(THROTTLE_ACTIVO=False):
+                for nombre in suites:
+                    self.stdout.write(f'Suite {nombre}...')
+                    resultados['suites'][nombre] = SUITES[nombre](datos, options)
+        finally:
+            teardown_databases(bases, verbosity=0)
+            teardown_test_environment()
+
+        guardar(options['salida'], resultados)
+        self._imprimir(resultados)
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+
+        if options['comparar']:
+            try:
+                with open(options['comparar'], encoding='utf-8') as fh:
+                    anterior = json.load(fh)
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+            regresiones = comparar(anterior, resultados, options['umbral'])
+            for nombre, metrica, antes, ahora in regresiones:
+                self.stdout.write(self.style.WARNING(f'  {nombre} {metrica}: {antes} -> {ahora}'))
+            if regresiones:
+                raise CommandError(f'{len(regresiones)} regresiones respecto de {options["comparar"]}')
+
+    def _imprimir(self, resultados):
+        for suite, valores in resultados['suites'].items():
+            for nombre, resumen in valores.items():
+                if isinstance(resumen, dict) and 'p50_ms' in resumen:
+                    extra = ''
+                    if 'consultas_media' in resumen:
+                        extra += f" consultas={resumen['consultas_media']}"
+                    if 'requests_por_segundo' in resumen:
+                        extra += f" rps={resumen['requests_por_segundo']}"
+                    self.stdout.write(
+                        f"  {suite}/{nombre}: p50={resumen['p50_ms']}ms p95={resumen['p95_ms']}ms "
+                        f"p99={resumen['p99_ms']}ms errores={resumen['errores']}{extra}"
+                    )
+
+    @staticmethod
+    def _commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from gestion.backup import escribir_snapshot, leer_cabecera
+from gestion.models import Borrado
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera un snapshot comprimido (JSON por líneas + gzip) de las tablas de '
+        'gestion. Con --desde genera un incremental a partir de otro snapshot.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--salida', default='backups',
+            help='Archivo .jsonl.gz o directorio donde guardar el snapshot'
+        )
+        parser.add_argument(
+            '--desde',
+            help='Snapshot anterior (completo o incremental) cuya marca de agua se usa'
+        )
+        parser.add_argument(
+            '--purgar-borrados', action='store_true',
+            help='Tras un snapshot completo, eliminar las lápidas anteriores a él'
+        )
+        parser.add_argument('--lote', type=int, default=2000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        desde = None
+        if options['desde']:
+            try:
+                desde = leer_cabecera(options['desde'])['hasta']
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+
+        salida = Path(options['salida'])
+        if salida.suffix != '.gz':
+            salida.mkdir(parents=True, exist_ok=True)
+            tipo = 'incremental' if desde else 'completo'
+            salida = salida / f"gestion-{timezone.now():%Y%m%dT%H%M%S}-{tipo}.jsonl.gz"
+        else:
+            salida.parent.mkdir(parents=True, exist_ok=True)
+
+        cabecera = escribir_snapshot(
+            salida, desde=desde, using=options['database'], tam_lote=options['lote']
+        )
+
+        if options['purgar_borrados'] and not desde:
+            eliminados, _ = Borrado.objects.using(options['database']).filter(
+                borrado_en__lte=cabecera['hasta']
+            ).delete()
+            self.stdout.write(f'  {eliminados} lápidas purgadas')
+
+        for etiqueta, cantidad in cabecera['conteo'].items():
+            self.stdout.write(f'  {etiqueta}: {cantidad}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {cabecera['tipo']} escrito en {salida} ({salida.stat().st_size} bytes)"
+        ))
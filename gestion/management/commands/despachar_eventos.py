@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from gestion.eventos import crear_destinos, despachar_lote, purgar_despachados
+
+
+class Command(BaseCommand):
+    help = 'Envía los eventos de dominio pendientes del outbox a los destinos configurados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=100, help='Eventos por envío')
+        parser.add_argument('--espera', type=float, default=1.0, help='Segundos entre consultas si no hay pendientes')
+        parser.add_argument('--una-vez', action='store_true', help='Despachar lo pendiente y salir')
+        parser.add_argument('--webhook', action='append', default=[], help='URL de webhook (reemplaza EVENTOS_DESTINOS)')
+        parser.add_argument('--archivo', help='Archivo JSONL de destino (reemplaza EVENTOS_DESTINOS)')
+        parser.add_argument('--purgar-dias', type=int, default=7, help='Borrar despachados más viejos que esto')
+
+    def handle(self, *args, **options):
+        configuracion = None
+        if options['webhook'] or options['archivo']:
+            configuracion = [{'tipo': 'webhook', 'url': url} for url in options['webhook']]
+            if options['archivo']:
+                configuracion.append({'tipo': 'archivo', 'ruta': options['archivo']})
+        destinos = crear_destinos(configuracion)
+        if not destinos:
+            raise CommandError('No hay destinos: configure EVENTOS_DESTINOS o use --webhook/--archivo')
+
+        despachados = 0
+        reintento = 0
+        ultima_purga = 0
+        try:
+            while True:
+                close_old_connections()
+                if time.monotonic() - ultima_purga > 3600:
+                    purgar_despachados(options['purgar_dias'])
+                    ultima_purga = time.monotonic()
+
+                try:
+                    enviados = despachar_lote(destinos, options['lote'])
+                except Exception as e:
+                    # El lote queda pendiente y se reenvía completo: entrega al menos una vez
+                    reintento += 1
+                    espera = min(2 ** reintento, 60)
+                    self.stderr.write(f'  Envío fallido ({e}); reintento en {espera} s')
+                    if options['una_vez']:
+                        raise CommandError(f'{despachados} eventos despachados antes del error: {e}')
+                    time.sleep(espera)
+                    continue
+
+                reintento = 0
+                despachados += enviados
+                if enviados < options['lote']:
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['espera'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'{despachados} eventos despachados'))
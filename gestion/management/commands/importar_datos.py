@@ -0,0 +1,93 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from gestion.importacion import MODELOS, ImportadorGestion, abrir_texto, iterar_csv, iterar_json
+from gestion.models import Sanatorio
+from gestion.tenencia import en_sanatorio
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa usuarios, proyectos, permisos y tareas desde un volcado JSON '
+        '(formato dumpdata, p. ej. datos_backup.json) o archivos CSV, usando '
+        'inserciones masivas en lugar de loaddata.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivos', nargs='+', help='Archivos .json o .csv a importar')
+        parser.add_argument(
+            '--modelo',
+            help='Modelo de los CSV (usuario, proyecto, permiso, tarea). '
+                 'Por defecto se toma del nombre del archivo.'
+        )
+        parser.add_argument('--lote', type=int, default=1000, help='Filas por lote/transacción')
+        parser.add_argument('--hilos', type=int, default=4, help='Hilos para hashear contraseñas en texto plano')
+        parser.add_argument(
+            '--passwords-hasheados', action='store_true',
+            help='Las contraseñas del volcado ya están hasheadas. Sin esta opción se hashean '
+                 'todas, salvo las filas con password_hasheado'
+        )
+        parser.add_argument(
+            '--ignorar-errores', action='store_true',
+            help='Omitir las filas inválidas en lugar de abortar'
+        )
+        parser.add_argument(
+            '--sanatorio',
+            help='Slug del sanatorio de las filas que no traen el campo sanatorio '
+                 '(por defecto, SANATORIO_POR_DEFECTO)'
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        sanatorio_id = None
+        if options['sanatorio']:
+            try:
+                sanatorio_id = Sanatorio.objects.using(options['database']).get(slug=options['sanatorio']).pk
+            except Sanatorio.DoesNotExist:
+                raise CommandError(f"No existe el sanatorio {options['sanatorio']}")
+
+        with en_sanatorio(sanatorio_id):
+            self._importar(options)
+
+    def _importar(self, options):
+        importador = ImportadorGestion(
+            using=options['database'],
+            tam_lote=options['lote'],
+            ignorar_errores=options['ignorar_errores'],
+            hilos=options['hilos'],
+            passwords_hasheados=options['passwords_hasheados'],
+        )
+
+        try:
+            for ruta in options['archivos']:
+                ruta = Path(ruta)
+                with open(ruta, 'rb') as fh:
+                    texto = abrir_texto(fh)
+                    if ruta.suffix.lower() == '.csv':
+                        etiqueta = f"gestion.{(options['modelo'] or ruta.stem).lower()}"
+                        if etiqueta not in MODELOS:
+                            raise CommandError(f'Modelo desconocido para {ruta.name}: {etiqueta}')
+                        registros = iterar_csv(texto, etiqueta)
+                    else:
+                        registros = iterar_json(texto)
+
+                    for registro in registros:
+                        importador.agregar(registro)
+
+            resumen = importador.finalizar()
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for etiqueta, cantidad in resumen['insertados'].items():
+            self.stdout.write(f'  {etiqueta}: {cantidad} insertados')
+        for etiqueta, cantidad in resumen['omitidos'].items():
+            self.stdout.write(f'  {etiqueta}: {cantidad} omitidos')
+        for error in resumen['errores']:
+            self.stderr.write(f'  {error}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación completa en {resumen['segundos']:.2f}s "
+            f"({resumen['filas_por_segundo']:.0f} filas/s)"
+        ))
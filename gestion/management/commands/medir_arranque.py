@@ -0,0 +1,140 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Se ejecuta en un intérprete nuevo, como un worker recién creado
+SCRIPT_WORKER = r'''
+import json, os, sys, time
+inicio = time.perf_counter()
+import django
+django.setup()
+importado = time.perf_counter()
+
+from django.core.servers.basehttp import get_internal_wsgi_application
+application = get_internal_wsgi_application()  # WSGI_APPLICATION, con su precarga
+listo = time.perf_counter()
+
+from io import BytesIO
+from django.conf import settings
+
+host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+
+def pedir(ruta):
+    ruta, _, query = ruta.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': ruta, 'QUERY_STRING': query,
+        'SERVER_NAME': host, 'SERVER_PORT': '80', 'HTTP_HOST': host,
+        'HTTP_ACCEPT_ENCODING': 'gzip', 'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0), 'wsgi.multithread': True,
+        'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+    estado = []
+    t = time.perf_counter()
+    cuerpo = b''.join(application(environ, lambda s, h, e=None: estado.append(s)))
+    return time.perf_counter() - t, estado[0].split()[0], len(cuerpo)
+
+resultado = {
+    'importacion_ms': (importado - inicio) * 1000,
+    'wsgi_ms': (listo - importado) * 1000,
+    'modulos': len(sys.modules),
+    'rutas': {},
+}
+for ruta in json.loads(os.environ['MEDIR_ARRANQUE_RUTAS']):
+    primero, codigo, tamano = pedir(ruta)
+    segundo, _, _ = pedir(ruta)
+    resultado['rutas'][ruta] = {
+        'primer_request_ms': primero * 1000, 'segundo_request_ms': segundo * 1000,
+        'codigo': codigo, 'bytes': tamano,
+    }
+resultado['total_hasta_primer_request_ms'] = (time.perf_counter() - inicio) * 1000
+print('RESULTADO ' + json.dumps(resultado))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el arranque de un worker: tiempo de importación y django.setup(), '
+        'carga de la aplicación WSGI y latencia del primer y segundo request por '
+        'ruta, en intérpretes nuevos y por perfil de arranque.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--perfil', action='append', choices=['desarrollo', 'produccion'],
+            help='Perfiles a comparar (se puede repetir). Por defecto el actual.'
+        )
+        parser.add_argument(
+            '--ruta', action='append',
+            help='Rutas a pedir tras el arranque (por defecto /api/me/ y /api/schema/)'
+        )
+        parser.add_argument('--repeticiones', type=int, default=5, help='Workers a lanzar por perfil')
+        parser.add_argument('--salida', help='Guardar los resultados en JSON')
+
+    def handle(self, *args, **options):
+        perfiles = options['perfil'] or [settings.PERFIL_ARRANQUE]
+        rutas = options['ruta'] or ['/api/me/', '/api/schema/']
+        resultados = {}
+
+        for perfil in perfiles:
+            entorno = dict(
+                os.environ,
+                PERFIL_ARRANQUE=perfil,
+                MEDIR_ARRANQUE_RUTAS=json.dumps(rutas),
+                DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'proyecto_sanatorium.settings'),
+            )
+            muestras = [self._worker(entorno) for _ in range(options['repeticiones'])]
+            resultados[perfil] = self._resumir(muestras, rutas)
+            self._imprimir(perfil, resultados[perfil])
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as fh:
+                json.dump(resultados, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+
+    def _worker(self, entorno):
+        proceso = subprocess.run(
+            [sys.executable, '-c', SCRIPT_WORKER],
+            env=entorno, cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        for linea in proceso.stdout.splitlines():
+            if linea.startswith('RESULTADO '):
+                return json.loads(linea[len('RESULTADO '):])
+        raise CommandError(f'El worker de medición falló:\n{proceso.stderr[-2000:]}')
+
+    @staticmethod
+    def _resumir(muestras, rutas):
+        def mediana(valores):
+            return round(statistics.median(valores), 1)
+
+        return {
+            'importacion_ms': mediana([m['importacion_ms'] for m in muestras]),
+            'wsgi_ms': mediana([m['wsgi_ms'] for m in muestras]),
+            'total_hasta_primer_request_ms': mediana([m['total_hasta_primer_request_ms'] for m in muestras]),
+            'modulos': muestras[0]['modulos'],
+            'rutas': {
+                ruta: {
+                    'primer_request_ms': mediana([m['rutas'][ruta]['primer_request_ms'] for m in muestras]),
+                    'segundo_request_ms': mediana([m['rutas'][ruta]['segundo_request_ms'] for m in muestras]),
+                    'codigo': muestras[0]['rutas'][ruta]['codigo'],
+                    'bytes': muestras[0]['rutas'][ruta]['bytes'],
+                }
+                for ruta in rutas
+            },
+        }
+
+    def _imprimir(self, perfil, resumen):
+        self.stdout.write(
+            f"{perfil}: importación {resumen['importacion_ms']} ms, WSGI {resumen['wsgi_ms']} ms, "
+            f"{resumen['modulos']} módulos"
+        )
+        for ruta, datos in resumen['rutas'].items():
+            self.stdout.write(
+                f"  {ruta} [{datos['codigo']}, {datos['bytes']} bytes]: primer request "
+                f"{datos['primer_request_ms']} ms, segundo {datos['segundo_request_ms']} ms"
+            )
@@ -0,0 +1,66 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion import particiones
+
+
+class Command(BaseCommand):
+    help = (
+        'Particionado de Tarea por fecha en PostgreSQL: convierte la tabla, crea '
+        'las particiones futuras y desprende las viejas. Sin opciones sólo crea las '
+        'futuras que falten (para cron). En otros motores no hace nada.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convertir', action='store_true', help='Convertir la tabla en particionada (bloquea la tabla)')
+        parser.add_argument(
+            '--granularidad', choices=particiones.GRANULARIDADES,
+            help='Una partición por mes o por año (por defecto TAREAS_PARTICION_GRANULARIDAD)'
+        )
+        parser.add_argument('--futuras', type=int, help='Periodos futuros a crear (por defecto TAREAS_PARTICIONES_FUTURAS)')
+        parser.add_argument('--desprender-antes', help='Desprender las particiones que terminan antes de esta fecha (AAAA-MM-DD)')
+        parser.add_argument('--eliminar', action='store_true', help='Eliminar las particiones desprendidas en lugar de dejarlas como tablas')
+        parser.add_argument('--listar', action='store_true', help='Sólo listar las particiones')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not particiones.disponible(using):
+            self.stdout.write('El particionado sólo aplica a PostgreSQL; no hay nada que hacer.')
+            return
+
+        granularidad = options['granularidad'] or settings.TAREAS_PARTICION_GRANULARIDAD
+        if granularidad not in particiones.GRANULARIDADES:
+            raise CommandError(f'Granularidad desconocida: {granularidad}')
+        futuras = settings.TAREAS_PARTICIONES_FUTURAS if options['futuras'] is None else options['futuras']
+
+        if options['convertir']:
+            if particiones.esta_particionada(using):
+                raise CommandError(f'{particiones.TABLA} ya está particionada')
+            creadas = particiones.convertir(granularidad, futuras, using)
+            self.stdout.write(self.style.SUCCESS(f'Tabla convertida con {len(creadas)} particiones ({granularidad})'))
+        elif not particiones.esta_particionada(using):
+            raise CommandError(f'{particiones.TABLA} no está particionada; use --convertir')
+
+        if options['listar']:
+            for nombre, desde, hasta in particiones.particiones(using):
+                self.stdout.write(f'  {nombre}: [{desde}, {hasta})')
+            return
+
+        hasta = datetime.date.today()
+        for _ in range(futuras):
+            hasta = particiones.siguiente_periodo(particiones.inicio_periodo(hasta, granularidad), granularidad)
+        creadas = particiones.crear_particiones(hasta, granularidad, using)
+        if creadas:
+            self.stdout.write(f'Particiones creadas: {", ".join(creadas)}')
+
+        if options['desprender_antes']:
+            try:
+                fecha = datetime.date.fromisoformat(options['desprender_antes'])
+            except ValueError:
+                raise CommandError('--desprender-antes debe ser una fecha AAAA-MM-DD')
+            viejas = particiones.desprender_anteriores(fecha, options['eliminar'], using)
+            accion = 'eliminadas' if options['eliminar'] else 'desprendidas'
+            self.stdout.write(f'Particiones {accion}: {", ".join(viejas) or "ninguna"}')
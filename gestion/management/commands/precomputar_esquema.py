@@ -0,0 +1,45 @@
+import gzip
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from gestion.esquema import directorio_esquema
+from gestion.middleware import brotli
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera el esquema OpenAPI (YAML y JSON, con variantes .gz y .br) en '
+        'ESQUEMA_OPENAPI_DIR para servirlo sin regenerarlo. Se corre en el build, '
+        'después de collectstatic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directorio', help='Por defecto ESQUEMA_OPENAPI_DIR')
+
+    def handle(self, *args, **options):
+        # drf_spectacular se importa sólo aquí (ver gestion/esquema.py)
+        from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+        from drf_spectacular.settings import spectacular_settings
+
+        directorio = Path(options['directorio']) if options['directorio'] else directorio_esquema()
+        directorio.mkdir(parents=True, exist_ok=True)
+
+        generador = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+        esquema = generador.get_schema(request=None, public=True)
+
+        for formato, renderer in (('yaml', OpenApiYamlRenderer()), ('json', OpenApiJsonRenderer())):
+            contenido = renderer.render(esquema, renderer_context={})
+            ruta = directorio / f'esquema.{formato}'
+            ruta.write_bytes(contenido)
+            ruta.with_name(ruta.name + '.gz').write_bytes(gzip.compress(contenido, compresslevel=9, mtime=0))
+            tamanos = f'{len(contenido)} bytes'
+            if brotli is not None:
+                comprimido = brotli.compress(contenido, quality=11)
+                ruta.with_name(ruta.name + '.br').write_bytes(comprimido)
+                tamanos += f', br {len(comprimido)}'
+            else:
+                ruta.with_name(ruta.name + '.br').unlink(missing_ok=True)
+            self.stdout.write(f'  {ruta} ({tamanos})')
+
+        self.stdout.write(self.style.SUCCESS(f'Esquema precomputado en {directorio}'))
@@ -0,0 +1,52 @@
+import time
+import traceback
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from gestion.trabajos import BackendBaseDeDatos, ejecutar_trabajo, obtener_backend
+
+
+class Command(BaseCommand):
+    help = 'Worker de la cola de trabajos diferidos (backend base_de_datos).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=10, help='Trabajos a reservar por vuelta')
+        parser.add_argument('--espera', type=float, default=1.0, help='Segundos entre consultas si la cola está vacía')
+        parser.add_argument('--una-vez', action='store_true', help='Procesar lo pendiente y salir')
+        parser.add_argument('--purgar-dias', type=int, default=7, help='Borrar completados más viejos que esto')
+
+    def handle(self, *args, **options):
+        backend = obtener_backend()
+        if not isinstance(backend, BackendBaseDeDatos):
+            raise CommandError('procesar_trabajos sólo aplica al backend base_de_datos')
+
+        procesados = fallidos = 0
+        ultima_purga = 0
+        try:
+            while True:
+                close_old_connections()
+                if time.monotonic() - ultima_purga > 3600:
+                    backend.purgar(options['purgar_dias'])
+                    ultima_purga = time.monotonic()
+
+                reservados = backend.reservar(options['lote'])
+                for trabajo in reservados:
+                    try:
+                        ejecutar_trabajo(trabajo.nombre, trabajo.argumentos)
+                    except Exception:
+                        fallidos += 1
+                        backend.fallar(trabajo, traceback.format_exc())
+                        self.stderr.write(f'  {trabajo.nombre} #{trabajo.pk} falló (intento {trabajo.intentos})')
+                    else:
+                        procesados += 1
+                        backend.completar(trabajo)
+
+                if not reservados:
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['espera'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'{procesados} trabajos completados, {fallidos} fallidos'))
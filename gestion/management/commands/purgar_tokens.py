@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gestion.models import TokenRevocado
+from gestion.revocacion import purgar_vencidos
+
+
+class Command(BaseCommand):
+    help = (
+        'Borra de la lista de revocados los refresh tokens que ya vencieron, en '
+        'lotes de REVOCACION_PURGA_LOTE. El refresh también la encola solo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, help='Filas por lote (por defecto REVOCACION_PURGA_LOTE)')
+        parser.add_argument('--pausa', type=float, default=0.05, help='Segundos entre lotes')
+
+    def handle(self, *args, **options):
+        borrados = purgar_vencidos(options['lote'] or settings.REVOCACION_PURGA_LOTE, options['pausa'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{borrados} tokens vencidos borrados; quedan {TokenRevocado.objects.count()} revocados vigentes'
+        ))
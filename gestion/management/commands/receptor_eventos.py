@@ -0,0 +1,67 @@
+import hashlib
+import hmac
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Receptor HTTP local de eventos de dominio, para probar el despachador sin un consumidor real.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--puerto', type=int, default=8765)
+        parser.add_argument('--salida', help='Agregar los eventos recibidos a este archivo JSONL')
+        parser.add_argument('--fallar-cada', type=int, default=0, help='Responder 503 a uno de cada N envíos')
+
+    def handle(self, *args, **options):
+        comando = self
+        secreto = getattr(settings, 'EVENTOS_WEBHOOK_SECRETO', '')
+        ultimas = {}  # proyecto -> última secuencia recibida
+        envios = [0]
+
+        class Receptor(BaseHTTPRequestHandler):
+            def do_POST(self):
+                cuerpo = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                envios[0] += 1
+
+                if secreto:
+                    firma = hmac.new(secreto.encode(), cuerpo, hashlib.sha256).hexdigest()
+                    if not hmac.compare_digest(firma, self.headers.get('X-Eventos-Firma', '')):
+                        return self.responder(401)
+                if options['fallar_cada'] and envios[0] % options['fallar_cada'] == 0:
+                    return self.responder(503)
+
+                eventos = json.loads(cuerpo)['eventos']
+                for evento in eventos:
+                    anterior = ultimas.get(evento['proyecto'], 0)
+                    if evento['secuencia'] <= anterior:
+                        comando.stdout.write(f"  duplicado: proyecto {evento['proyecto']} #{evento['secuencia']}")
+                        continue
+                    if evento['secuencia'] != anterior + 1:
+                        comando.stderr.write(
+                            f"  hueco: proyecto {evento['proyecto']} #{anterior} -> #{evento['secuencia']}"
+                        )
+                    ultimas[evento['proyecto']] = evento['secuencia']
+                    comando.stdout.write(f"  {evento['tipo']} proyecto {evento['proyecto']} #{evento['secuencia']}")
+                    if options['salida']:
+                        with open(options['salida'], 'a', encoding='utf-8') as archivo:
+                            archivo.write(json.dumps(evento, ensure_ascii=False) + '\n')
+                self.responder(204)
+
+            def responder(self, codigo):
+                self.send_response(codigo)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer(('127.0.0.1', options['puerto']), Receptor)
+        self.stdout.write(f"Escuchando en http://127.0.0.1:{options['puerto']}/")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from gestion.backup import restaurar_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Restaura snapshots generados con crear_backup. Se aplican en el orden '
+        'dado: primero el completo y luego los incrementales.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivos', nargs='+', help='Snapshots .jsonl.gz')
+        parser.add_argument('--lote', type=int, default=2000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        for ruta in options['archivos']:
+            try:
+                cabecera, conteo = restaurar_snapshot(
+                    ruta, using=options['database'], tam_lote=options['lote']
+                )
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+
+            self.stdout.write(f"{ruta} ({cabecera['tipo']}, hasta {cabecera['hasta']})")
+            for etiqueta, cantidad in conteo.items():
+                self.stdout.write(f'  {etiqueta}: {cantidad}')
+
+        self.stdout.write(self.style.SUCCESS('Restauración completa'))
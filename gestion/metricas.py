@@ -0,0 +1,141 @@
+"""
+Métricas de rendimiento por endpoint, en memoria de cada worker.
+
+Se exportan en formato de texto de Prometheus. Con varios workers de
+gunicorn cada uno lleva sus propios contadores; Prometheus los distingue
+por la instancia que responde el scrape.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+
+# Límites superiores (en segundos) de los buckets del histograma de latencia
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Medicion:
+    """
+    Datos de un request muestreado. Se instala como execute_wrapper de la
+    conexión para contar consultas y tiempo de SQL.
+    """
+    __slots__ = ('consultas', 'tiempo_sql', 'inicio_render', 'tiempo_render')
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_sql = 0.0
+        self.inicio_render = None
+        self.tiempo_render = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo_sql += time.perf_counter() - inicio
+            self.consultas += 1
+
+    def empezar_render(self):
+        self.inicio_render = time.perf_counter()
+
+    def terminar_render(self, response=None):
+        if self.inicio_render is not None:
+            self.tiempo_render = time.perf_counter() - self.inicio_render
+
+
+class EstadisticasEndpoint:
+    __slots__ = (
+        'buckets', 'suma', 'total', 'por_estado', 'bytes',
+        'muestreados', 'consultas', 'tiempo_sql', 'tiempo_render',
+    )
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)  # el último es +Inf
+        self.suma = 0.0
+        self.total = 0
+        self.por_estado = {}
+        self.bytes = 0
+        self.muestreados = 0
+        self.consultas = 0
+        self.tiempo_sql = 0.0
+        self.tiempo_render = 0.0
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def registrar(self, metodo, endpoint, estado, duracion, tamano, medicion=None):
+        with self._lock:
+            stats = self._endpoints.get((metodo, endpoint))
+            if stats is None:
+                stats = self._endpoints[(metodo, endpoint)] = EstadisticasEndpoint()
+
+            stats.buckets[bisect_left(BUCKETS, duracion)] += 1
+            stats.suma += duracion
+            stats.total += 1
+            stats.por_estado[estado] = stats.por_estado.get(estado, 0) + 1
+            stats.bytes += tamano
+
+            if medicion is not None:
+                stats.muestreados += 1
+                stats.consultas += medicion.consultas
+                stats.tiempo_sql += medicion.tiempo_sql
+                stats.tiempo_render += medicion.tiempo_render
+
+    def reiniciar(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def exportar(self):
+        """Devuelve todas las métricas en el formato de texto de Prometheus."""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lineas = []
+
+            def serie(nombre, tipo, ayuda, valores):
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} {tipo}')
+                lineas.extend(valores)
+
+            def etiquetas(metodo, endpoint, **extra):
+                pares = [('method', metodo), ('endpoint', endpoint)] + list(extra.items())
+                return ','.join(f'{clave}="{valor}"' for clave, valor in pares)
+
+            valores = []
+            for (metodo, endpoint), stats in endpoints:
+                acumulado = 0
+                for limite, cantidad in zip(BUCKETS + ('+Inf',), stats.buckets):
+                    acumulado += cantidad
+                    valores.append(
+                        f'gestion_http_request_duration_seconds_bucket'
+                        f'{{{etiquetas(metodo, endpoint, le=limite)}}} {acumulado}'
+                    )
+                valores.append(f'gestion_http_request_duration_seconds_sum{{{etiquetas(metodo, endpoint)}}} {stats.suma:.6f}')
+                valores.append(f'gestion_http_request_duration_seconds_count{{{etiquetas(metodo, endpoint)}}} {stats.total}')
+            serie('gestion_http_request_duration_seconds', 'histogram', 'Latencia de los requests.', valores)
+
+            serie('gestion_http_requests_total', 'counter', 'Requests por código de respuesta.', [
+                f'gestion_http_requests_total{{{etiquetas(metodo, endpoint, status=estado)}}} {cantidad}'
+                for (metodo, endpoint), stats in endpoints
+                for estado, cantidad in sorted(stats.por_estado.items())
+            ])
+
+            contadores = [
+                ('gestion_http_response_bytes_total', 'bytes', 'Bytes enviados en el cuerpo de las respuestas.', '{}'),
+                ('gestion_requests_sampled_total', 'muestreados', 'Requests con medición detallada (muestreo).', '{}'),
+                ('gestion_db_queries_total', 'consultas', 'Consultas SQL de los requests muestreados.', '{}'),
+                ('gestion_db_query_seconds_total', 'tiempo_sql', 'Tiempo en SQL de los requests muestreados.', '{:.6f}'),
+                ('gestion_render_seconds_total', 'tiempo_render', 'Tiempo de render (serialización a JSON) de los requests muestreados.', '{:.6f}'),
+            ]
+            for nombre, atributo, ayuda, formato in contadores:
+                serie(nombre, 'counter', ayuda, [
+                    f'{nombre}{{{etiquetas(metodo, endpoint)}}} {formato.format(getattr(stats, atributo))}'
+                    for (metodo, endpoint), stats in endpoints
+                ])
+
+        return '\n'.join(lineas) + '\n'
+
+
+registro = RegistroMetricas()
@@ -0,0 +1,240 @@
+import atexit
+import gzip
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from .detector_consultas import ConsultasRepetidas, DetectorConsultas, reporte, describir
+from .metricas import Medicion, registro
+from .routers import alias_replicas, fijar_a_principal, verificar_cache_pin
+from .tenencia import activar, desactivar, sanatorio_de_host
+
+try:
+    import brotli
+except ImportError:  # dependencia opcional
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class MetricasMiddleware:
+    """
+    Registra latencia, tamaño de respuesta y código de estado de cada request.
+
+    Una fracción de los requests (METRICAS_MUESTREO) además se mide en
+    detalle: cantidad de consultas, tiempo en SQL y tiempo de render; esos
+    requests llevan el header `Server-Timing` si METRICAS_SERVER_TIMING está activo.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = getattr(settings, 'METRICAS_MUESTREO', 1.0)
+        self.server_timing = getattr(settings, 'METRICAS_SERVER_TIMING', False)
+        self.umbral_lento = getattr(settings, 'METRICAS_UMBRAL_LENTO_MS', 1000) / 1000
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        medicion = None
+
+        if self.muestreo >= 1 or random.random() < self.muestreo:
+            medicion = request._medicion = Medicion()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(medicion))
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+
+        duracion = time.perf_counter() - inicio
+        endpoint = self._endpoint(request)
+        tamano = len(response.content) if not response.streaming else int(response.get('Content-Length') or 0)
+        registro.registrar(request.method, endpoint, response.status_code, duracion, tamano, medicion)
+
+        if medicion is not None and self.server_timing:
+            response['Server-Timing'] = (
+                f'db;dur={medicion.tiempo_sql * 1000:.1f};desc="{medicion.consultas} consultas", '
+                f'render;dur={medicion.tiempo_render * 1000:.1f}, '
+                f'total;dur={duracion * 1000:.1f}'
+            )
+
+        if duracion >= self.umbral_lento:
+            logger.warning(
+                'Request lento: %s %s (%s) %.0f ms%s',
+                request.method, request.path, endpoint, duracion * 1000,
+                f', {medicion.consultas} consultas' if medicion else ''
+            )
+
+        return response
+
+    def process_template_response(self, request, response):
+        # Las Response de DRF se renderizan después de la vista: eso es la serialización a JSON
+        medicion = getattr(request, '_medicion', None)
+        if medicion is not None:
+            medicion.empezar_render()
+            response.add_post_render_callback(medicion.terminar_render)
+        return response
+
+    @staticmethod
+    def _endpoint(request):
+        # El nombre de la ruta mantiene acotada la cardinalidad de las etiquetas
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'sin_ruta'
+        return match.view_name or match.route
+
+
+class DetectorConsultasMiddleware:
+    """
+    Activo sólo con DETECTOR_CONSULTAS (por defecto, en DEBUG). Registra en el
+    log los patrones N+1 y las consultas lentas de cada request, y los acumula
+    en un reporte por endpoint que se escribe en DETECTOR_REPORTE al salir.
+    Con DETECTOR_FALLAR el request lanza ConsultasRepetidas (útil en tests).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'DETECTOR_CONSULTAS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.fallar = getattr(settings, 'DETECTOR_FALLAR', False)
+        ruta_reporte = getattr(settings, 'DETECTOR_REPORTE', '')
+        if ruta_reporte:
+            atexit.register(reporte.escribir, ruta_reporte)
+
+    def __call__(self, request):
+        detector = DetectorConsultas()
+        with detector.observar():
+            response = self.get_response(request)
+
+        endpoint = MetricasMiddleware._endpoint(request)
+        repetidas = detector.repetidas()
+        lentas = detector.lentas_explicadas()
+        reporte.agregar(endpoint, detector, lentas)
+
+        for item in repetidas:
+            logger.warning(
+                'N+1 en %s %s: %dx desde %s: %s',
+                request.method, endpoint, item['veces'], item['sitio'], item['sql'][:300]
+            )
+        for item in lentas:
+            logger.warning(
+                'Consulta lenta en %s %s (%.1f ms) desde %s: %s\n%s',
+                request.method, endpoint, item['ms'], item['sitio'], item['sql'][:300], item['explain']
+            )
+
+        if repetidas and self.fallar:
+            raise ConsultasRepetidas(f'{request.method} {endpoint}: {describir(repetidas)}')
+        return response
+
+
+class SanatorioMiddleware:
+    """
+    Activa el sanatorio cuyo dominio es el host del request durante todo el
+    request. Si el host no es de ningún sanatorio, lo activa la autenticación
+    a partir del token (ver gestion/authentication.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = activar(sanatorio_de_host(request.get_host()))
+        try:
+            return self.get_response(request)
+        finally:
+            desactivar(token)
+
+
+class ReplicaMiddleware:
+    """
+    Tras un request de escritura exitoso fija al usuario a la base principal
+    por unos segundos, para que sus lecturas siguientes vean lo que escribió.
+    Sólo se activa si hay réplicas configuradas, y entonces exige que la
+    caché de los pins sea compartida entre workers.
+    """
+
+    def __init__(self, get_response):
+        if not alias_replicas():
+            raise MiddlewareNotUsed
+        verificar_cache_pin()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            # DRF deja en request.user el usuario autenticado con JWT
+            usuario_id = getattr(getattr(request, 'user', None), 'pk', None)
+            if usuario_id is not None:
+                fijar_a_principal(usuario_id)
+        return response
+
+
+class CompresionMiddleware:
+    """
+    Comprime las respuestas de más de COMPRESION_MINIMO_BYTES con brotli (si
+    está instalado y el cliente lo acepta) o gzip. Por debajo del umbral el
+    costo de comprimir no compensa el ahorro.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.minimo = getattr(settings, 'COMPRESION_MINIMO_BYTES', 1024)
+        self.nivel_brotli = getattr(settings, 'COMPRESION_NIVEL_BROTLI', 4)
+        self.nivel_gzip = getattr(settings, 'COMPRESION_NIVEL_GZIP', 6)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or len(response.content) < self.minimo
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificacion = self.negociar(request.headers.get('Accept-Encoding', ''))
+        if codificacion == 'br':
+            comprimido = brotli.compress(response.content, quality=self.nivel_brotli)
+        elif codificacion == 'gzip':
+            comprimido = gzip.compress(response.content, compresslevel=self.nivel_gzip, mtime=0)
+        else:
+            return response
+
+        if len(comprimido) >= len(response.content):
+            return response
+        response.content = comprimido
+        response['Content-Length'] = str(len(comprimido))
+        response['Content-Encoding'] = codificacion
+        # Igual que GZipMiddleware: el ETag fuerte describía el cuerpo sin comprimir
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    @staticmethod
+    def negociar(accept_encoding):
+        """Codificación preferida por el cliente entre las disponibles (respeta q=0)."""
+        calidades = {}
+        for parte in accept_encoding.split(','):
+            nombre, _, parametros = parte.strip().partition(';')
+            calidad = 1.0
+            if parametros.strip().startswith('q='):
+                try:
+                    calidad = float(parametros.strip()[2:])
+                except ValueError:
+                    calidad = 0.0
+            calidades[nombre.strip().lower()] = calidad
+
+        disponibles = ['br', 'gzip'] if brotli is not None else ['gzip']
+        candidatas = [
+            (calidades.get(nombre, calidades.get('*', 0.0)), -orden, nombre)
+            for orden, nombre in enumerate(disponibles)
+        ]
+        calidad, _, nombre = max(candidatas)
+        return nombre if calidad > 0 else None
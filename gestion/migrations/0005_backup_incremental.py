@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0004_alter_usuario_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Borrado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=50)),
+                ('objeto_id', models.BigIntegerField()),
+                ('borrado_en', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='proyecto',
+            index=models.Index(fields=['updated_at'], name='gestion_pro_updated_0a2284_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(fields=['updated_at'], name='gestion_tar_updated_89eb05_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['updated_at'], name='gestion_usu_updated_375bd3_idx'),
+        ),
+    ]
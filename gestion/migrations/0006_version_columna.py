@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0005_backup_incremental'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionColumna',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('progreso', 'En Progreso'), ('completada', 'Completada')], max_length=20)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gestion.usuario')),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gestion.proyecto')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('proyecto', 'empleado', 'estado'), name='version_columna_unica')],
+            },
+        ),
+    ]
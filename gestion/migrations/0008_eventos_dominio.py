@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0007_trabajo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaEventos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('proyecto_id', models.BigIntegerField(unique=True)),
+                ('valor', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EventoDominio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=50)),
+                ('proyecto_id', models.BigIntegerField()),
+                ('secuencia', models.PositiveIntegerField()),
+                ('objeto_id', models.BigIntegerField()),
+                ('datos', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('despachado_en', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('despachado_en__isnull', True)), fields=['id'], name='evento_pendiente_idx')],
+                'constraints': [models.UniqueConstraint(fields=('proyecto_id', 'secuencia'), name='evento_secuencia_unica')],
+            },
+        ),
+    ]
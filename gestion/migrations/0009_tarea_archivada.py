@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0008_eventos_dominio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TareaArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('titulo', models.CharField(max_length=150)),
+                ('descripcion', models.TextField()),
+                ('fecha', models.DateField()),
+                ('horas_invertidas', models.PositiveSmallIntegerField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('progreso', 'En Progreso'), ('completada', 'Completada')], max_length=20)),
+                ('archivo', models.CharField(blank=True, max_length=255, null=True)),
+                ('orden', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tareas_archivadas', to='gestion.usuario')),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tareas_archivadas', to='gestion.proyecto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['proyecto', 'fecha'], name='archivada_proyecto_idx'), models.Index(fields=['empleado', 'fecha'], name='archivada_empleado_idx'), models.Index(fields=['updated_at'], name='gestion_tar_updated_96c920_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0009_tarea_archivada'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(fields=['proyecto', 'fecha'], name='tarea_proyecto_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(fields=['empleado', 'fecha'], name='tarea_empleado_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def registrar_altas(apps, schema_editor):
+    # Las tareas existentes entran al registro con su alta, para que su lead
+    # time se pueda medir cuando se completen
+    Tarea = apps.get_model('gestion', 'Tarea')
+    TransicionTarea = apps.get_model('gestion', 'TransicionTarea')
+    using = schema_editor.connection.alias
+    lote = []
+    filas = Tarea.objects.using(using).order_by('pk').values_list('pk', 'proyecto_id', 'empleado_id', 'created_at')
+    for tarea_id, proyecto_id, empleado_id, creada in filas.iterator(chunk_size=2000):
+        lote.append(TransicionTarea(
+            tarea_id=tarea_id, proyecto_id=proyecto_id, empleado_id=empleado_id,
+            desde=None, hacia='pendiente', momento=creada,
+        ))
+        if len(lote) >= 2000:
+            TransicionTarea.objects.using(using).bulk_create(lote)
+            lote = []
+    TransicionTarea.objects.using(using).bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0010_tarea_indices_fecha'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransicionTarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarea_id', models.BigIntegerField()),
+                ('proyecto_id', models.BigIntegerField()),
+                ('empleado_id', models.BigIntegerField()),
+                ('desde', models.CharField(blank=True, choices=[('pendiente', 'Pendiente'), ('progreso', 'En Progreso'), ('completada', 'Completada')], max_length=20, null=True)),
+                ('hacia', models.CharField(choices=[('pendiente', 'Pendiente'), ('progreso', 'En Progreso'), ('completada', 'Completada')], max_length=20)),
+                ('momento', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor_id', models.BigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tarea_id', 'momento'], name='transicion_tarea_idx'), models.Index(fields=['proyecto_id', 'hacia', 'momento'], name='transicion_proyecto_idx'), models.Index(fields=['empleado_id', 'hacia', 'momento'], name='transicion_empleado_idx'), models.Index(fields=['hacia', 'momento'], name='transicion_hacia_idx')],
+            },
+        ),
+        migrations.RunPython(registrar_altas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0011_transicion_tarea'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=255, unique=True)),
+                ('usuario_id', models.BigIntegerField(blank=True, null=True)),
+                ('expira_en', models.DateTimeField(db_index=True)),
+                ('revocado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:48
+
+import django.db.models.deletion
+import gestion.tenencia
+from django.conf import settings
+from django.db import migrations, models
+
+
+def crear_por_defecto(apps, schema_editor):
+    # Los datos existentes pasan al sanatorio por defecto
+    Sanatorio = apps.get_model('gestion', 'Sanatorio')
+    slug = settings.SANATORIO_POR_DEFECTO
+    Sanatorio.objects.using(schema_editor.connection.alias).get_or_create(slug=slug, defaults={'nombre': slug.title()})
+
+
+def asignar_por_defecto(apps, schema_editor):
+    using = schema_editor.connection.alias
+    Sanatorio = apps.get_model('gestion', 'Sanatorio')
+    sanatorio_id = Sanatorio.objects.using(using).get(slug=settings.SANATORIO_POR_DEFECTO).pk
+    for modelo in ('Usuario', 'Proyecto', 'Permiso', 'Tarea', 'TareaArchivada', 'TransicionTarea'):
+        apps.get_model('gestion', modelo).objects.using(using).filter(sanatorio_id=None).update(sanatorio_id=sanatorio_id)
+
+
+def campo(nulo, **default):
+    return models.ForeignKey(
+        db_index=False, null=nulo, on_delete=django.db.models.deletion.PROTECT,
+        related_name='+', to='gestion.sanatorio', **default,
+    )
+
+
+MODELOS = ('usuario', 'proyecto', 'permiso', 'tarea', 'tareaarchivada')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0012_token_revocado'),
+    ]
+
+    # La columna entra nula, se completa (con el modelo histórico) y recién
+    # después pasa a NOT NULL
+    operations = [
+        migrations.CreateModel(
+            name='Sanatorio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=150)),
+                ('slug', models.SlugField(unique=True)),
+                ('dominio', models.CharField(blank=True, max_length=255, null=True, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(crear_por_defecto, migrations.RunPython.noop),
+        *(migrations.AddField(model_name=modelo, name='sanatorio', field=campo(True)) for modelo in MODELOS),
+        migrations.AddField(
+            model_name='transiciontarea', name='sanatorio_id', field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(asignar_por_defecto, migrations.RunPython.noop),
+        *(migrations.AlterField(model_name=modelo, name='sanatorio', field=campo(False)) for modelo in MODELOS),
+        migrations.AlterField(model_name='transiciontarea', name='sanatorio_id', field=models.BigIntegerField()),
+        # El default del modelo sólo en el estado: el schema editor lo evalúa al
+        # agregar o alterar la columna, y sanatorio_actual_id() lee Sanatorio
+        # con el modelo actual y no con el histórico
+        migrations.SeparateDatabaseAndState(state_operations=[
+            *(
+                migrations.AlterField(
+                    model_name=modelo, name='sanatorio',
+                    field=campo(False, default=gestion.tenencia.sanatorio_actual_id),
+                )
+                for modelo in MODELOS
+            ),
+            migrations.AlterField(
+                model_name='transiciontarea', name='sanatorio_id',
+                field=models.BigIntegerField(default=gestion.tenencia.sanatorio_actual_id),
+            ),
+        ]),
+        migrations.RemoveIndex(
+            model_name='transiciontarea',
+            name='transicion_hacia_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transiciontarea',
+            index=models.Index(fields=['sanatorio_id', 'hacia', 'momento'], name='transicion_sanatorio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permiso',
+            index=models.Index(fields=['sanatorio', 'usuario'], name='permiso_sanatorio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyecto',
+            index=models.Index(fields=['sanatorio', 'created_at'], name='proyecto_sanatorio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(fields=['sanatorio', 'fecha'], name='tarea_sanatorio_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tareaarchivada',
+            index=models.Index(fields=['sanatorio', 'fecha'], name='archivada_sanatorio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['sanatorio', 'rol', 'created_at'], name='usuario_sanatorio_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+
+# Expresión de gestion.cronograma.rango_proyecto() hasta la migración 0016
+RANGO = (
+    'daterange("gestion_proyecto"."fecha_inicio", CASE WHEN "gestion_proyecto"."fecha_fin" < '
+    '"gestion_proyecto"."fecha_inicio" THEN "gestion_proyecto"."fecha_inicio" '
+    "ELSE \"gestion_proyecto\".\"fecha_fin\" END, '[]')"
+)
+
+
+def crear_indice_gist(apps, schema_editor):
+    # Sólo PostgreSQL tiene daterange/GiST; en los demás motores alcanza proyecto_vigencia_idx
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS proyecto_vigencia_gist ON gestion_proyecto USING gist (({RANGO}))')
+
+
+def borrar_indice_gist(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS proyecto_vigencia_gist')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0013_sanatorios'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='proyecto',
+            index=models.Index(fields=['sanatorio', 'fecha_fin', 'fecha_inicio'], name='proyecto_vigencia_idx'),
+        ),
+        migrations.RunPython(crear_indice_gist, borrar_indice_gist),
+    ]
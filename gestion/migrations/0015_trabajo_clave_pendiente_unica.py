@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-19 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0014_proyecto_vigencia'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='trabajo',
+            name='trabajo_clave_activa_unica',
+        ),
+        migrations.AddConstraint(
+            model_name='trabajo',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado', 'pendiente')), fields=('clave',), name='trabajo_clave_pendiente_unica'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+# Misma expresión que gestion.cronograma.rango_proyecto(): un proyecto con
+# fecha_fin anterior al inicio es el rango vacío, como en los otros motores
+RANGO = (
+    'CASE WHEN "gestion_proyecto"."fecha_fin" < "gestion_proyecto"."fecha_inicio" '
+    "THEN 'empty'::daterange "
+    'ELSE daterange("gestion_proyecto"."fecha_inicio", "gestion_proyecto"."fecha_fin", \'[]\') END'
+)
+
+# La de 0014, que lo contaba como proyecto de un día
+RANGO_ANTERIOR = (
+    'daterange("gestion_proyecto"."fecha_inicio", CASE WHEN "gestion_proyecto"."fecha_fin" < '
+    '"gestion_proyecto"."fecha_inicio" THEN "gestion_proyecto"."fecha_inicio" '
+    "ELSE \"gestion_proyecto\".\"fecha_fin\" END, '[]')"
+)
+
+
+def recrear_indice(rango):
+    def operacion(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute('DROP INDEX IF EXISTS proyecto_vigencia_gist')
+            schema_editor.execute(f'CREATE INDEX proyecto_vigencia_gist ON gestion_proyecto USING gist (({rango}))')
+    return operacion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0015_trabajo_clave_pendiente_unica'),
+    ]
+
+    operations = [
+        migrations.RunPython(recrear_indice(RANGO), recrear_indice(RANGO_ANTERIOR)),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0016_proyecto_vigencia_vacia'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='eventodominio',
+            name='secuencia',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
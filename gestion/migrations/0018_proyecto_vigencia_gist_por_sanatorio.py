@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+# Misma expresión que gestion.cronograma.rango_proyecto() (y que 0016)
+RANGO = (
+    'CASE WHEN "gestion_proyecto"."fecha_fin" < "gestion_proyecto"."fecha_inicio" '
+    "THEN 'empty'::daterange "
+    'ELSE daterange("gestion_proyecto"."fecha_inicio", "gestion_proyecto"."fecha_fin", \'[]\') END'
+)
+
+
+def indice_por_sanatorio(apps, schema_editor):
+    # Con un sanatorio activo toda consulta filtra por sanatorio_id: sin él en
+    # el índice, el GiST devuelve los proyectos vigentes de todos los
+    # sanatorios. btree_gist da las clases de operadores GiST para el entero
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        schema_editor.execute('DROP INDEX IF EXISTS proyecto_vigencia_gist')
+        schema_editor.execute(
+            f'CREATE INDEX proyecto_vigencia_gist ON gestion_proyecto USING gist (sanatorio_id, ({RANGO}))'
+        )
+
+
+def indice_solo_rango(apps, schema_editor):
+    # La extensión se deja: puede haber otros objetos que dependan de ella
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS proyecto_vigencia_gist')
+        schema_editor.execute(f'CREATE INDEX proyecto_vigencia_gist ON gestion_proyecto USING gist (({RANGO}))')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0017_evento_secuencia_al_despachar'),
+    ]
+
+    operations = [
+        migrations.RunPython(indice_por_sanatorio, indice_solo_rango),
+    ]
@@ -1,10 +1,32 @@
 from django.db import models
+from django.utils import timezone
 
 from django.contrib.auth.hashers import make_password
 
+from .tenencia import ManagerSanatorio, sanatorio_actual_id
+
 
 # Create your models here. aqui los modelos
 
+class Sanatorio(models.Model):
+    """Cliente del despliegue; los datos de gestion se separan por sanatorio (ver gestion/tenencia.py)."""
+    nombre = models.CharField(max_length=150)
+    slug = models.SlugField(unique=True)
+    dominio = models.CharField(max_length=255, unique=True, null=True, blank=True)  # Host que lo identifica
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.nombre
+
+
+def campo_sanatorio():
+    # Sin índice propio: los índices compuestos de cada modelo empiezan por esta columna
+    return models.ForeignKey(
+        Sanatorio, on_delete=models.PROTECT, related_name='+', default=sanatorio_actual_id, db_index=False
+    )
+
+
 class Usuario(models.Model):
     ROLES = [
         ('administrador', 'Administrador'),
@@ -16,6 +38,7 @@ class Usuario(models.Model):
     email = models.EmailField(unique=True)
     password = models.CharField(max_length=255)
     rol = models.CharField(max_length=20, choices=ROLES)
+    sanatorio = campo_sanatorio()
 
     encargado = models.ForeignKey(
         'self',  # Relación con el mismo modelo
@@ -29,12 +52,18 @@ class Usuario(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ManagerSanatorio()
+
     # Campos requeridos para JWT
     USERNAME_FIELD = 'email'
     is_active = True
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['updated_at']),  # Para los backups incrementales
+            models.Index(fields=['sanatorio', 'rol', 'created_at'], name='usuario_sanatorio_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
@@ -83,9 +112,20 @@ class Proyecto(models.Model):
     estado = models.CharField(max_length=20, choices=ESTADOS)
     encargado = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='proyectos')
     empleados = models.ManyToManyField(Usuario, related_name='proyectos_asignados', limit_choices_to={'rol': 'empleado'})  # Relación directa con empleados
+    sanatorio = campo_sanatorio()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ManagerSanatorio()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['sanatorio', 'created_at'], name='proyecto_sanatorio_idx'),
+            # Proyectos vigentes en una ventana (ver gestion/cronograma.py)
+            models.Index(fields=['sanatorio', 'fecha_fin', 'fecha_inicio'], name='proyecto_vigencia_idx'),
+        ]
+
     def __str__(self):
         return self.nombre
 
@@ -95,6 +135,14 @@ class Permiso(models.Model):
     puede_ver = models.BooleanField(default=False)
     puede_editar = models.BooleanField(default=False)
     puede_eliminar = models.BooleanField(default=False)
+    sanatorio = campo_sanatorio()
+
+    objects = ManagerSanatorio()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sanatorio', 'usuario'], name='permiso_sanatorio_idx'),
+        ]
 
 class Tarea(models.Model):
     ESTADOS = [
@@ -112,11 +160,210 @@ class Tarea(models.Model):
     estado = models.CharField(max_length=20, choices=ESTADOS)
     archivo = models.CharField(max_length=255, null=True, blank=True)
     orden = models.PositiveSmallIntegerField(default=0)
+    sanatorio = campo_sanatorio()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ManagerSanatorio()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at']),
+            # Listados acotados por fecha (y poda de particiones, ver gestion/particiones.py)
+            models.Index(fields=['proyecto', 'fecha'], name='tarea_proyecto_fecha_idx'),
+            models.Index(fields=['empleado', 'fecha'], name='tarea_empleado_fecha_idx'),
+            models.Index(fields=['sanatorio', 'fecha'], name='tarea_sanatorio_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return self.titulo
+
+
+class TareaArchivada(models.Model):
+    """
+    Tareas completadas que `manage.py archivar_tareas` sacó de Tarea (ver
+    gestion/archivo.py). Mismas columnas y mismo id que tenían en Tarea;
+    `updated_at` pasa a ser el momento en que se archivó.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    titulo = models.CharField(max_length=150)
+    descripcion = models.TextField()
+    proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name='tareas_archivadas')
+    fecha = models.DateField()
+    horas_invertidas = models.PositiveSmallIntegerField()
+    empleado = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='tareas_archivadas')
+    estado = models.CharField(max_length=20, choices=Tarea.ESTADOS)
+    archivo = models.CharField(max_length=255, null=True, blank=True)
+    orden = models.PositiveSmallIntegerField(default=0)
+    sanatorio = campo_sanatorio()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ManagerSanatorio()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['proyecto', 'fecha'], name='archivada_proyecto_idx'),
+            models.Index(fields=['empleado', 'fecha'], name='archivada_empleado_idx'),
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['sanatorio', 'fecha'], name='archivada_sanatorio_idx'),
+        ]
+
     def __str__(self):
         return self.titulo
+
+
+class VersionColumna(models.Model):
+    """
+    Versión de una columna del kanban (proyecto, empleado, estado). Cada
+    movimiento la incrementa; con la concurrencia optimista el cliente envía
+    la versión que conoce y si cambió recibe un 409.
+    """
+    proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name='+')
+    empleado = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+')
+    estado = models.CharField(max_length=20, choices=Tarea.ESTADOS)
+    version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['proyecto', 'empleado', 'estado'], name='version_columna_unica'),
+        ]
+
+    def __str__(self):
+        return f'{self.proyecto_id}/{self.empleado_id}/{self.estado} v{self.version}'
+
+
+class TransicionTarea(models.Model):
+    """
+    Registro de sólo inserción de los cambios de estado de las tareas (y de
+    su alta, con `desde` nulo), para medir lead time, cycle time y
+    throughput (ver gestion/analitica.py). Sin FK a Tarea: el registro
+    sobrevive al archivo de la tarea; proyecto, empleado y sanatorio van
+    repetidos para filtrar y agrupar sin join.
+    """
+    tarea_id = models.BigIntegerField()
+    proyecto_id = models.BigIntegerField()
+    empleado_id = models.BigIntegerField()
+    desde = models.CharField(max_length=20, choices=Tarea.ESTADOS, null=True, blank=True)
+    hacia = models.CharField(max_length=20, choices=Tarea.ESTADOS)
+    momento = models.DateTimeField(default=timezone.now)
+    actor_id = models.BigIntegerField(null=True, blank=True)
+    sanatorio_id = models.BigIntegerField(default=sanatorio_actual_id)
+
+    objects = ManagerSanatorio()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tarea_id', 'momento'], name='transicion_tarea_idx'),
+            models.Index(fields=['proyecto_id', 'hacia', 'momento'], name='transicion_proyecto_idx'),
+            models.Index(fields=['empleado_id', 'hacia', 'momento'], name='transicion_empleado_idx'),
+            models.Index(fields=['sanatorio_id', 'hacia', 'momento'], name='transicion_sanatorio_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tarea_id}: {self.desde} -> {self.hacia}'
+
+
+class TokenRevocado(models.Model):
+    """
+    Refresh token revocado (rotado), por jti. Se guarda hasta que el token
+    vence; después lo borra la purga (ver gestion/revocacion.py).
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    usuario_id = models.BigIntegerField(null=True, blank=True)
+    expira_en = models.DateTimeField(db_index=True)
+    revocado_en = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class Trabajo(models.Model):
+    """Trabajo diferido de la cola en base de datos (ver gestion/trabajos.py)."""
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('en_curso', 'En curso'),
+        ('completado', 'Completado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    nombre = models.CharField(max_length=100)
+    argumentos = models.JSONField(default=dict, blank=True)
+    prioridad = models.SmallIntegerField(default=0)  # Mayor prioridad se ejecuta antes
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    clave = models.CharField(max_length=200, null=True, blank=True)  # Idempotencia
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=5)
+    disponible_en = models.DateTimeField(default=timezone.now)
+    reservado_por = models.CharField(max_length=64, null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', '-prioridad', 'disponible_en'], name='trabajo_cola_idx'),
+        ]
+        constraints = [
+            # Un solo trabajo pendiente por clave. El que está en curso no cuenta:
+            # puede haber leído los datos antes del cambio que encola el siguiente
+            models.UniqueConstraint(
+                fields=['clave'],
+                condition=models.Q(estado='pendiente'),
+                name='trabajo_clave_pendiente_unica',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.nombre} ({self.estado})'
+
+
+class EventoDominio(models.Model):
+    """
+    Outbox de eventos de dominio de tareas y proyectos. Se escribe en la
+    misma transacción que el cambio y lo despacha `manage.py despachar_eventos`.
+    """
+    tipo = models.CharField(max_length=50)
+    proyecto_id = models.BigIntegerField()
+    secuencia = models.PositiveIntegerField(null=True, blank=True)  # Orden dentro del proyecto; la asigna el despacho
+    objeto_id = models.BigIntegerField()
+    datos = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    despachado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['proyecto_id', 'secuencia'], name='evento_secuencia_unica'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(despachado_en__isnull=True),
+                name='evento_pendiente_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.tipo} #{self.secuencia} (proyecto {self.proyecto_id})'
+
+
+class SecuenciaEventos(models.Model):
+    """Último número de secuencia de eventos usado por cada proyecto."""
+    proyecto_id = models.BigIntegerField(unique=True)
+    valor = models.PositiveIntegerField(default=0)
+
+
+class Borrado(models.Model):
+    """
+    Lápida de un registro eliminado, para que los backups incrementales
+    puedan propagar los borrados.
+    """
+    modelo = models.CharField(max_length=50)
+    objeto_id = models.BigIntegerField()
+    borrado_en = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f'{self.modelo} {self.objeto_id}'
     
 
     
@@ -0,0 +1,29 @@
+"""
+Parsers de los formatos binarios (MessagePack y CBOR), pareja de los
+renderers de gestion/renderers.py. Sólo se habilitan en settings si la
+librería correspondiente está instalada.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .renderers import cbor2, msgpack
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except (ValueError, msgpack.UnpackException) as e:
+            raise ParseError(f'MessagePack inválido: {e}')
+
+
+class CBORParser(BaseParser):
+    media_type = 'application/cbor'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return cbor2.loads(stream.read())
+        except (ValueError, cbor2.CBORDecodeError) as e:
+            raise ParseError(f'CBOR inválido: {e}')
@@ -0,0 +1,283 @@
+"""
+Particionado declarativo de Tarea por rango de `fecha` (sólo PostgreSQL).
+
+`manage.py particionar_tareas --convertir` reemplaza la tabla de tareas por
+una tabla particionada (PARTITION BY RANGE (fecha)) con una partición por
+mes o por año según TAREAS_PARTICION_GRANULARIDAD, más una partición DEFAULT
+para fechas fuera de los rangos creados. La conversión copia las filas en
+una transacción con la tabla bloqueada, así que es una tarea de
+mantenimiento. Luego, periódicamente, el mismo comando crea las particiones
+futuras (TAREAS_PARTICIONES_FUTURAS) y puede desprender las viejas.
+
+PostgreSQL exige que la clave primaria (y todo índice único) incluya la
+columna de partición, así que en la tabla particionada es (id, fecha) y
+ningún índice garantiza por sí solo que `id` sea único. Lo garantizan:
+
+- la secuencia: el DEFAULT de `id` es nextval() de una secuencia propia que
+  arranca después del máximo id copiado, así que las altas normales nunca
+  repiten;
+- el trigger `ID_UNICO` (BEFORE INSERT): rechaza con unique_violation (un
+  IntegrityError para Django) toda fila cuyo id ya exista, en cualquier
+  partición. Cubre las altas con id explícito (importar_datos, restaurar un
+  backup) y no se dispara al cambiar la fecha de una tarea de mes, que mueve
+  la fila de partición. Dos altas concurrentes con el mismo id explícito no
+  se excluyen entre sí: esas herramientas son de mantenimiento y corren solas;
+- restaurar_snapshot, que con la tabla particionada no puede hacer upsert por
+  `id` (ON CONFLICT necesita un índice único), borra las tareas del lote y
+  las vuelve a insertar.
+
+Para Django `id` sigue siendo la clave primaria, y ninguna tabla tiene FK a
+Tarea, por eso el cambio no afecta al resto del esquema.
+
+Para que el planificador descarte particiones (partition pruning) la
+consulta tiene que filtrar por `fecha`: los listados de tareas aceptan
+`?desde=` y `?hasta=` (ver filtro_fechas). En SQLite y en cualquier otro
+motor todo esto es un no-op y esas consultas usan los índices por fecha.
+"""
+import datetime
+import re
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+
+from .models import Tarea
+
+
+TABLA = Tarea._meta.db_table
+GRANULARIDADES = ('mensual', 'anual')
+ID_UNICO = f'{TABLA}_id_unico'
+
+
+def disponible(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+def esta_particionada(using='default'):
+    if not disponible(using):
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+            [TABLA],
+        )
+        return cursor.fetchone()[0]
+
+
+# ----------------------------------------------------------------------
+# Rangos
+# ----------------------------------------------------------------------
+def inicio_periodo(fecha, granularidad):
+    if granularidad == 'anual':
+        return fecha.replace(month=1, day=1)
+    return fecha.replace(day=1)
+
+
+def siguiente_periodo(inicio, granularidad):
+    if granularidad == 'anual':
+        return inicio.replace(year=inicio.year + 1)
+    if inicio.month == 12:
+        return inicio.replace(year=inicio.year + 1, month=1)
+    return inicio.replace(month=inicio.month + 1)
+
+
+def periodos(desde, hasta, granularidad):
+    """Inicios de los periodos que cubren [desde, hasta]."""
+    actual = inicio_periodo(desde, granularidad)
+    while actual <= hasta:
+        yield actual
+        actual = siguiente_periodo(actual, granularidad)
+
+
+def nombre_particion(inicio, granularidad):
+    formato = '%Y' if granularidad == 'anual' else '%Y_%m'
+    return f'{TABLA}_p{inicio.strftime(formato)}'
+
+
+def particiones(using='default'):
+    """[(nombre, desde, hasta)] de las particiones por rango, ordenadas."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT hija.relname, pg_get_expr(hija.relpartbound, hija.oid)
+            FROM pg_inherits
+            JOIN pg_class hija ON hija.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            """,
+            [TABLA],
+        )
+        filas = cursor.fetchall()
+    resultado = []
+    for nombre, limites in filas:
+        fechas = re.findall(r"'(\d{4}-\d{2}-\d{2})'", limites)
+        if len(fechas) == 2:
+            resultado.append((nombre, *(datetime.date.fromisoformat(f) for f in fechas)))
+    return sorted(resultado, key=lambda particion: particion[1])
+
+
+# ----------------------------------------------------------------------
+# Mantenimiento
+# ----------------------------------------------------------------------
+def convertir(granularidad, futuras=None, using='default'):
+    """Convierte la tabla de tareas en particionada; devuelve las particiones creadas."""
+    if futuras is None:
+        futuras = settings.TAREAS_PARTICIONES_FUTURAS
+    anterior = f'{TABLA}_anterior'
+    conexion = connections[using]
+    with transaction.atomic(using=using), conexion.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLA}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE "{TABLA}" RENAME TO "{anterior}"')
+
+        # Índices (menos la PK) y FKs se recrean después de copiar las filas
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN "
+            "(SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p')",
+            [anterior, anterior],
+        )
+        indices = [fila[0] for fila in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [anterior],
+        )
+        claves_foraneas = cursor.fetchall()
+
+        cursor.execute(
+            f'CREATE TABLE "{TABLA}" (LIKE "{anterior}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (fecha)'
+        )
+        cursor.execute(f'SELECT MIN(fecha), MAX(fecha) FROM "{anterior}"')
+        minima, maxima = cursor.fetchone()
+        hoy = datetime.date.today()
+        creadas = _crear_rangos(cursor, minima or hoy, max(maxima or hoy, hoy), granularidad, futuras)
+        cursor.execute(f'CREATE TABLE "{TABLA}_default" PARTITION OF "{TABLA}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{TABLA}" SELECT * FROM "{anterior}"')
+        cursor.execute(f'DROP TABLE "{anterior}"')
+
+        # La identidad de la tabla anterior se fue con ella: secuencia propia desde max(id)
+        cursor.execute(f'CREATE SEQUENCE "{TABLA}_id_seq" OWNED BY "{TABLA}".id')
+        cursor.execute(
+            f"""SELECT setval('"{TABLA}_id_seq"', COALESCE(MAX(id), 0) + 1, false) FROM "{TABLA}" """
+        )
+        cursor.execute(f"""ALTER TABLE "{TABLA}" ALTER COLUMN id SET DEFAULT nextval('"{TABLA}_id_seq"')""")
+        cursor.execute(f'ALTER TABLE "{TABLA}" ADD CONSTRAINT "{TABLA}_pkey" PRIMARY KEY (id, fecha)')
+        # La PK ya no asegura que id sea único (ver el docstring del módulo); el
+        # EXISTS usa la PK (id, fecha) de cada partición
+        cursor.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION "{ID_UNICO}"() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM "{TABLA}" WHERE id = NEW.id) THEN
+                    RAISE unique_violation USING MESSAGE = format('Ya existe una tarea con id %s', NEW.id);
+                END IF;
+                RETURN NEW;
+            END $$
+            """
+        )
+        cursor.execute(
+            f'CREATE TRIGGER "{ID_UNICO}" BEFORE INSERT ON "{TABLA}" FOR EACH ROW EXECUTE FUNCTION "{ID_UNICO}"()'
+        )
+
+        patron = re.compile(rf' ON (\S+\.)?"?{re.escape(anterior)}"? ')
+        for definicion in indices:
+            cursor.execute(patron.sub(f' ON "{TABLA}" ', definicion, count=1))
+        for nombre, definicion in claves_foraneas:
+            cursor.execute(f'ALTER TABLE "{TABLA}" ADD CONSTRAINT "{nombre}" {definicion}')
+    return creadas
+
+
+def crear_particiones(hasta, granularidad, using='default'):
+    """Crea las particiones que falten desde la última existente hasta `hasta`."""
+    existentes = particiones(using)
+    desde = existentes[-1][2] if existentes else datetime.date.today()
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        return _crear_rangos(cursor, desde, hasta, granularidad, 0)
+
+
+def _crear_rangos(cursor, desde, hasta, granularidad, futuras):
+    inicios = list(periodos(desde, hasta, granularidad))
+    for _ in range(futuras):
+        inicios.append(siguiente_periodo(inicios[-1], granularidad))
+
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [f'{TABLA}_default'])
+    hay_default = cursor.fetchone()[0]
+    creadas = []
+    for inicio in inicios:
+        fin = siguiente_periodo(inicio, granularidad)
+        nombre = nombre_particion(inicio, granularidad)
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [nombre])
+        if cursor.fetchone()[0]:
+            continue
+        if hay_default:
+            _crear_desde_default(cursor, nombre, inicio, fin)
+        else:
+            cursor.execute(
+                f'CREATE TABLE "{nombre}" PARTITION OF "{TABLA}" FOR VALUES FROM (%s) TO (%s)',
+                [inicio, fin],
+            )
+        creadas.append(nombre)
+    return creadas
+
+
+def _crear_desde_default(cursor, nombre, inicio, fin):
+    """
+    Una partición nueva no puede solaparse con filas de la DEFAULT: si las
+    hay, se desprende la DEFAULT, se crea la partición, se mueven las filas y
+    se vuelve a adjuntar.
+    """
+    default = f'{TABLA}_default'
+    cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE fecha >= %s AND fecha < %s)', [inicio, fin])
+    if not cursor.fetchone()[0]:
+        cursor.execute(
+            f'CREATE TABLE "{nombre}" PARTITION OF "{TABLA}" FOR VALUES FROM (%s) TO (%s)', [inicio, fin]
+        )
+        return
+    cursor.execute(f'ALTER TABLE "{TABLA}" DETACH PARTITION "{default}"')
+    cursor.execute(f'CREATE TABLE "{nombre}" PARTITION OF "{TABLA}" FOR VALUES FROM (%s) TO (%s)', [inicio, fin])
+    cursor.execute(f'INSERT INTO "{TABLA}" SELECT * FROM "{default}" WHERE fecha >= %s AND fecha < %s', [inicio, fin])
+    cursor.execute(f'DELETE FROM "{default}" WHERE fecha >= %s AND fecha < %s', [inicio, fin])
+    cursor.execute(f'ALTER TABLE "{TABLA}" ATTACH PARTITION "{default}" DEFAULT')
+
+
+def desprender_anteriores(fecha, eliminar=False, using='default'):
+    """
+    Desprende las particiones que terminan antes de `fecha`. Quedan como
+    tablas sueltas (para volcarlas o consultarlas aparte) salvo con `eliminar`.
+    """
+    viejas = [nombre for nombre, _, hasta in particiones(using) if hasta <= fecha]
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        for nombre in viejas:
+            cursor.execute(f'ALTER TABLE "{TABLA}" DETACH PARTITION "{nombre}"')
+            if eliminar:
+                cursor.execute(f'DROP TABLE "{nombre}"')
+    return viejas
+
+
+# ----------------------------------------------------------------------
+# Consultas
+# ----------------------------------------------------------------------
+def filtro_fechas(request):
+    """
+    Filtros de `fecha` a partir de `?desde=AAAA-MM-DD` y `?hasta=AAAA-MM-DD`
+    (ambos inclusive). Con la tabla particionada limitan las particiones que
+    se leen; en cualquier motor usan los índices (proyecto|empleado, fecha).
+    """
+    filtros = {}
+    errores = {}
+    for parametro, lookup in (('desde', 'fecha__gte'), ('hasta', 'fecha__lte')):
+        valor = request.query_params.get(parametro)
+        if not valor:
+            continue
+        try:
+            fecha = parse_date(valor)
+        except ValueError:
+            fecha = None
+        if fecha is None:
+            errores[parametro] = 'Fecha inválida, use AAAA-MM-DD'
+        else:
+            filtros[lookup] = fecha
+    if errores:
+        raise serializers.ValidationError(errores)
+    return filtros
@@ -0,0 +1,150 @@
+"""
+Renderers y forma de las respuestas de la API.
+
+- JSONRapidoRenderer: JSON compacto con orjson si está instalado (mismo
+  resultado que el JSONRenderer de DRF, varias veces más rápido en listados
+  grandes); sin orjson, o si el cliente pide indentación, usa el de DRF.
+- MessagePackRenderer / CBORRenderer: formatos binarios para los clientes
+  móviles (Accept: application/msgpack o application/cbor). Sólo se
+  habilitan en settings si la librería correspondiente está instalada.
+- RespuestaNormalizableMixin: con `?formato=normalizado` los proyectos y
+  usuarios anidados que se repiten en cada fila se emiten una sola vez en
+  `incluidos` y en las filas quedan sólo sus ids.
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # dependencia opcional
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # dependencia opcional
+    cbor2 = None
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Fechas, Decimal, textos lazy y QuerySets los resuelve el encoder de DRF, con su mismo formato
+        return orjson.dumps(
+            data,
+            default=self._encoder.default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Los tipos sin equivalente (fechas, Decimal...) quedan igual que en JSON
+        return msgpack.packb(data, default=self._encoder.default, use_bin_type=True)
+
+
+class CBORRenderer(BaseRenderer):
+    """Las fechas sin serializar (p. ej. en /me/) van con el tag estándar de CBOR, no como texto."""
+    media_type = 'application/cbor'
+    format = 'cbor'
+    charset = None
+    render_style = 'binary'
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return cbor2.dumps(data, default=self._por_defecto)
+
+    def _por_defecto(self, encoder, valor):
+        encoder.encode(self._encoder.default(valor))
+
+
+# Campo anidado (objeto o lista de objetos) -> tabla de `incluidos`
+RELACIONES_NORMALIZADAS = {
+    'proyecto': 'proyectos',
+    'proyecto_info': 'proyectos',
+    'empleado': 'usuarios',
+    'empleado_info': 'usuarios',
+    'encargado': 'usuarios',
+    'empleados': 'usuarios',
+}
+
+
+def normalizar(datos, relaciones=RELACIONES_NORMALIZADAS):
+    """
+    Reemplaza en las filas de los listados cada objeto anidado de `relaciones`
+    por su id (y cada lista de objetos por la lista de ids) y lo agrega una vez
+    a `incluidos[tabla][id]`. Los objetos de cabecera (fuera de las listas) se
+    dejan como están.
+    """
+    incluidos = {}
+    pendientes = []
+
+    def incluir(tabla, valor):
+        tabla_actual = incluidos.setdefault(tabla, {})
+        existente = tabla_actual.get(valor['id'])
+        if existente is None:
+            tabla_actual[valor['id']] = valor
+            pendientes.append(valor)
+        else:
+            # Distintos serializers exponen distintos campos del mismo objeto
+            existente.update(valor)
+        return valor['id']
+
+    def extraer(fila):
+        for campo, tabla in relaciones.items():
+            valor = fila.get(campo)
+            if isinstance(valor, dict) and 'id' in valor:
+                fila[campo] = incluir(tabla, valor)
+            elif isinstance(valor, list) and valor and all(
+                isinstance(item, dict) and 'id' in item for item in valor
+            ):
+                fila[campo] = [incluir(tabla, item) for item in valor]
+
+    def recorrer(valor, en_lista):
+        if isinstance(valor, list):
+            for item in valor:
+                recorrer(item, True)
+        elif isinstance(valor, dict):
+            if en_lista:
+                extraer(valor)
+            for item in valor.values():
+                if isinstance(item, list):
+                    recorrer(item, True)
+
+    recorrer(datos, False)
+    # Los objetos incluidos también pueden tener anidados (el encargado del proyecto)
+    while pendientes:
+        extraer(pendientes.pop())
+
+    if isinstance(datos, list):
+        return {'resultados': datos, 'incluidos': incluidos}
+    return {**datos, 'incluidos': incluidos}
+
+
+class RespuestaNormalizableMixin:
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method == 'GET'
+            and response.status_code == 200
+            and request.query_params.get('formato') == 'normalizado'
+            and isinstance(response.data, (list, dict))
+        ):
+            response.data = normalizar(response.data)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,67 @@
+"""
+Agregados para los reportes y las vistas de equipo.
+
+Se calculan en la base con agregación condicional (COUNT/SUM ... FILTER, o
+CASE en los motores sin FILTER) en lugar de traer las tareas a Python.
+"""
+from django.db.models import Count, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Proyecto, Tarea, TareaArchivada
+
+
+def _por_empleado(modelo, agregado):
+    return (
+        modelo.objects.filter(empleado_id=OuterRef('pk'))
+        .order_by()
+        .values('empleado_id')
+        .annotate(total=agregado)
+        .values('total')
+    )
+
+
+def _subconsulta(consulta):
+    return Coalesce(Subquery(consulta, output_field=IntegerField()), Value(0))
+
+
+def anotar_carga(usuarios):
+    """
+    Anota a cada usuario la cantidad de tareas por estado (`tareas_<estado>`),
+    el total de horas, la cantidad de proyectos asignados y la fecha de su
+    última actividad en una tarea. Es una sola consulta: los proyectos y las
+    tareas archivadas van en subconsultas para no multiplicar las filas del
+    join con las tareas.
+
+    Las completadas y las horas suman las de TareaArchivada, así la carga no
+    baja cuando `archivar_tareas` mueve tareas viejas. `ultima_actividad` sólo
+    mira Tarea: en TareaArchivada `updated_at` es el momento del archivo.
+    """
+    proyectos = (
+        Proyecto.empleados.through.objects.filter(usuario_id=OuterRef('pk'))
+        .order_by()
+        .values('usuario_id')
+        .annotate(total=Count('proyecto_id'))
+        .values('total')
+    )
+    por_estado = {
+        f'tareas_{estado}': Count('tareas', filter=Q(tareas__estado=estado))
+        for estado, _ in Tarea.ESTADOS
+    }
+    # Sólo se archivan tareas completadas (ver archivo.candidatas)
+    por_estado['tareas_completada'] += _subconsulta(_por_empleado(TareaArchivada, Count('id')))
+    horas_archivadas = _subconsulta(_por_empleado(TareaArchivada, Sum('horas_invertidas')))
+    return usuarios.annotate(
+        **por_estado,
+        horas_totales=Coalesce(Sum('tareas__horas_invertidas'), Value(0)) + horas_archivadas,
+        cantidad_proyectos=_subconsulta(proyectos),
+        ultima_actividad=Max('tareas__updated_at'),
+    )
+
+
+def carga_de(usuario):
+    """Los valores anotados por anotar_carga, con la forma de la respuesta."""
+    carga = {estado: getattr(usuario, f'tareas_{estado}') for estado, _ in Tarea.ESTADOS}
+    carga['horas_invertidas'] = usuario.horas_totales
+    carga['proyectos_asignados'] = usuario.cantidad_proyectos
+    carga['ultima_actividad'] = usuario.ultima_actividad
+    return carga
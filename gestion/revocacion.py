@@ -0,0 +1,216 @@
+"""
+Lista de refresh tokens revocados.
+
+Con ROTATE_REFRESH_TOKENS cada refresh devuelve un token nuevo y el anterior
+queda revocado (BLACKLIST_AFTER_ROTATION). En lugar de la app
+token_blacklist de simplejwt, que guarda además cada token emitido, sólo se
+guardan los revocados en TokenRevocado (jti único, con su vencimiento).
+
+La consulta "¿está revocado?" se responde casi siempre sin ir a la base: cada
+proceso mantiene un filtro de Bloom con los jti revocados vigentes, que se
+completa de a poco con los ids nuevos de la tabla (a lo sumo cada
+REVOCACION_SINCRONIZAR_SEGUNDOS), y un LRU con los revocados ya confirmados.
+Si el filtro dice que no, no está; si dice que tal vez, se confirma en la
+base. La carrera entre procesos (dos refresh con el mismo token antes de la
+próxima sincronización) la resuelve el índice único de jti: la revocación es
+un INSERT y el segundo falla.
+
+Los revocados vencidos no sirven más (el token ya no pasaría la validación de
+`exp`), así que `purgar_vencidos` los borra en lotes. La purga la encola el
+propio refresh cada REVOCACION_PURGA_HORAS (con clave, una sola en la cola) y
+también se puede correr con `manage.py purgar_tokens`.
+"""
+import datetime
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenRevocado
+from .trabajos import encolar
+
+
+class FiltroBloom:
+    """Conjunto probabilístico: sin falsos negativos, falsos positivos con tasa `error`."""
+
+    def __init__(self, capacidad, error=0.01):
+        self.bits = max(8, int(-capacidad * math.log(error) / math.log(2) ** 2))
+        self.funciones = max(1, round(self.bits / capacidad * math.log(2)))
+        self.arreglo = bytearray((self.bits + 7) // 8)
+
+    def _posiciones(self, valor):
+        # Doble hashing (Kirsch-Mitzenmacher) sobre un único blake2b
+        digest = hashlib.blake2b(valor.encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'little')
+        b = int.from_bytes(digest[8:], 'little') | 1
+        return ((a + i * b) % self.bits for i in range(self.funciones))
+
+    def agregar(self, valor):
+        for posicion in self._posiciones(valor):
+            self.arreglo[posicion >> 3] |= 1 << (posicion & 7)
+
+    def __contains__(self, valor):
+        return all(self.arreglo[posicion >> 3] & (1 << (posicion & 7)) for posicion in self._posiciones(valor))
+
+
+class FrenteRevocados:
+    """Filtro de Bloom y LRU en memoria delante de TokenRevocado (uno por proceso)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.capacidad = settings.REVOCACION_BLOOM_CAPACIDAD
+            self.filtro = FiltroBloom(self.capacidad)
+            self.cargados = 0
+            self.ultimo_id = 0
+            self.sincronizado = None
+            self.confirmados = OrderedDict()
+            self.aciertos = self.consultas = 0
+
+    def _agregar(self, jti):
+        self.filtro.agregar(jti)
+        self.cargados += 1
+
+    def sincronizar(self, forzar=False):
+        """Agrega al filtro los revocados nuevos de la tabla (de todos los procesos)."""
+        ahora = time.monotonic()
+        if not forzar and self.sincronizado is not None and ahora - self.sincronizado < settings.REVOCACION_SINCRONIZAR_SEGUNDOS:
+            return
+        # Cursor por id, sin filtrar por vencimiento. Un id que se confirma
+        # fuera de orden puede quedar afuera del filtro; para la rotación no
+        # importa, la cubre el índice único
+        nuevos = list(
+            TokenRevocado.objects.filter(id__gt=self.ultimo_id).order_by('id').values_list('id', 'jti')
+        )
+        with self._lock:
+            for pk, jti in nuevos:
+                self._agregar(jti)
+                self.ultimo_id = max(self.ultimo_id, pk)
+            self.sincronizado = ahora
+            lleno = self.cargados > self.capacidad
+        if lleno:
+            # Pasada la capacidad crece la tasa de falsos positivos: se rearma
+            # con los vigentes (los vencidos ya purgados no vuelven a entrar)
+            self._rearmar()
+
+    def _rearmar(self):
+        vigentes = list(
+            TokenRevocado.objects.filter(expira_en__gt=timezone.now()).order_by('id').values_list('id', 'jti')
+        )
+        with self._lock:
+            self.capacidad = max(settings.REVOCACION_BLOOM_CAPACIDAD, 2 * len(vigentes))
+            self.filtro = FiltroBloom(self.capacidad)
+            self.cargados = 0
+            for pk, jti in vigentes:
+                self._agregar(jti)
+            self.ultimo_id = max([self.ultimo_id, *(pk for pk, _ in vigentes)])
+
+    def confirmar(self, jti):
+        with self._lock:
+            self._agregar(jti)
+            self.confirmados[jti] = True
+            self.confirmados.move_to_end(jti)
+            while len(self.confirmados) > settings.REVOCACION_LRU_TAMANO:
+                self.confirmados.popitem(last=False)
+
+    def esta_revocado(self, jti):
+        self.sincronizar()
+        with self._lock:
+            self.consultas += 1
+            if jti not in self.filtro:
+                self.aciertos += 1
+                return False
+            if jti in self.confirmados:
+                self.confirmados.move_to_end(jti)
+                self.aciertos += 1
+                return True
+        # Tal vez: lo decide la base
+        if TokenRevocado.objects.filter(jti=jti).exists():
+            self.confirmar(jti)
+            return True
+        return False
+
+
+frente = FrenteRevocados()
+_ultima_purga = None
+
+
+def esta_revocado(jti):
+    return frente.esta_revocado(jti)
+
+
+def revocar(token):
+    """
+    Revoca el refresh `token`. Devuelve False si ya estaba revocado (otro
+    request lo rotó primero), en cuyo caso no se debe emitir uno nuevo.
+    """
+    try:
+        # Savepoint propio: un duplicado no debe romper la transacción del request
+        with transaction.atomic():
+            TokenRevocado.objects.create(
+                jti=token[api_settings.JTI_CLAIM],
+                usuario_id=token.get(api_settings.USER_ID_CLAIM),
+                expira_en=datetime.datetime.fromtimestamp(token['exp'], tz=datetime.timezone.utc),
+            )
+    except IntegrityError:
+        frente.confirmar(token[api_settings.JTI_CLAIM])
+        return False
+    frente.confirmar(token[api_settings.JTI_CLAIM])
+    _encolar_purga()
+    return True
+
+
+def _encolar_purga():
+    global _ultima_purga
+    ahora = time.monotonic()
+    if _ultima_purga is not None and ahora - _ultima_purga < settings.REVOCACION_PURGA_HORAS * 3600:
+        return
+    _ultima_purga = ahora
+    encolar(
+        'purgar_tokens_revocados',
+        clave='purgar_tokens_revocados',
+        prioridad=-2,
+        retraso=datetime.timedelta(hours=settings.REVOCACION_PURGA_HORAS),
+    )
+
+
+def purgar_lote(tam_lote=None, antes=None):
+    """Borra hasta `tam_lote` revocados vencidos; devuelve cuántos borró."""
+    tam_lote = tam_lote or settings.REVOCACION_PURGA_LOTE
+    antes = antes or timezone.now()
+    ids = list(
+        TokenRevocado.objects.filter(expira_en__lt=antes).order_by('expira_en').values_list('id', flat=True)[:tam_lote]
+    )
+    if not ids:
+        return 0
+    # DELETE directo y no .delete(): un revocado vencido no deja lápida ni
+    # evento (no está en los backups ni en el outbox), así que no hay señales
+    # que correr, y la purga tiene que seguir siendo una sola sentencia por
+    # lote aunque alguien registre un receptor de borrado para el modelo
+    marcadores = ', '.join(['%s'] * len(ids))
+    with connections[router.db_for_write(TokenRevocado)].cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{TokenRevocado._meta.db_table}" WHERE id IN ({marcadores})', ids)
+        return cursor.rowcount
+
+
+def purgar_vencidos(tam_lote=None, pausa=0.0):
+    """Borra todos los revocados vencidos, un lote (y una transacción corta) por vez."""
+    tam_lote = tam_lote or settings.REVOCACION_PURGA_LOTE
+    antes = timezone.now()
+    total = 0
+    while True:
+        borrados = purgar_lote(tam_lote, antes)
+        total += borrados
+        if borrados < tam_lote:
+            return total
+        if pausa:
+            time.sleep(pausa)
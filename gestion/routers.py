@@ -0,0 +1,138 @@
+"""
+Ruteo de lecturas a réplicas.
+
+Las vistas que heredan de `LecturaReplicaMixin` leen de una réplica en los
+requests GET/HEAD, salvo que:
+
+- el usuario haya escrito hace menos de REPLICA_PIN_SEGUNDOS (lee lo que
+  acaba de escribir, p. ej. tras mover una tarea en el kanban),
+- la consulta ocurra dentro de una transacción sobre la base principal, o
+- todas las réplicas estén atrasadas más de REPLICA_MAX_LAG_SEGUNDOS.
+
+Las réplicas se configuran con DATABASE_REPLICA_URLS (alias replica1, replica2, ...).
+El pin de lectura-tras-escritura se guarda en la caché REPLICA_PIN_CACHE,
+que tiene que ser compartida entre workers: una escritura atendida por un
+worker debe fijar las lecturas que atienda otro. Con réplicas y una caché
+por proceso (LocMemCache) el arranque falla (ver `verificar_cache_pin`).
+"""
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+logger = logging.getLogger(__name__)
+
+_lectura_replica = ContextVar('lectura_replica', default=False)
+
+_estado_lock = threading.Lock()
+_lag = {}  # alias -> (segundos de atraso o None si no responde, momento del chequeo)
+
+CACHES_POR_PROCESO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def alias_replicas():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica')]
+
+
+def clave_pin(usuario_id):
+    return f'replica:pin:{usuario_id}'
+
+
+def cache_pin():
+    return caches[getattr(settings, 'REPLICA_PIN_CACHE', 'default')]
+
+
+def verificar_cache_pin():
+    """Falla si la caché de los pins no se comparte entre procesos."""
+    alias = getattr(settings, 'REPLICA_PIN_CACHE', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend is None or backend in CACHES_POR_PROCESO:
+        raise ImproperlyConfigured(
+            f'Con réplicas configuradas, REPLICA_PIN_CACHE ({alias!r}) tiene que ser una caché compartida '
+            f'entre workers (Redis, Memcached, base de datos), no {backend}'
+        )
+
+
+def fijar_a_principal(usuario_id):
+    """Fija al usuario a la base principal durante REPLICA_PIN_SEGUNDOS."""
+    cache_pin().set(clave_pin(usuario_id), True, getattr(settings, 'REPLICA_PIN_SEGUNDOS', 5))
+
+
+def fijado_a_principal(usuario_id):
+    return cache_pin().get(clave_pin(usuario_id)) is not None
+
+
+def medir_lag(alias):
+    """Segundos de atraso de la réplica (0 si no es PostgreSQL), o None si no responde."""
+    connection = connections[alias]
+    try:
+        if connection.vendor != 'postgresql':
+            connection.ensure_connection()
+            return 0.0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+            )
+            return float(cursor.fetchone()[0])
+    except DatabaseError as e:
+        logger.warning('Réplica %s no disponible: %s', alias, e)
+        return None
+
+
+def replica_disponible(alias):
+    """Consulta el atraso con una caché de REPLICA_CHEQUEO_SEGUNDOS por proceso."""
+    ahora = time.monotonic()
+    with _estado_lock:
+        lag, momento = _lag.get(alias, (None, None))
+    if momento is None or ahora - momento > getattr(settings, 'REPLICA_CHEQUEO_SEGUNDOS', 5):
+        lag = medir_lag(alias)
+        with _estado_lock:
+            _lag[alias] = (lag, ahora)
+    return lag is not None and lag <= getattr(settings, 'REPLICA_MAX_LAG_SEGUNDOS', 10)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _lectura_replica.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        candidatas = [alias for alias in alias_replicas() if replica_disponible(alias)]
+        if not candidatas:
+            return None
+        return random.choice(candidatas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Todas las bases tienen los mismos datos
+        return True
+
+
+class LecturaReplicaMixin:
+    """Para vistas de sólo lectura (listados y reportes) que toleran un atraso breve."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Se decide después de autenticar, para conocer al usuario
+        if request.method in ('GET', 'HEAD') and not fijado_a_principal(request.user.pk):
+            self._token_replica = _lectura_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_token_replica', None)
+        if token is not None:
+            _lectura_replica.reset(token)
+            self._token_replica = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,10 +1,17 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.validators import UniqueValidator
 from .models import Usuario, Proyecto, Permiso, Tarea
+from .reportes import carga_de
 from django.db.models import Max
 from django.db import transaction
 
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer #para autenticación JWT
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from . import revocacion
+from .jerarquia import crearia_ciclo
 from django.contrib.auth.hashers import check_password
 
 
@@ -32,8 +39,9 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
                     self.error_messages['invalid_password']
                 )
 
-            # Generar tokens
+            # Generar tokens; el access hereda el claim del sanatorio
             refresh = RefreshToken.for_user(user)
+            refresh['sanatorio'] = user.sanatorio_id
 
             data = {
                 'access': str(refresh.access_token),
@@ -64,10 +72,70 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
             )
 
 
+class RefreshRotativoSerializer(serializers.Serializer):
+    """
+    Refresh con rotación: devuelve un access nuevo y, con ROTATE_REFRESH_TOKENS,
+    también un refresh nuevo, revocando el anterior (ver gestion/revocacion.py).
+    """
+    refresh = serializers.CharField()
+    access = serializers.CharField(read_only=True)
+
+    default_error_messages = {
+        'no_active_account': 'No existe un usuario activo para este token.'
+    }
+
+    def validate(self, attrs):
+        try:
+            refresh = RefreshToken(attrs['refresh'])
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        if revocacion.esta_revocado(refresh[api_settings.JTI_CLAIM]):
+            raise InvalidToken('El token fue revocado')
+
+        # Como TokenRefreshSerializer: un usuario borrado o que ya no pasa
+        # USER_AUTHENTICATION_RULE no obtiene tokens nuevos
+        user = Usuario.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION and not revocacion.revocar(refresh):
+                raise InvalidToken('El token fue revocado')
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+# El email es único entre todos los sanatorios (identifica al usuario en el login)
+def email_unico():
+    return UniqueValidator(
+        queryset=Usuario.objects.de_todos_los_sanatorios(),
+        message='Ya existe un usuario con este email.'
+    )
+
+
 class UsuarioSerializer(serializers.ModelSerializer):
     class Meta:
         model = Usuario
         fields = '__all__'
+        extra_kwargs = {
+            'email': {'validators': [email_unico()]},
+            'sanatorio': {'read_only': True},
+        }
+
+    def validate(self, attrs):
+        encargado = attrs.get('encargado')
+        if self.instance is not None and encargado is not None and crearia_ciclo(self.instance.pk, encargado.pk):
+            raise serializers.ValidationError({
+                'encargado': 'No puede ser el propio usuario ni alguien que está a su cargo'
+            })
+        return attrs
 
 # Nuevo serializer para proyecto simplificado
 class ProyectoSimplificadoSerializer(serializers.ModelSerializer):
@@ -94,11 +162,51 @@ class ProyectoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Proyecto
         fields = '__all__'
+        read_only_fields = ['sanatorio']
+
+class ReasignarTareasSerializer(serializers.Serializer):
+    """Reasignación de todas las tareas de un empleado del proyecto a otro."""
+    origen = serializers.PrimaryKeyRelatedField(
+        queryset=Usuario.objects.filter(rol='empleado'),
+        help_text="Empleado cuyas tareas se reasignan"
+    )
+    destino = serializers.PrimaryKeyRelatedField(
+        queryset=Usuario.objects.filter(rol='empleado'),
+        help_text="Empleado que recibe las tareas (se lo asigna al proyecto si no lo estaba)"
+    )
+
+    def validate(self, data):
+        if data['origen'] == data['destino']:
+            raise serializers.ValidationError({'destino': 'Debe ser distinto del origen'})
+        return data
+
+
+class QuitarEmpleadoSerializer(serializers.Serializer):
+    """Baja de un empleado del proyecto, con traspaso de sus tareas."""
+    empleado = serializers.PrimaryKeyRelatedField(queryset=Usuario.objects.filter(rol='empleado'))
+    destino = serializers.PrimaryKeyRelatedField(
+        queryset=Usuario.objects.filter(rol='empleado'),
+        required=False,
+        allow_null=True,
+        help_text="Empleado que recibe las tareas; obligatorio si el empleado tiene tareas en el proyecto"
+    )
+
+    def validate(self, data):
+        proyecto = self.context['proyecto']
+        empleado, destino = data['empleado'], data.get('destino')
+        if not proyecto.empleados.filter(pk=empleado.pk).exists():
+            raise serializers.ValidationError({'empleado': 'No está asignado al proyecto'})
+        if destino == empleado:
+            raise serializers.ValidationError({'destino': 'Debe ser distinto del empleado'})
+        if destino is None and Tarea.objects.filter(proyecto=proyecto, empleado=empleado).exists():
+            raise serializers.ValidationError({'destino': 'El empleado tiene tareas en el proyecto; indique a quién pasan'})
+        return data
 
 class PermisoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Permiso
         fields = '__all__'
+        read_only_fields = ['sanatorio']
 
 
 # Serializer para tareas crear y actualizar
@@ -169,6 +277,12 @@ class ActualizarTareaSerializer(serializers.Serializer):
         min_value=1,
         help_text="Nueva posición en la columna (opcional)"
     )
+    version = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text="Versión conocida de la columna de origen (opcional, también vía If-Match). "
+                  "Si cambió, se responde 409 con el estado actual de las columnas"
+    )
 
     def validate_id(self, value):
         try:
@@ -203,6 +317,7 @@ class RegistroEmpleadoSerializer(serializers.ModelSerializer):
         fields = ['id', 'nombre', 'email', 'password', 'rol', 'encargado', 'created_at', 'updated_at']
         extra_kwargs = {
             'password': {'write_only': True},
+            'email': {'validators': [email_unico()]},
             'rol': {'read_only': True},
             'created_at': {'read_only': True},
             'updated_at': {'read_only': True},
@@ -242,7 +357,18 @@ class RegistroEmpleadoSerializer(serializers.ModelSerializer):
 class EmpleadosPorEncargadoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Usuario
-        fields = ['id', 'nombre', 'email', 'rol', 'created_at', 'updated_at']
+        fields = ['id', 'nombre', 'email', 'rol', 'encargado', 'created_at', 'updated_at']
+
+
+class EmpleadosConCargaSerializer(EmpleadosPorEncargadoSerializer):
+    """Requiere el queryset anotado con reportes.anotar_carga."""
+    carga = serializers.SerializerMethodField()
+
+    class Meta(EmpleadosPorEncargadoSerializer.Meta):
+        fields = EmpleadosPorEncargadoSerializer.Meta.fields + ['carga']
+
+    def get_carga(self, obj):
+        return carga_de(obj)
 
 
 class ProyectosPorEncargadoSerializer(serializers.ModelSerializer):
@@ -363,4 +489,39 @@ class TareasEmpleadosEncargadoSerializer(serializers.ModelSerializer):
             'id': obj.empleado.id,
             'nombre': obj.empleado.nombre,
             'email': obj.empleado.email
-        }
\ No newline at end of file
+        }
+
+# Bootstrap del tablero: las relaciones van como ids, los objetos en `incluidos`
+class ProyectoBootstrapSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Proyecto
+        fields = [
+            'id',
+            'nombre',
+            'descripcion',
+            'fecha_inicio',
+            'fecha_fin',
+            'estado',
+            'encargado',
+            'created_at',
+            'updated_at'
+        ]
+
+
+class TareaColumnaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tarea
+        fields = [
+            'id',
+            'titulo',
+            'descripcion',
+            'fecha',
+            'horas_invertidas',
+            'estado',
+            'orden',
+            'archivo',
+            'empleado',
+            'proyecto',
+            'created_at',
+            'updated_at'
+        ]
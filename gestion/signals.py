@@ -0,0 +1,105 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .backup import restaurando
+from .eventos import CAMPOS_PROYECTO, CAMPOS_TAREA, datos_de, registrar_evento
+from .models import Sanatorio, Usuario, Proyecto, Permiso, Tarea, TareaArchivada, Borrado
+from .tenencia import olvidar_por_defecto
+
+
+# Campos que escribe un movimiento en el kanban; ese cambio se publica como
+# 'tarea.movida' desde el propio movimiento, con el estado de origen y destino
+CAMPOS_MOVIMIENTO = {'estado', 'orden', 'updated_at'}
+
+
+# Lápidas para los backups incrementales (no al restaurar uno: el snapshot
+# ya trae los borrados del origen)
+@receiver(post_delete, sender=Sanatorio)
+@receiver(post_delete, sender=Usuario)
+@receiver(post_delete, sender=Proyecto)
+@receiver(post_delete, sender=Permiso)
+@receiver(post_delete, sender=Tarea)
+@receiver(post_delete, sender=TareaArchivada)
+def registrar_borrado(sender, instance, using, **kwargs):
+    if restaurando():
+        return
+    Borrado.objects.using(using).create(
+        modelo=sender._meta.label_lower,
+        objeto_id=instance.pk
+    )
+
+
+# El pk recordado del sanatorio por defecto puede ser de otra base (la de
+# tests, una recién vaciada) o de una fila que ya no existe
+@receiver(connection_created)
+@receiver(post_migrate)
+@receiver(post_delete, sender=Sanatorio)
+def olvidar_sanatorio_por_defecto(**kwargs):
+    olvidar_por_defecto()
+
+
+# Eventos de dominio (outbox)
+@receiver(post_save, sender=Tarea)
+def evento_tarea_guardada(sender, instance, created, update_fields, raw, using, **kwargs):
+    if raw or (update_fields and set(update_fields) <= CAMPOS_MOVIMIENTO):
+        return
+    tipo = 'tarea.creada' if created else 'tarea.actualizada'
+    registrar_evento(tipo, instance.proyecto_id, instance.pk, datos_de(instance, CAMPOS_TAREA), using)
+
+
+@receiver(post_delete, sender=Tarea)
+def evento_tarea_eliminada(sender, instance, using, **kwargs):
+    if restaurando():
+        return
+    registrar_evento('tarea.eliminada', instance.proyecto_id, instance.pk, datos_de(instance, CAMPOS_TAREA), using)
+
+
+@receiver(post_save, sender=Proyecto)
+def evento_proyecto_guardado(sender, instance, created, raw, using, **kwargs):
+    if raw:
+        return
+    tipo = 'proyecto.creado' if created else 'proyecto.actualizado'
+    registrar_evento(tipo, instance.pk, instance.pk, datos_de(instance, CAMPOS_PROYECTO), using)
+
+
+@receiver(post_delete, sender=Proyecto)
+def evento_proyecto_eliminado(sender, instance, using, **kwargs):
+    if restaurando():
+        return
+    registrar_evento('proyecto.eliminado', instance.pk, instance.pk, datos_de(instance, CAMPOS_PROYECTO), using)
+
+
+def evento_empleados(proyecto_id, action, empleados, using):
+    tipo = 'proyecto.empleados_asignados' if action == 'post_add' else 'proyecto.empleados_removidos'
+    registrar_evento(tipo, proyecto_id, proyecto_id, {'empleados': sorted(empleados)}, using)
+
+
+# Cambiar los empleados de un proyecto cuenta como modificación del proyecto
+@receiver(m2m_changed, sender=Proyecto.empleados.through)
+def marcar_proyecto_modificado(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if not reverse:
+        if action == 'pre_clear':
+            instance._empleados_limpiados = list(
+                instance.empleados.using(using).values_list('pk', flat=True)
+            )
+        elif action in ('post_add', 'post_remove', 'post_clear'):
+            if action == 'post_clear':
+                pk_set = getattr(instance, '_empleados_limpiados', [])
+            Proyecto.objects.using(using).filter(pk=instance.pk).update(updated_at=timezone.now())
+            if pk_set:
+                evento_empleados(instance.pk, action, pk_set, using)
+        return
+
+    # Desde el lado del empleado (usuario.proyectos_asignados)
+    if action == 'pre_clear':
+        instance._proyectos_limpiados = list(
+            instance.proyectos_asignados.using(using).values_list('pk', flat=True)
+        )
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if action == 'post_clear':
+            pk_set = getattr(instance, '_proyectos_limpiados', [])
+        Proyecto.objects.using(using).filter(pk__in=pk_set).update(updated_at=timezone.now())
+        for proyecto_id in sorted(pk_set or []):
+            evento_empleados(proyecto_id, action, [instance.pk], using)
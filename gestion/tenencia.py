@@ -0,0 +1,142 @@
+"""
+Varios sanatorios en un mismo despliegue.
+
+Usuario, Proyecto, Permiso, Tarea, TareaArchivada y TransicionTarea llevan
+la columna `sanatorio`. El sanatorio del request se resuelve:
+
+1. por el host (`Sanatorio.dominio`), en SanatorioMiddleware, o si el host
+   no es de ningún sanatorio,
+2. por el claim `sanatorio` del token, en la autenticación; los tokens
+   viejos sin el claim usan el sanatorio del usuario.
+
+Con un sanatorio activo, los managers de esos modelos (`ManagerSanatorio`)
+filtran por él todas las consultas, incluidas las de los querysets
+definidos a nivel de clase en las vistas (el filtro se agrega al clonarlos
+dentro del request), y las filas nuevas lo toman como valor por defecto.
+Los índices compuestos empiezan por `sanatorio`, así un sanatorio chico no
+recorre las filas de uno grande. Sin sanatorio activo (comandos, workers de
+la cola) las consultas ven todos los sanatorios y las filas nuevas van al
+sanatorio por defecto (SANATORIO_POR_DEFECTO).
+
+Las claves de la caché de Django llevan el sanatorio activo (ver
+`clave_cache`), así cada sanatorio tiene su propio espacio de caché.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from functools import partial
+
+from django.conf import settings
+from django.db import models, router, transaction
+
+
+_sanatorio = ContextVar('sanatorio', default=None)
+
+_lock = threading.Lock()
+_por_defecto = {}
+_dominios = {}
+_dominios_cargados = None
+
+
+def sanatorio_actual():
+    return _sanatorio.get()
+
+
+def activar(sanatorio_id):
+    """Activa `sanatorio_id` en el contexto actual; devuelve el token para `desactivar`."""
+    return _sanatorio.set(sanatorio_id)
+
+
+def desactivar(token):
+    _sanatorio.reset(token)
+
+
+@contextmanager
+def en_sanatorio(sanatorio_id):
+    token = activar(sanatorio_id)
+    try:
+        yield
+    finally:
+        desactivar(token)
+
+
+def sanatorio_por_defecto():
+    """
+    pk del sanatorio SANATORIO_POR_DEFECTO, creándolo si no existe. Se
+    recuerda por base recién cuando confirma la transacción que lo leyó, y
+    `olvidar_por_defecto` lo descarta en cada conexión nueva, migrate/flush o
+    borrado de un Sanatorio (ver gestion/signals.py), así no sobrevive a la
+    base de la que salió.
+    """
+    from .models import Sanatorio
+
+    using = router.db_for_write(Sanatorio)
+    pk = _por_defecto.get(using)
+    if pk is None:
+        sanatorio, _ = Sanatorio.objects.using(using).get_or_create(
+            slug=settings.SANATORIO_POR_DEFECTO, defaults={'nombre': settings.SANATORIO_POR_DEFECTO.title()}
+        )
+        pk = sanatorio.pk
+        transaction.on_commit(partial(_por_defecto.__setitem__, using, pk), using=using)
+    return pk
+
+
+def olvidar_por_defecto():
+    _por_defecto.clear()
+
+
+def sanatorio_actual_id():
+    """Valor por defecto de la columna `sanatorio` de las filas nuevas."""
+    return sanatorio_actual() or sanatorio_por_defecto()
+
+
+def sanatorio_de_host(host):
+    """Sanatorio cuyo `dominio` es `host`, con un mapa en memoria por proceso."""
+    global _dominios, _dominios_cargados
+    ahora = time.monotonic()
+    if _dominios_cargados is None or ahora - _dominios_cargados > settings.SANATORIOS_CACHE_SEGUNDOS:
+        from .models import Sanatorio
+
+        dominios = dict(Sanatorio.objects.exclude(dominio=None).values_list('dominio', 'id'))
+        with _lock:
+            _dominios, _dominios_cargados = dominios, ahora
+    return _dominios.get(host.split(':', 1)[0].lower())
+
+
+def clave_cache(clave, prefijo, version):
+    """KEY_FUNCTION de CACHES: la clave de Django más el sanatorio activo."""
+    return f'{prefijo}:{version}:{sanatorio_actual() or "-"}:{clave}'
+
+
+class SanatorioQuerySet(models.QuerySet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sanatorio_aplicado = False
+
+    def _clone(self):
+        clon = super()._clone()
+        clon._sanatorio_aplicado = self._sanatorio_aplicado
+        return clon
+
+    def _chain(self):
+        return super()._chain()._acotar()
+
+    def _acotar(self):
+        sanatorio = sanatorio_actual()
+        if sanatorio is not None and not self._sanatorio_aplicado and not self.query.is_sliced and not self.query.combinator:
+            self.query.add_q(models.Q(sanatorio_id=sanatorio))
+            self._sanatorio_aplicado = True
+        return self
+
+
+class ManagerSanatorio(models.Manager.from_queryset(SanatorioQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset()._acotar()
+
+    def de_todos_los_sanatorios(self):
+        """Sin el filtro del sanatorio activo (p. ej. unicidad global del email)."""
+        queryset = super().get_queryset()
+        queryset._sanatorio_aplicado = True
+        return queryset
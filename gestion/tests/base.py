@@ -0,0 +1,68 @@
+"""
+Datos mínimos para los tests de gestion: un sanatorio con un encargado,
+dos empleados, un proyecto y algunas tareas, y clientes autenticados con
+el mismo token que emite el login.
+"""
+import datetime
+
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..models import Sanatorio, Usuario, Proyecto, Tarea
+
+
+FECHA_INICIO = datetime.date(2024, 3, 1)
+
+
+class Organizacion:
+    def __init__(self, slug, dominio=None):
+        self.sanatorio = Sanatorio.objects.create(nombre=slug.title(), slug=slug, dominio=dominio)
+        campos = {'password': 'clave-de-prueba', 'sanatorio': self.sanatorio}
+        self.encargado = Usuario.objects.create(
+            nombre=f'Encargado {slug}', email=f'encargado@{slug}.test', rol='encargado', **campos
+        )
+        self.empleados = [
+            Usuario.objects.create(
+                nombre=f'Empleado {slug} {i}', email=f'empleado{i}@{slug}.test', rol='empleado',
+                encargado=self.encargado, **campos
+            )
+            for i in range(2)
+        ]
+        self.proyecto = Proyecto.objects.create(
+            nombre=f'Proyecto {slug}', descripcion='', fecha_inicio=FECHA_INICIO, estado='progreso',
+            encargado=self.encargado, sanatorio=self.sanatorio,
+        )
+        self.proyecto.empleados.set(self.empleados)
+        self.tareas = [
+            self.crear_tarea(empleado, orden=orden)
+            for empleado in self.empleados
+            for orden in range(1, 4)
+        ]
+
+    def crear_tarea(self, empleado, estado='pendiente', orden=1, **campos):
+        return Tarea.objects.create(
+            titulo=f'Tarea {empleado.pk}-{orden}', descripcion='', proyecto=campos.pop('proyecto', self.proyecto),
+            fecha=campos.pop('fecha', FECHA_INICIO), horas_invertidas=campos.pop('horas_invertidas', 2),
+            empleado=empleado, estado=estado, orden=orden, sanatorio=self.sanatorio, **campos
+        )
+
+
+def token_de(usuario, sanatorio_id=None):
+    refresh = RefreshToken.for_user(usuario)
+    refresh['sanatorio'] = usuario.sanatorio_id if sanatorio_id is None else sanatorio_id
+    return refresh
+
+
+def cliente(usuario, sanatorio_id=None, host=None):
+    api = APIClient(HTTP_HOST=host) if host else APIClient()
+    api.credentials(HTTP_AUTHORIZATION=f'Bearer {token_de(usuario, sanatorio_id).access_token}')
+    return api
+
+
+def plan(queryset):
+    """EXPLAIN de `queryset`; en PostgreSQL sin seq scan, que en tablas chicas siempre gana."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
@@ -0,0 +1,57 @@
+import datetime
+
+from django.test import TestCase
+
+from .. import analitica
+from ..models import TransicionTarea
+from .base import Organizacion
+
+
+LUNES = datetime.datetime(2024, 3, 4, 9, tzinfo=datetime.timezone.utc)
+
+
+class AnaliticaTests(TestCase):
+    """Las mismas consultas (SQL propio por motor) en cada agrupación."""
+
+    def setUp(self):
+        self.org = Organizacion('norte')
+        proyecto, empleados = self.org.proyecto.pk, self.org.empleados
+        # Tarea 1: lead 10 h, cycle 8 h; tarea 2: lead 24 h, cycle 20 h
+        for tarea_id, empleado, inicio, fin in ((1, empleados[0], 2, 10), (2, empleados[1], 4, 24)):
+            for desde, hacia, horas in ((None, 'pendiente', 0), ('pendiente', 'progreso', inicio), ('progreso', 'completada', fin)):
+                TransicionTarea.objects.create(
+                    tarea_id=tarea_id, proyecto_id=proyecto, empleado_id=empleado.pk, desde=desde, hacia=hacia,
+                    momento=LUNES + datetime.timedelta(hours=horas), sanatorio_id=self.org.sanatorio.pk,
+                )
+
+    def consulta(self, agrupar):
+        return analitica.Consulta(datetime.date(2024, 3, 1), datetime.date(2024, 3, 31), agrupar=agrupar)
+
+    def test_tiempos_totales(self):
+        [grupo] = analitica.tiempos(self.consulta('total'))
+
+        self.assertEqual(grupo['completadas'], 2)
+        self.assertEqual(grupo['lead_time_horas'], {'media': 17.0, 'p50': 10.0, 'p85': 24.0})
+        self.assertEqual(grupo['cycle_time_horas'], {'media': 14.0, 'p50': 8.0, 'p85': 20.0})
+        self.assertEqual(grupo['tiempo_en_estado_horas'], {
+            'pendiente': {'transiciones': 2, 'media': 3.0},
+            'progreso': {'transiciones': 2, 'media': 14.0},
+        })
+
+    def test_tiempos_por_grupo(self):
+        empleados = [e.pk for e in self.org.empleados]
+        self.assertEqual(
+            [g['empleado'] for g in analitica.tiempos(self.consulta('empleado'))], sorted(empleados, key=str)
+        )
+        [por_proyecto] = analitica.tiempos(self.consulta('proyecto'))
+        self.assertEqual((por_proyecto['proyecto'], por_proyecto['completadas']), (self.org.proyecto.pk, 2))
+        [por_semana] = analitica.tiempos(self.consulta('semana'))
+        self.assertEqual((por_semana['semana'], por_semana['completadas']), ('2024-03-04', 2))
+
+    def test_throughput(self):
+        [total] = analitica.throughput(self.consulta('total'))
+        self.assertEqual(total['semanas'], [
+            {'semana': '2024-03-04', 'completadas': 2, 'media_4_semanas': 2.0, 'acumuladas': 2},
+        ])
+        por_empleado = analitica.throughput(self.consulta('empleado'))
+        self.assertEqual(sorted(g['semanas'][0]['completadas'] for g in por_empleado), [1, 1])
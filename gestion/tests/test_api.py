@@ -0,0 +1,109 @@
+import datetime
+
+from django.test import TestCase, override_settings
+
+from ..archivo import archivar_lote
+from ..models import Tarea, TareaArchivada
+from .base import FECHA_INICIO, Organizacion, cliente
+
+
+@override_settings(THROTTLE_ACTIVO=False)
+class EndpointsTests(TestCase):
+    """Cada endpoint de gestion/urls.py responde para el encargado del equipo."""
+
+    def setUp(self):
+        self.org = Organizacion('norte')
+        self.api = cliente(self.org.encargado)
+
+    def test_lecturas(self):
+        encargado, empleado, proyecto = self.org.encargado.pk, self.org.empleados[0].pk, self.org.proyecto.pk
+        tarea = self.org.tareas[0].pk
+        rutas = [
+            '/api/me/',
+            '/api/bootstrap/',
+            f'/api/empleados-por-encargado/{encargado}/',
+            f'/api/empleados-por-encargado/{encargado}/?carga=true',
+            f'/api/proyectos-por-encargado/{encargado}/',
+            f'/api/proyectos-asignados-empleado/{empleado}/',
+            f'/api/tareas-empleado/{empleado}/',
+            f'/api/tareas-proyecto/{proyecto}/',
+            f'/api/tareas-empleados-encargado/{encargado}/',
+            f'/api/tareas-usuario-proyecto/{empleado}/{proyecto}/',
+            '/api/usuarios/',
+            '/api/proyectos/',
+            '/api/tareas/',
+            '/api/tareas/?fields=id,titulo,estado,orden,empleado',
+            '/api/tareas/?fields=id,titulo,estado,proyecto.nombre&expand=empleado',
+            f'/api/tareas/{tarea}/',
+            '/api/cronograma/?desde=2024-03-01&hasta=2024-03-31',
+            '/api/analitica/tiempos/',
+            '/api/analitica/throughput/',
+        ]
+        for ruta in rutas:
+            with self.subTest(ruta=ruta):
+                self.assertEqual(self.api.get(ruta).status_code, 200)
+
+    def test_login(self):
+        response = self.client.post(
+            '/api/auth/login/', {'email': self.org.encargado.email, 'password': 'clave-de-prueba'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+
+    def test_login_con_credenciales_invalidas_es_400(self):
+        response = self.client.post(
+            '/api/auth/login/', {'email': self.org.encargado.email, 'password': 'otra'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_crear_editar_mover_y_borrar_una_tarea(self):
+        empleado = self.org.empleados[0]
+        response = self.api.post('/api/tareas/', {
+            'titulo': 'Nueva', 'descripcion': 'Desde el tablero', 'proyecto': self.org.proyecto.pk, 'fecha': FECHA_INICIO,
+            'horas_invertidas': 2, 'empleado': empleado.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        tarea_id = response.json()['id']
+
+        response = self.api.patch(f'/api/tareas/{tarea_id}/', {'horas_invertidas': 5}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.api.post(
+            '/api/tareas/actualizar/', {'id': tarea_id, 'nuevo_estado': 'progreso', 'nuevo_orden': 1}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(Tarea.objects.get(pk=tarea_id).estado, 'progreso')
+
+        self.assertEqual(self.api.delete(f'/api/tareas/{tarea_id}/').status_code, 204)
+        self.assertFalse(Tarea.objects.filter(pk=tarea_id).exists())
+
+
+@override_settings(THROTTLE_ACTIVO=False)
+class CargaTests(TestCase):
+    """La carga de `?carga=true` cuenta también las tareas archivadas."""
+
+    def setUp(self):
+        self.org = Organizacion('norte')
+        self.api = cliente(self.org.encargado)
+        self.empleado = self.org.empleados[0]
+        for orden in (1, 2):
+            self.org.crear_tarea(self.empleado, estado='completada', orden=orden, horas_invertidas=5)
+
+    def carga(self):
+        response = self.api.get(f'/api/empleados-por-encargado/{self.org.encargado.pk}/?carga=true')
+        self.assertEqual(response.status_code, 200)
+        (empleado,) = [e for e in response.json()['empleados'] if e['id'] == self.empleado.pk]
+        return empleado['carga']
+
+    def test_archivar_no_cambia_la_carga(self):
+        antes = self.carga()
+        self.assertEqual((antes['completada'], antes['pendiente'], antes['horas_invertidas']), (2, 3, 16))
+
+        self.assertEqual(archivar_lote(FECHA_INICIO + datetime.timedelta(days=1)), 2)
+        self.assertEqual(TareaArchivada.objects.filter(empleado=self.empleado).count(), 2)
+        despues = self.carga()
+        for carga in (antes, despues):
+            del carga['ultima_actividad']
+        self.assertEqual(despues, antes)
@@ -0,0 +1,28 @@
+import datetime
+
+from django.test import TestCase
+
+from ..archivo import archivar_lote
+from ..models import Borrado, EventoDominio, Tarea, TareaArchivada
+from .base import FECHA_INICIO, Organizacion
+
+
+class ArchivarLoteTests(TestCase):
+    def setUp(self):
+        self.org = Organizacion('norte')
+        self.completadas = [
+            self.org.crear_tarea(self.org.empleados[0], estado='completada', orden=orden).pk for orden in (1, 2)
+        ]
+
+    def test_mueve_las_tareas_con_una_lapida_y_un_evento_de_archivo(self):
+        self.assertEqual(archivar_lote(FECHA_INICIO + datetime.timedelta(days=1)), 2)
+
+        self.assertFalse(Tarea.objects.filter(pk__in=self.completadas).exists())
+        self.assertEqual(set(TareaArchivada.objects.values_list('pk', flat=True)), set(self.completadas))
+        self.assertEqual(
+            sorted(Borrado.objects.filter(modelo='gestion.tarea').values_list('objeto_id', flat=True)),
+            sorted(self.completadas),
+        )
+        # Sin las señales de borrado: ningún 'tarea.eliminada'
+        eventos = EventoDominio.objects.filter(objeto_id__in=self.completadas).exclude(tipo='tarea.creada')
+        self.assertEqual(sorted(eventos.values_list('tipo', flat=True)), ['tarea.archivada'] * 2)
@@ -0,0 +1,35 @@
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase
+
+from ..backup import escribir_snapshot, restaurar_snapshot
+from ..models import Borrado, EventoDominio, Tarea
+from .base import Organizacion
+
+
+class RestaurarSnapshotTests(TestCase):
+    def setUp(self):
+        self.org = Organizacion('norte')
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+
+    def test_las_lapidas_no_generan_lapidas_ni_eventos(self):
+        completo = self.directorio / 'completo.jsonl.gz'
+        cabecera = escribir_snapshot(completo)
+        tarea_id = self.org.tareas[0].pk
+        self.org.tareas[0].delete()
+        incremental = self.directorio / 'incremental.jsonl.gz'
+        escribir_snapshot(incremental, desde=cabecera['hasta'])
+
+        restaurar_snapshot(completo)
+        self.assertTrue(Tarea.objects.filter(pk=tarea_id).exists())
+        borrados, eventos = Borrado.objects.count(), EventoDominio.objects.count()
+
+        _, conteo = restaurar_snapshot(incremental)
+
+        self.assertEqual(conteo['borrados'], 1)
+        self.assertFalse(Tarea.objects.filter(pk=tarea_id).exists())
+        self.assertEqual(Borrado.objects.count(), borrados)
+        self.assertEqual(EventoDominio.objects.count(), eventos)
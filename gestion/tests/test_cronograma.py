@@ -0,0 +1,59 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+
+from ..cronograma import INDICE_GIST, proyectos_vigentes
+from ..models import Proyecto
+from ..tenencia import en_sanatorio
+from .base import Organizacion, plan
+
+
+DESDE, HASTA = datetime.date(2024, 6, 1), datetime.date(2024, 6, 30)
+
+
+class ProyectosVigentesTests(TestCase):
+    """La misma vigencia en PostgreSQL (rangos y GiST) y en los demás motores (btree)."""
+
+    def setUp(self):
+        self.org = Organizacion('norte')
+        Proyecto.objects.all().delete()
+
+    def crear(self, nombre, inicio, fin):
+        return Proyecto.objects.create(
+            nombre=nombre, descripcion='', fecha_inicio=inicio, fecha_fin=fin, estado='progreso',
+            encargado=self.org.encargado, sanatorio=self.org.sanatorio,
+        ).pk
+
+    def test_vigencia(self):
+        vigentes = {
+            self.crear('Solapa el inicio', datetime.date(2024, 5, 1), DESDE),
+            self.crear('Solapa el final', HASTA, datetime.date(2024, 8, 1)),
+            self.crear('Contiene la ventana', datetime.date(2024, 1, 1), datetime.date(2024, 12, 31)),
+            self.crear('Abierto', datetime.date(2024, 2, 1), None),
+        }
+        self.crear('Terminó antes', datetime.date(2024, 1, 1), datetime.date(2024, 5, 31))
+        self.crear('Empieza después', datetime.date(2024, 7, 1), None)
+        # Fechas invertidas: no forman un rango, no está vigente en ningún motor
+        self.crear('Invertido dentro', datetime.date(2024, 6, 20), datetime.date(2024, 6, 10))
+        self.crear('Invertido antes', datetime.date(2024, 6, 15), datetime.date(2024, 5, 1))
+
+        self.assertEqual(set(proyectos_vigentes(DESDE, HASTA).values_list('id', flat=True)), vigentes)
+
+    def test_usa_el_indice(self):
+        if connection.vendor == 'postgresql':
+            # Sin los btree que empiezan por sanatorio_id (el DROP se deshace con
+            # la transacción del test), para que el plan no dependa del costo
+            # estimado en una tabla casi vacía
+            with connection.cursor() as cursor:
+                cursor.execute('DROP INDEX proyecto_vigencia_idx, proyecto_sanatorio_idx')
+        with en_sanatorio(self.org.sanatorio.pk):
+            consulta = plan(proyectos_vigentes(DESDE, HASTA))
+        if connection.vendor == 'postgresql':
+            # El sanatorio y el rango se resuelven juntos dentro del GiST
+            self.assertIn(INDICE_GIST, consulta)
+            condicion = next(linea for linea in consulta.splitlines() if 'Index Cond' in linea)
+            self.assertIn('sanatorio_id', condicion)
+            self.assertIn('&&', condicion)
+        else:
+            self.assertIn('proyecto_vigencia_idx', consulta)
@@ -0,0 +1,37 @@
+import datetime
+
+from django.test import TestCase
+
+from ..detector_consultas import ConsultasRepetidas, detectar_consultas
+from ..models import Proyecto, Tarea
+from .base import Organizacion, cliente
+
+
+class DetectarConsultasTests(TestCase):
+    def setUp(self):
+        self.org = Organizacion('norte')
+
+    def test_un_patron_n_mas_1_hace_fallar_el_bloque(self):
+        with self.assertRaises(ConsultasRepetidas) as error:
+            with detectar_consultas(umbral_repeticiones=3):
+                [tarea.proyecto.nombre for tarea in Tarea.objects.all()]
+        self.assertIn('test_detector_consultas.py', str(error.exception))
+
+    def test_con_select_related_no_hay_repetidas(self):
+        with detectar_consultas(umbral_repeticiones=3) as detector:
+            [tarea.proyecto.nombre for tarea in Tarea.objects.select_related('proyecto')]
+        self.assertEqual(detector.total, 1)
+
+    def test_el_listado_de_proyectos_no_repite_consultas_por_proyecto(self):
+        for i in range(6):
+            proyecto = Proyecto.objects.create(
+                nombre=f'Extra {i}', descripcion='', fecha_inicio=datetime.date(2024, 4, 1), estado='pendiente',
+                encargado=self.org.encargado, sanatorio=self.org.sanatorio,
+            )
+            proyecto.empleados.set(self.org.empleados)
+        api = cliente(self.org.encargado)
+
+        with detectar_consultas(umbral_repeticiones=3):
+            response = api.get('/api/proyectos/')
+
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+
+
+# Un worker de producción: arranca, resuelve una ruta y lista lo importado
+SCRIPT_WORKER = r'''
+import json, sys
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import resolve
+resolve('/api/me/')
+print(json.dumps(sorted(m for m in sys.modules if m.startswith('drf_spectacular'))))
+'''
+
+
+class ArranqueProduccionTests(SimpleTestCase):
+    def test_no_importa_drf_spectacular(self):
+        entorno = {**os.environ, 'PERFIL_ARRANQUE': 'produccion', 'DJANGO_SETTINGS_MODULE': 'proyecto_sanatorium.settings'}
+        salida = subprocess.run(
+            [sys.executable, '-c', SCRIPT_WORKER], env=entorno, cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(json.loads(salida.stdout.splitlines()[-1]), [])
+
+
+class EsquemaTests(TestCase):
+    def test_el_esquema_incluye_las_anotaciones_de_las_vistas(self):
+        from drf_spectacular.drainage import GENERATOR_STATS
+
+        with GENERATOR_STATS.silence():
+            response = self.client.get('/api/schema/', {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        esquema = json.loads(response.content)
+
+        parametros = {p['name'] for p in esquema['paths']['/api/tareas/']['get']['parameters']}
+        self.assertTrue({'fields', 'expand'} <= parametros)
+        self.assertEqual(esquema['paths']['/api/cronograma/']['get']['tags'], ['Tablero'])
@@ -0,0 +1,72 @@
+import threading
+import unittest
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from ..eventos import despachar_lote, registrar_evento
+from ..models import EventoDominio, SecuenciaEventos
+
+
+class Destino:
+    def __init__(self, fallar=False):
+        self.fallar = fallar
+        self.recibidos = []
+
+    def enviar(self, mensajes):
+        if self.fallar:
+            raise ConnectionError('destino caído')
+        self.recibidos += [(mensaje['proyecto'], mensaje['secuencia'], mensaje['objeto']) for mensaje in mensajes]
+
+
+class SecuenciaTests(TestCase):
+    """La secuencia la asigna el despacho, por proyecto y en orden de id."""
+
+    def test_escribir_no_toca_el_contador(self):
+        registrar_evento('tarea.creada', 1, 10, {})
+        self.assertFalse(SecuenciaEventos.objects.exists())
+        self.assertIsNone(EventoDominio.objects.get().secuencia)
+
+    def test_el_despacho_numera_por_proyecto(self):
+        for proyecto, objeto in ((1, 10), (2, 20), (1, 11), (1, 12)):
+            registrar_evento('tarea.creada', proyecto, objeto, {})
+
+        caido = Destino(fallar=True)
+        with self.assertRaises(ConnectionError):
+            despachar_lote([caido], tam_lote=3)
+        # El lote que falló conserva sus números y se reenvía igual
+        destino = Destino()
+        self.assertEqual(despachar_lote([destino], tam_lote=3), 3)
+        self.assertEqual(destino.recibidos, [(1, 1, 10), (2, 1, 20), (1, 2, 11)])
+
+        registrar_evento('tarea.creada', 2, 21, {})
+        self.assertEqual(despachar_lote([destino]), 2)
+        self.assertEqual(destino.recibidos[3:], [(1, 3, 12), (2, 2, 21)])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'SQLite bloquea toda la base en cada escritura')
+class ConcurrenciaTests(TransactionTestCase):
+    def test_dos_escrituras_del_mismo_proyecto_no_se_esperan(self):
+        escribio, terminar = threading.Event(), threading.Event()
+
+        def escritura_abierta():
+            try:
+                with transaction.atomic():
+                    registrar_evento('tarea.movida', 1, 10, {})
+                    escribio.set()
+                    terminar.wait(timeout=10)
+            finally:
+                connection.close()
+
+        hilo = threading.Thread(target=escritura_abierta)
+        hilo.start()
+        try:
+            self.assertTrue(escribio.wait(timeout=10))
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL lock_timeout = '2s'")
+                registrar_evento('tarea.movida', 1, 11, {})
+        finally:
+            terminar.set()
+            hilo.join()
+        self.assertEqual(EventoDominio.objects.filter(proyecto_id=1).count(), 2)
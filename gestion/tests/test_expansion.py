@@ -0,0 +1,18 @@
+from django.test import SimpleTestCase
+
+from ..expansion import SERIALIZERS_CACHEADOS, parsear_forma, serializer_para
+from ..models import Tarea
+
+
+class SerializersPorFormaTests(SimpleTestCase):
+    def test_misma_forma_reutiliza_el_serializer(self):
+        primera = serializer_para(Tarea, parsear_forma(Tarea, 'id,titulo', 'empleado'))
+        segunda = serializer_para(Tarea, parsear_forma(Tarea, 'titulo,id', 'empleado'))
+        self.assertIs(primera, segunda)
+
+    def test_el_cache_esta_acotado(self):
+        campos = ['id', 'titulo', 'descripcion', 'estado', 'orden', 'fecha', 'horas_invertidas', 'empleado', 'proyecto']
+        for mascara in range(1, 2 ** len(campos)):
+            elegidos = [campo for i, campo in enumerate(campos) if mascara & (1 << i)]
+            serializer_para(Tarea, parsear_forma(Tarea, ','.join(elegidos), None))
+        self.assertLessEqual(serializer_para.cache_info().currsize, SERIALIZERS_CACHEADOS)
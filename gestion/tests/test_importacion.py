@@ -0,0 +1,122 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..models import Proyecto, Sanatorio, Tarea, Usuario
+
+
+def usuario(pk, email, password='clave', encargado=None, **campos):
+    return {'model': 'gestion.usuario', 'pk': pk, 'fields': {
+        'nombre': email.split('@')[0], 'email': email, 'password': password,
+        'rol': 'encargado' if encargado is None else 'empleado', 'encargado': encargado, **campos,
+    }}
+
+
+def proyecto(pk, encargado, empleados=()):
+    return {'model': 'gestion.proyecto', 'pk': pk, 'fields': {
+        'nombre': f'Proyecto {pk}', 'descripcion': 'Importada', 'fecha_inicio': '2024-03-01',
+        'estado': 'progreso', 'encargado': encargado, 'empleados': list(empleados),
+    }}
+
+
+def tarea(pk, proyecto_id, empleado):
+    return {'model': 'gestion.tarea', 'pk': pk, 'fields': {
+        'titulo': f'Tarea {pk}', 'descripcion': 'Importada', 'proyecto': proyecto_id, 'fecha': '2024-03-04',
+        'horas_invertidas': 2, 'empleado': empleado, 'estado': 'pendiente', 'orden': 1,
+    }}
+
+
+class ImportarDatosTests(TestCase):
+    def setUp(self):
+        # Sin usuarios creados por la secuencia: la importación la mueve (setval
+        # no se deshace con la transacción del test) y chocarían con los pks fijos
+        Sanatorio.objects.create(nombre='Norte', slug='norte')
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = Path(directorio.name)
+
+    def importar(self, registros, **opciones):
+        ruta = self.directorio / 'volcado.json'
+        ruta.write_text(json.dumps(registros), encoding='utf-8')
+        salida = io.StringIO()
+        call_command('importar_datos', str(ruta), sanatorio='norte', hilos=1, stdout=salida, stderr=salida, **opciones)
+        return salida.getvalue()
+
+    def test_difiere_las_filas_cuya_fk_aparece_despues(self):
+        # Cada fila referencia a la siguiente, y el encargado del empleado aparece al final
+        self.importar([
+            tarea(1001, 1001, 1002),
+            proyecto(1001, 1001, empleados=[1002]),
+            usuario(1002, 'empleado@importado.test', encargado=1001),
+            usuario(1001, 'encargado@importado.test'),
+        ])
+
+        importada = Tarea.objects.get(pk=1001)
+        self.assertEqual((importada.proyecto_id, importada.empleado_id), (1001, 1002))
+        self.assertEqual(Proyecto.objects.get(pk=1001).encargado_id, 1001)
+        self.assertEqual(list(Proyecto.objects.get(pk=1001).empleados.values_list('pk', flat=True)), [1002])
+        self.assertEqual(Usuario.objects.get(pk=1002).encargado_id, 1001)
+
+    def test_una_referencia_que_nunca_aparece_es_un_error(self):
+        with self.assertRaisesMessage(CommandError, 'gestion.proyecto pk=9999'):
+            self.importar([usuario(1001, 'encargado@importado.test'), tarea(1001, 9999, 1001)])
+
+    def test_un_pk_diferido_repetido_se_inserta_una_vez(self):
+        salida = self.importar([
+            tarea(1001, 1001, 1001),
+            tarea(1001, 1001, 1001),
+            usuario(1001, 'encargado@importado.test'),
+            proyecto(1001, 1001),
+            tarea(1001, 1001, 1001),
+        ])
+
+        self.assertEqual(Tarea.objects.filter(pk=1001).count(), 1)
+        self.assertIn('gestion.tarea: 2 omitidos', salida)
+
+    def test_reimportar_el_mismo_volcado_no_duplica(self):
+        volcado = [
+            usuario(1001, 'encargado@importado.test'),
+            usuario(1002, 'empleado@importado.test', encargado=1001),
+            proyecto(1001, 1001, empleados=[1002]),
+            tarea(1001, 1001, 1002),
+        ]
+        self.importar(volcado)
+        antes = (Usuario.objects.count(), Proyecto.objects.count(), Tarea.objects.count(),
+                 Proyecto.empleados.through.objects.count())
+
+        salida = self.importar(volcado)
+
+        self.assertEqual((Usuario.objects.count(), Proyecto.objects.count(), Tarea.objects.count(),
+                          Proyecto.empleados.through.objects.count()), antes)
+        self.assertNotIn('insertados', salida)
+        self.assertIn('gestion.tarea: 1 omitidos', salida)
+
+    def test_hashea_las_contrasenas_que_no_estan_marcadas(self):
+        # Parece un hash pbkdf2, pero nada dice que lo sea: es texto plano
+        parecida = 'pbkdf2_sha256$1$sal$no-es-un-hash'
+        hasheada = make_password('secreta')
+        self.importar([
+            usuario(1001, 'parecida@importado.test', password=parecida),
+            usuario(1002, 'plana@importado.test', password='secreta'),
+            usuario(1003, 'marcada@importado.test', password=hasheada, password_hasheado=True),
+        ])
+
+        self.assertTrue(check_password(parecida, Usuario.objects.get(pk=1001).password))
+        self.assertTrue(check_password('secreta', Usuario.objects.get(pk=1002).password))
+        self.assertEqual(Usuario.objects.get(pk=1003).password, hasheada)
+
+    def test_passwords_hasheados_vale_para_todo_el_volcado(self):
+        hasheada = make_password('secreta')
+        self.importar([usuario(1001, 'marcada@importado.test', password=hasheada)], passwords_hasheados=True)
+
+        self.assertEqual(Usuario.objects.get(pk=1001).password, hasheada)
+
+    def test_una_contrasena_marcada_tiene_que_ser_un_hash(self):
+        with self.assertRaisesMessage(CommandError, 'no es un hash conocido'):
+            self.importar([usuario(1001, 'marcada@importado.test', password='secreta', password_hasheado=True)])
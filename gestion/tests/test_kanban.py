@@ -0,0 +1,148 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from .. import kanban
+
+from ..kanban import estado_columnas
+from ..models import Tarea, VersionColumna
+from ..serializers import ActualizarTareaSerializer
+from ..trabajos import compactar_columna
+from .base import Organizacion, cliente
+
+
+@override_settings(THROTTLE_ACTIVO=False)
+class PosicionesConHuecosTests(TestCase):
+    """`nuevo_orden` es una posición: vale aunque la columna tenga huecos en `orden`."""
+
+    def setUp(self):
+        self.org = Organizacion('norte')
+        self.api = cliente(self.org.encargado)
+        self.empleado = self.org.empleados[0]
+        # Columna pendiente con huecos: órdenes 1, 2 y 5
+        self.primera, self.segunda, self.tercera = self.org.tareas[:3]
+        Tarea.objects.filter(pk=self.tercera.pk).update(orden=5)
+
+    def mover(self, tarea, estado, orden):
+        response = self.api.post(
+            '/api/tareas/actualizar/', {'id': tarea.pk, 'nuevo_estado': estado, 'nuevo_orden': orden},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def columna(self, estado='pendiente'):
+        return list(
+            Tarea.objects.filter(empleado=self.empleado, estado=estado)
+            .order_by('orden', 'id').values_list('pk', flat=True)
+        )
+
+    def test_reordenar_dentro_de_la_columna(self):
+        for modo in ('bloqueo', 'optimista'):
+            with self.subTest(modo=modo), override_settings(KANBAN_CONCURRENCIA=modo):
+                Tarea.objects.filter(pk=self.primera.pk).update(orden=1)
+                Tarea.objects.filter(pk=self.segunda.pk).update(orden=2)
+                Tarea.objects.filter(pk=self.tercera.pk).update(orden=5)
+
+                self.mover(self.primera, 'pendiente', 3)
+                self.assertEqual(self.columna(), [self.segunda.pk, self.tercera.pk, self.primera.pk])
+
+                self.mover(self.primera, 'pendiente', 2)
+                self.assertEqual(self.columna(), [self.segunda.pk, self.primera.pk, self.tercera.pk])
+
+                self.mover(self.tercera, 'pendiente', 1)
+                self.assertEqual(self.columna(), [self.tercera.pk, self.segunda.pk, self.primera.pk])
+
+    def test_mover_a_otra_columna_en_una_posicion(self):
+        for modo in ('bloqueo', 'optimista'):
+            with self.subTest(modo=modo), override_settings(KANBAN_CONCURRENCIA=modo):
+                Tarea.objects.filter(empleado=self.empleado).update(estado='pendiente')
+                Tarea.objects.filter(pk=self.primera.pk).update(orden=1)
+                Tarea.objects.filter(pk=self.segunda.pk).update(orden=2)
+                Tarea.objects.filter(pk=self.tercera.pk).update(orden=5)
+                otra = self.org.crear_tarea(self.empleado, estado='progreso', orden=4)
+
+                self.mover(self.tercera, 'progreso', 1)
+                self.assertEqual(self.columna('progreso'), [self.tercera.pk, otra.pk])
+
+                # Más allá del final queda última
+                self.mover(self.segunda, 'progreso', 10)
+                self.assertEqual(self.columna('progreso'), [self.tercera.pk, otra.pk, self.segunda.pk])
+                otra.delete()
+
+
+@override_settings(THROTTLE_ACTIVO=False, KANBAN_CONCURRENCIA='bloqueo')
+class ReintentoBloqueoTests(TestCase):
+    """El modo bloqueo toma las columnas que la tarea tiene al bloquearla."""
+
+    def setUp(self):
+        self.org = Organizacion('norte')
+        self.api = cliente(self.org.encargado)
+        self.tarea = self.org.tareas[0]
+        self.otro = self.org.empleados[1]
+
+    def test_reasignada_entre_la_lectura_y_el_bloqueo(self):
+        columnas = []
+        validate_id = ActualizarTareaSerializer.validate_id
+
+        def leer_y_reasignar(serializer, value):
+            value = validate_id(serializer, value)
+            # Otro request reasigna la tarea entre la lectura y el bloqueo
+            Tarea.objects.filter(pk=self.tarea.pk).update(empleado=self.otro, orden=10)
+            return value
+
+        def incrementar_versiones(proyecto_id, empleado_id, estados, **kwargs):
+            columnas.append(empleado_id)
+            return kanban.incrementar_versiones(proyecto_id, empleado_id, estados, **kwargs)
+
+        with mock.patch.object(ActualizarTareaSerializer, 'validate_id', leer_y_reasignar), \
+                mock.patch('gestion.views.incrementar_versiones', incrementar_versiones):
+            response = self.api.post(
+                '/api/tareas/actualizar/', {'id': self.tarea.pk, 'nuevo_estado': 'progreso', 'nuevo_orden': 1},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(columnas, [self.tarea.empleado_id, self.otro.pk])
+
+        tarea = Tarea.objects.get(pk=self.tarea.pk)
+        self.assertEqual((tarea.empleado_id, tarea.estado, tarea.orden), (self.otro.pk, 'progreso', 1))
+        versiones = dict(
+            VersionColumna.objects.filter(empleado=self.otro).values_list('estado', 'version')
+        )
+        self.assertEqual(response.json()['versiones'], versiones)
+        self.assertEqual(set(versiones), {'pendiente', 'progreso'})
+
+
+@override_settings(THROTTLE_ACTIVO=False, KANBAN_CONCURRENCIA='optimista')
+class CompactacionTests(TestCase):
+    """La compactación cambia la versión de la columna que renumera."""
+
+    def setUp(self):
+        self.org = Organizacion('norte')
+        self.api = cliente(self.org.encargado)
+        self.empleado = self.org.empleados[0]
+        self.primera, self.segunda, self.tercera = self.org.tareas[:3]
+        Tarea.objects.filter(pk=self.tercera.pk).update(orden=5)
+
+    def version(self):
+        [columna] = estado_columnas(self.org.proyecto.pk, self.empleado.pk, ['pendiente'])
+        return columna['version']
+
+    def test_un_movimiento_leido_antes_de_compactar_es_un_conflicto(self):
+        leida = self.version()
+        self.assertEqual(compactar_columna(self.org.proyecto.pk, self.empleado.pk, 'pendiente'), 1)
+
+        response = self.api.post(
+            '/api/tareas/actualizar/',
+            {'id': self.tercera.pk, 'nuevo_estado': 'pendiente', 'nuevo_orden': 1, 'version': leida},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 409)
+        [columna] = response.json()['columnas']
+        self.assertEqual([t['orden'] for t in columna['tareas']], [1, 2, 3])
+        self.assertEqual(columna['version'], self.version())
+
+    def test_una_columna_compacta_conserva_su_version(self):
+        compactar_columna(self.org.proyecto.pk, self.empleado.pk, 'pendiente')
+        leida = self.version()
+        self.assertEqual(compactar_columna(self.org.proyecto.pk, self.empleado.pk, 'pendiente'), 0)
+        self.assertEqual(self.version(), leida)
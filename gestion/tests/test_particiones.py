@@ -0,0 +1,76 @@
+import datetime
+import tempfile
+import unittest
+from pathlib import Path
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+
+from .. import particiones
+from ..backup import escribir_snapshot, restaurar_snapshot
+from ..models import Tarea
+from .base import Organizacion
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'El particionado sólo aplica a PostgreSQL')
+class ConvertirTests(TestCase):
+    """La conversión corre dentro de la transacción del test y se deshace al terminar."""
+
+    def setUp(self):
+        self.org = Organizacion('norte')
+        empleado = self.org.empleados[0]
+        self.vieja = self.org.crear_tarea(empleado, orden=4, fecha=datetime.date(2023, 11, 20))
+        # Las FK diferidas pendientes impiden el ALTER TABLE de la conversión
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+    def test_convertir(self):
+        antes = sorted(Tarea.objects.values_list('id', 'fecha', 'titulo'))
+
+        creadas = particiones.convertir('mensual', futuras=1)
+
+        self.assertTrue(particiones.esta_particionada())
+        self.assertIn(particiones.nombre_particion(datetime.date(2023, 11, 1), 'mensual'), creadas)
+        self.assertEqual(sorted(Tarea.objects.values_list('id', 'fecha', 'titulo')), antes)
+
+        nueva = self.org.crear_tarea(self.org.empleados[1], orden=4)
+        self.assertGreater(nueva.pk, max(fila[0] for fila in antes))
+        self.assertEqual(Tarea.objects.filter(fecha__gte='2023-11-01', fecha__lt='2023-12-01').get(), self.vieja)
+
+    def test_indices_y_claves_foraneas(self):
+        def definiciones():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT indexname FROM pg_indexes WHERE tablename = %s AND indexname NOT LIKE %s",
+                    [particiones.TABLA, '%pkey'],
+                )
+                indices = {fila[0] for fila in cursor.fetchall()}
+                cursor.execute(
+                    "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+                    [particiones.TABLA],
+                )
+                return indices, {fila[0] for fila in cursor.fetchall()}
+
+        antes = definiciones()
+        particiones.convertir('mensual', futuras=0)
+        self.assertEqual(definiciones(), antes)
+
+    def test_id_sigue_siendo_unico(self):
+        particiones.convertir('mensual', futuras=0)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.org.crear_tarea(self.org.empleados[0], id=self.vieja.pk, orden=9, fecha=datetime.date(2024, 5, 2))
+
+        # Cambiar la fecha mueve la fila a otra partición sin chocar consigo misma
+        self.vieja.fecha = datetime.date(2024, 5, 2)
+        self.vieja.save()
+        self.assertEqual(Tarea.objects.filter(pk=self.vieja.pk).count(), 1)
+
+    def test_restaurar_backup_sobre_la_tabla_particionada(self):
+        particiones.convertir('mensual', futuras=0)
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = Path(directorio) / 'completo.jsonl.gz'
+            escribir_snapshot(ruta)
+            Tarea.objects.filter(pk=self.vieja.pk).update(fecha=datetime.date(2024, 3, 5), titulo='Movida')
+            restaurar_snapshot(ruta)
+        self.assertEqual(Tarea.objects.filter(pk=self.vieja.pk).get().fecha, datetime.date(2023, 11, 20))
+        self.assertEqual(Tarea.objects.filter(pk=self.vieja.pk).count(), 1)
@@ -0,0 +1,26 @@
+from django.test import TestCase, override_settings
+
+from .base import Organizacion, cliente
+
+
+@override_settings(THROTTLE_ACTIVO=False)
+class FormatoNormalizadoTests(TestCase):
+    """Con ?formato=normalizado cada objeto anidado sale una sola vez en `incluidos`."""
+
+    def setUp(self):
+        self.org = Organizacion('norte')
+        self.api = cliente(self.org.encargado)
+
+    def test_listas_anidadas_quedan_como_ids(self):
+        response = self.api.get(
+            f'/api/proyectos-por-encargado/{self.org.encargado.pk}/', {'formato': 'normalizado'}
+        )
+        self.assertEqual(response.status_code, 200)
+        datos = response.json()
+        empleados = sorted(empleado.pk for empleado in self.org.empleados)
+
+        (proyecto,) = datos['proyectos']
+        self.assertEqual(sorted(proyecto['empleados']), empleados)
+        usuarios = datos['incluidos']['usuarios']
+        self.assertEqual(sorted(int(pk) for pk in usuarios), empleados)
+        self.assertEqual(usuarios[str(empleados[0])]['email'], 'empleado0@norte.test')
@@ -0,0 +1,59 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .. import revocacion
+from ..models import TokenRevocado
+from .base import Organizacion, token_de
+
+
+def solo_encargados(usuario):
+    return usuario is not None and usuario.rol == 'encargado'
+
+
+@override_settings(THROTTLE_ACTIVO=False)
+class RefreshRotativoTests(TestCase):
+    def setUp(self):
+        self.org = Organizacion('norte')
+        revocacion.frente.reiniciar()
+        self.addCleanup(revocacion.frente.reiniciar)
+
+    def refrescar(self, refresh):
+        return self.client.post('/api/auth/refresh/', {'refresh': refresh}, content_type='application/json')
+
+    def test_el_refresh_rotado_no_se_puede_reusar(self):
+        anterior = str(token_de(self.org.encargado))
+        response = self.refrescar(anterior)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()['refresh'], anterior)
+
+        self.assertEqual(self.refrescar(anterior).status_code, 401)
+        self.assertEqual(self.refrescar(response.json()['refresh']).status_code, 200)
+
+    def test_no_rota_el_token_de_un_usuario_borrado(self):
+        empleado = self.org.empleados[0]
+        refresh = token_de(empleado)
+        empleado.delete()
+
+        response = self.refrescar(str(refresh))
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(revocacion.esta_revocado(refresh['jti']))
+
+    def test_aplica_user_authentication_rule(self):
+        with mock.patch.object(api_settings, 'USER_AUTHENTICATION_RULE', solo_encargados):
+            self.assertEqual(self.refrescar(str(token_de(self.org.empleados[0]))).status_code, 401)
+            self.assertEqual(self.refrescar(str(token_de(self.org.encargado))).status_code, 200)
+
+    def test_la_purga_borra_solo_los_vencidos(self):
+        ahora = timezone.now()
+        TokenRevocado.objects.bulk_create([
+            TokenRevocado(jti=f'jti-{indice}', expira_en=ahora + datetime.timedelta(days=1 if indice % 2 else -1))
+            for indice in range(10)
+        ])
+
+        self.assertEqual(revocacion.purgar_vencidos(tam_lote=3), 5)
+        self.assertEqual(TokenRevocado.objects.count(), 5)
+        self.assertFalse(TokenRevocado.objects.filter(expira_en__lt=ahora).exists())
@@ -0,0 +1,32 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import SimpleTestCase, override_settings
+
+from ..middleware import ReplicaMiddleware
+from ..routers import fijado_a_principal, fijar_a_principal
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+COMPARTIDA = {
+    **LOCMEM,
+    'pins': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/gestion-tests-pins'},
+}
+
+
+@mock.patch('gestion.middleware.alias_replicas', return_value=['replica1'])
+class CachePinTests(SimpleTestCase):
+    @override_settings(CACHES=LOCMEM, REPLICA_PIN_CACHE='default')
+    def test_con_replicas_una_cache_por_proceso_falla_al_arrancar(self, _):
+        with self.assertRaises(ImproperlyConfigured):
+            ReplicaMiddleware(lambda request: HttpResponse())
+
+    @override_settings(CACHES=COMPARTIDA, REPLICA_PIN_CACHE='pins')
+    def test_con_una_cache_compartida_el_pin_se_guarda_ahi(self, _):
+        self.addCleanup(caches['pins'].clear)
+        ReplicaMiddleware(lambda request: HttpResponse())
+        fijar_a_principal(41)
+        self.assertTrue(fijado_a_principal(41))
+        self.assertFalse(fijado_a_principal(42))
@@ -0,0 +1,148 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from ..models import Sanatorio, Tarea, TransicionTarea, Usuario
+from ..tenencia import en_sanatorio, olvidar_por_defecto, sanatorio_por_defecto
+from .base import Organizacion, cliente, plan
+
+
+@override_settings(
+    THROTTLE_ACTIVO=False, SANATORIOS_CACHE_SEGUNDOS=0, ALLOWED_HOSTS=['norte.test', 'sur.test', 'testserver'],
+)
+class AislamientoTests(TestCase):
+    def setUp(self):
+        self.norte = Organizacion('norte', dominio='norte.test')
+        self.sur = Organizacion('sur', dominio='sur.test')
+
+    def test_los_listados_solo_devuelven_filas_del_propio_sanatorio(self):
+        for org, otra in ((self.norte, self.sur), (self.sur, self.norte)):
+            api = cliente(org.encargado)
+            with self.subTest(sanatorio=org.sanatorio.slug):
+                self.assertEqual([p['id'] for p in api.get('/api/proyectos/').json()], [org.proyecto.pk])
+                usuarios = {u['id'] for u in api.get('/api/usuarios/').json()}
+                self.assertEqual(usuarios, {org.encargado.pk, *(e.pk for e in org.empleados)})
+                tareas = {t['id'] for t in api.get('/api/tareas/').json()}
+                self.assertEqual(tareas, {t.pk for t in org.tareas})
+
+    def test_no_se_leen_filas_de_otro_sanatorio_por_id(self):
+        api = cliente(self.norte.encargado)
+        empleado, tarea = self.sur.empleados[0], self.sur.tareas[0]
+        rutas = [
+            f'/api/tareas/{tarea.pk}/',
+            f'/api/proyectos/{self.sur.proyecto.pk}/',
+            f'/api/usuarios/{empleado.pk}/',
+            f'/api/empleados-por-encargado/{self.sur.encargado.pk}/?jerarquia=true',
+            f'/api/tareas-empleado/{empleado.pk}/',
+            f'/api/tareas-proyecto/{self.sur.proyecto.pk}/',
+        ]
+        for ruta in rutas:
+            with self.subTest(ruta=ruta):
+                response = api.get(ruta)
+                self.assertEqual(response.status_code, 404)
+                self.assertNotIn(empleado.email, response.content.decode())
+
+    def test_no_se_referencian_filas_de_otro_sanatorio(self):
+        api = cliente(self.norte.encargado)
+        propio, ajeno = self.norte.empleados[0], self.sur.empleados[0]
+        datos = {'titulo': 'Nueva', 'descripcion': '', 'fecha': '2024-03-01', 'horas_invertidas': 1}
+        for campo, valor in (('proyecto', self.sur.proyecto.pk), ('empleado', ajeno.pk)):
+            with self.subTest(campo=campo):
+                response = api.post('/api/tareas/', {
+                    **datos, 'proyecto': self.norte.proyecto.pk, 'empleado': propio.pk, campo: valor,
+                }, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(campo, response.json())
+
+        ruta = f'/api/proyectos/{self.norte.proyecto.pk}/reasignar-tareas/'
+        for origen, destino in ((propio, ajeno), (ajeno, propio)):
+            response = api.post(ruta, {'origen': origen.pk, 'destino': destino.pk}, format='json')
+            self.assertEqual(response.status_code, 400)
+        response = api.post(
+            f'/api/proyectos/{self.sur.proyecto.pk}/reasignar-tareas/',
+            {'origen': ajeno.pk, 'destino': self.sur.empleados[1].pk}, format='json',
+        )
+        self.assertEqual(response.status_code, 404)
+
+        self.assertFalse(Tarea.objects.filter(proyecto=self.norte.proyecto, empleado=ajeno).exists())
+        self.assertFalse(Tarea.objects.filter(proyecto=self.sur.proyecto, empleado=propio).exists())
+        self.assertFalse(self.norte.proyecto.empleados.filter(pk=ajeno.pk).exists())
+
+    def test_la_jerarquia_no_cruza_sanatorios(self):
+        # Un encargado de otro sanatorio cargado sin pasar por la API (importación, backup)
+        Usuario.objects.filter(pk=self.sur.encargado.pk).update(encargado=self.norte.encargado)
+        response = cliente(self.norte.encargado).get(
+            f'/api/empleados-por-encargado/{self.norte.encargado.pk}/?jerarquia=true'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({e['id'] for e in response.json()['empleados']}, {e.pk for e in self.norte.empleados})
+
+    def test_la_analitica_solo_cuenta_transiciones_del_propio_sanatorio(self):
+        momento = datetime.datetime(2024, 3, 4, 9, tzinfo=datetime.timezone.utc)
+        for org, tarea_id in ((self.norte, 1), (self.sur, 2), (self.sur, 3)):
+            for desde, hacia, horas in ((None, 'pendiente', 0), ('pendiente', 'progreso', 1), ('progreso', 'completada', 2)):
+                TransicionTarea.objects.create(
+                    tarea_id=tarea_id, proyecto_id=org.proyecto.pk, empleado_id=org.empleados[0].pk, desde=desde,
+                    hacia=hacia, momento=momento + datetime.timedelta(hours=horas), sanatorio_id=org.sanatorio.pk,
+                )
+        rango = 'desde=2024-03-01&hasta=2024-03-31&agrupar=total'
+        for org, completadas in ((self.norte, 1), (self.sur, 2)):
+            api = cliente(org.encargado)
+            with self.subTest(sanatorio=org.sanatorio.slug):
+                [grupo] = api.get(f'/api/analitica/tiempos/?{rango}').json()['grupos']
+                self.assertEqual(grupo['completadas'], completadas)
+                self.assertEqual(grupo['tiempo_en_estado_horas']['pendiente']['transiciones'], completadas)
+                [grupo] = api.get(f'/api/analitica/throughput/?{rango}').json()['grupos']
+                self.assertEqual(grupo['semanas'][0]['completadas'], completadas)
+
+        otro_proyecto = f'/api/analitica/tiempos/?{rango}&proyecto={self.sur.proyecto.pk}'
+        self.assertEqual(cliente(self.norte.encargado).get(otro_proyecto).json()['grupos'], [])
+
+    def test_el_host_y_el_token_deben_ser_del_mismo_sanatorio(self):
+        response = cliente(self.sur.encargado, host='norte.test').get('/api/proyectos/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'sanatorio_distinto')
+
+        # Con el claim del host, el usuario igual tiene que ser de ese sanatorio
+        response = cliente(self.sur.encargado, sanatorio_id=self.norte.sanatorio.pk, host='norte.test').get(
+            '/api/proyectos/'
+        )
+        self.assertEqual(response.status_code, 401)
+
+        response = cliente(self.norte.encargado, host='norte.test').get('/api/proyectos/')
+        self.assertEqual([p['id'] for p in response.json()], [self.norte.proyecto.pk])
+
+    def test_un_listado_por_fecha_usa_el_indice_sanatorio_fecha(self):
+        with en_sanatorio(self.sur.sanatorio.pk):
+            explicado = plan(Tarea.objects.filter(fecha__gte=datetime.date(2024, 3, 1)))
+        self.assertIn('tarea_sanatorio_fecha_idx', explicado)
+
+
+class SanatorioPorDefectoTests(TestCase):
+    """El pk recordado es el de una fila confirmada que sigue existiendo."""
+
+    def setUp(self):
+        olvidar_por_defecto()
+        self.addCleanup(olvidar_por_defecto)
+
+    def test_no_recuerda_filas_borradas_ni_revertidas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pk = sanatorio_por_defecto()
+        with self.assertNumQueries(0):
+            self.assertEqual(sanatorio_por_defecto(), pk)
+
+        Sanatorio.objects.filter(pk=pk).delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            nuevo = sanatorio_por_defecto()
+        self.assertNotEqual(nuevo, pk)
+        self.assertTrue(Sanatorio.objects.filter(pk=nuevo, slug=settings.SANATORIO_POR_DEFECTO).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Sanatorio.objects.filter(pk=nuevo).delete()
+                revertido = sanatorio_por_defecto()
+                transaction.set_rollback(True)
+            self.assertNotEqual(revertido, nuevo)
+            self.assertEqual(sanatorio_por_defecto(), nuevo)
@@ -0,0 +1,67 @@
+from django.test import TestCase, override_settings
+
+from ..throttling import AlmacenMemoria
+from .base import Organizacion, cliente
+
+
+@override_settings(THROTTLE_ACTIVO=True, THROTTLE_ALMACEN='memoria')
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        self.org = Organizacion('norte')
+
+    def login(self):
+        return self.client.post(
+            '/api/auth/login/', {'email': self.org.encargado.email, 'password': 'incorrecta'},
+            content_type='application/json',
+        )
+
+    @override_settings(THROTTLE_TASAS={'autenticacion': {'*': '3/min'}})
+    def test_una_rafaga_de_logins_recibe_429_con_retry_after(self):
+        codigos = [self.login().status_code for _ in range(3)]
+        response = self.login()
+
+        self.assertEqual(codigos, [400] * 3)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    @override_settings(THROTTLE_TASAS={'lectura': {'empleado': '2/min', 'encargado': None}})
+    def test_la_tasa_depende_del_rol(self):
+        empleado, encargado = cliente(self.org.empleados[0]), cliente(self.org.encargado)
+
+        self.assertEqual([empleado.get('/api/me/').status_code for _ in range(3)], [200, 200, 429])
+        self.assertEqual([encargado.get('/api/me/').status_code for _ in range(3)], [200] * 3)
+
+    @override_settings(THROTTLE_TASAS={
+        'lectura': {'*': None}, 'cronograma': {'*': '1/min'}, 'ciclo_proyecto': {'*': '1/min'},
+    })
+    def test_los_endpoints_caros_tienen_su_propio_ambito(self):
+        api = cliente(self.org.encargado)
+        completar = f'/api/proyectos/{self.org.proyecto.pk}/completar/'
+
+        self.assertEqual([api.get('/api/cronograma/').status_code for _ in range(2)], [200, 429])
+        self.assertEqual([api.get('/api/me/').status_code for _ in range(3)], [200] * 3)
+        self.assertEqual([api.post(completar).status_code for _ in range(2)], [200, 429])
+
+
+class AlmacenMemoriaTests(TestCase):
+    def test_descarta_los_baldes_llenos_y_los_menos_usados(self):
+        almacen = AlmacenMemoria(max_claves=3)
+        # 2 fichas por 10 s: un balde con una ficha consumida se llena en 5 s
+        for indice in range(3):
+            almacen.consumir(f'u{indice}', 2, 10, ahora=indice)
+        self.assertEqual(list(almacen._baldes), ['u0', 'u1', 'u2'])
+
+        almacen.consumir('u1', 2, 10, ahora=4)
+        self.assertEqual(list(almacen._baldes), ['u0', 'u2', 'u1'])
+        # u0 ya se recargó
+        almacen.consumir('u3', 2, 10, ahora=5.5)
+        self.assertEqual(list(almacen._baldes), ['u2', 'u1', 'u3'])
+        # Sobre el máximo se va el menos usado aunque no esté lleno
+        almacen.consumir('u4', 2, 10, ahora=6)
+        self.assertEqual(list(almacen._baldes), ['u1', 'u3', 'u4'])
+
+    def test_un_balde_descartado_vuelve_lleno(self):
+        almacen = AlmacenMemoria()
+        self.assertEqual([almacen.consumir('u', 2, 10, ahora=0) for _ in range(2)], [0, 0])
+        self.assertGreater(almacen.consumir('u', 2, 10, ahora=1), 0)
+        self.assertEqual(almacen.consumir('u', 2, 10, ahora=30), 0)
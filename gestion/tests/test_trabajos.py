@@ -0,0 +1,52 @@
+import threading
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Trabajo
+from ..trabajos import BackendBaseDeDatos, BackendMemoria, trabajo
+
+
+@trabajo('prueba_bloqueante')
+def prueba_bloqueante(empezo, seguir):
+    empezo.set()
+    seguir.wait(timeout=5)
+
+
+class ClaveTrabajoTests(TestCase):
+    """La clave evita duplicar trabajos pendientes, no encolar mientras uno corre."""
+
+    def test_base_de_datos_encola_mientras_uno_esta_en_curso(self):
+        backend = BackendBaseDeDatos()
+        self.assertIsNotNone(backend.encolar('compactar_columna', {}, clave='columna'))
+        self.assertIsNone(backend.encolar('compactar_columna', {}, clave='columna'))
+
+        (en_curso,) = backend.reservar()
+        siguiente = backend.encolar('compactar_columna', {}, clave='columna')
+        self.assertIsNotNone(siguiente)
+        self.assertIsNone(backend.encolar('compactar_columna', {}, clave='columna'))
+
+        # Si el que corría falla, el pendiente ya lo cubre: no se reintenta
+        backend.fallar(en_curso, 'error')
+        self.assertEqual(
+            sorted(Trabajo.objects.values_list('pk', 'estado')),
+            sorted([(en_curso.pk, 'fallido'), (siguiente.pk, 'pendiente')]),
+        )
+
+    def test_memoria_encola_mientras_uno_esta_en_curso(self):
+        backend = BackendMemoria()
+        empezo, seguir = threading.Event(), threading.Event()
+        item = lambda: {
+            'nombre': 'prueba_bloqueante', 'argumentos': {'empezo': empezo, 'seguir': seguir},
+            'clave': 'columna', 'prioridad': 0, 'intentos': 0, 'max_intentos': 1,
+            'disponible_en': timezone.now(),
+        }
+        try:
+            backend._agregar(item())
+            self.assertTrue(empezo.wait(timeout=5))
+
+            backend._agregar(item())
+            backend._agregar(item())
+            self.assertEqual(len(backend._cola), 1)
+        finally:
+            seguir.set()
@@ -0,0 +1,165 @@
+"""
+Límites de requests con semántica de token bucket, por rol y por endpoint.
+
+Cada (ámbito, usuario) tiene un balde de `capacidad` fichas que se recarga a
+razón de capacidad/periodo; cada request consume una ficha. La capacidad es
+la ráfaga tolerada, la recarga es la tasa sostenida.
+
+El ámbito de una vista es su atributo `throttle_scope` (en las acciones de un
+ViewSet, el argumento de `@action`) o, si no lo tiene, 'lectura' o
+'escritura' según el método. Los endpoints caros (analítica, cronograma,
+bootstrap, acciones en lote) tienen ámbito propio para no gastar, ni poder
+agotar, el balde de lectura/escritura general. Las tasas salen de THROTTLE_TASAS:
+
+    THROTTLE_TASAS = {
+        'autenticacion': {'*': '10/min'},
+        'lectura': {'empleado': '300/min', 'encargado': '600/min', 'administrador': None},
+    }
+
+La clave '*' aplica a los roles no listados (y a 'anonimo'); None es sin límite.
+
+Los baldes se guardan según THROTTLE_ALMACEN:
+
+- 'memoria': diccionario del proceso con un lock, para un solo nodo.
+- 'cache': la caché de Django THROTTLE_CACHE, compartida entre nodos. La
+  lectura y escritura no son atómicas: con requests simultáneos del mismo
+  usuario puede pasar alguno de más, igual que con los throttles de DRF.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODOS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parsear_tasa(tasa):
+    """'120/min' -> (120, 60)."""
+    cantidad, periodo = tasa.split('/')
+    return int(cantidad), PERIODOS[periodo[0]]
+
+
+class AlmacenMemoria:
+    """
+    Baldes en un OrderedDict por orden de último uso. Un balde lleno equivale
+    a no tenerlo, así que en cada consumo se descartan desde el frente los
+    que ya se recargaron; si aun así hay más de `max_claves` (muchos usuarios
+    activos a la vez) se descartan los menos usados. Costo O(1) amortizado.
+    """
+
+    def __init__(self, max_claves=None):
+        self._lock = threading.Lock()
+        self._baldes = OrderedDict()
+        self.max_claves = max_claves or getattr(settings, 'THROTTLE_MEMORIA_CLAVES', 10000)
+
+    def consumir(self, clave, capacidad, periodo, ahora):
+        with self._lock:
+            fichas, ultimo, _ = self._baldes.pop(clave, (capacidad, ahora, ahora))
+            fichas, espera = recargar_y_consumir(fichas, ultimo, capacidad, periodo, ahora)
+            lleno_en = ahora + (capacidad - fichas) * periodo / capacidad
+            self._baldes[clave] = (fichas, ahora, lleno_en)
+            while self._baldes:
+                _, (_, _, lleno_en) = next(iter(self._baldes.items()))
+                if lleno_en > ahora and len(self._baldes) <= self.max_claves:
+                    break
+                self._baldes.popitem(last=False)
+            return espera
+
+    def limpiar(self):
+        with self._lock:
+            self._baldes.clear()
+
+
+class AlmacenCache:
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    def consumir(self, clave, capacidad, periodo, ahora):
+        cache = caches[self.alias]
+        fichas, ultimo = cache.get(clave, (capacidad, ahora))
+        fichas, espera = recargar_y_consumir(fichas, ultimo, capacidad, periodo, ahora)
+        cache.set(clave, (fichas, ahora), periodo)
+        return espera
+
+    def limpiar(self):
+        caches[self.alias].clear()
+
+
+def recargar_y_consumir(fichas, ultimo, capacidad, periodo, ahora):
+    """Devuelve (fichas restantes, segundos de espera o 0 si se permite)."""
+    tasa = capacidad / periodo
+    fichas = min(capacidad, fichas + (ahora - ultimo) * tasa)
+    if fichas >= 1:
+        return fichas - 1, 0
+    return fichas, (1 - fichas) / tasa
+
+
+_almacen = None
+_almacen_lock = threading.Lock()
+
+
+def obtener_almacen():
+    global _almacen
+    if _almacen is None:
+        with _almacen_lock:
+            if _almacen is None:
+                if getattr(settings, 'THROTTLE_ALMACEN', 'memoria') == 'cache':
+                    _almacen = AlmacenCache(getattr(settings, 'THROTTLE_CACHE', 'default'))
+                else:
+                    _almacen = AlmacenMemoria()
+    return _almacen
+
+
+@receiver(setting_changed)
+def reiniciar_almacen(setting, **kwargs):
+    # Para override_settings en tests y benchmarks
+    global _almacen
+    if setting in ('THROTTLE_ALMACEN', 'THROTTLE_CACHE'):
+        _almacen = None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    def ambito(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        return 'lectura' if request.method in SAFE_METHODS else 'escritura'
+
+    def tasa(self, ambito, rol):
+        tasas = getattr(settings, 'THROTTLE_TASAS', {}).get(ambito, {})
+        tasa = tasas[rol] if rol in tasas else tasas.get('*')
+        return parsear_tasa(tasa) if tasa else None
+
+    def allow_request(self, request, view):
+        self.espera = None
+        if not getattr(settings, 'THROTTLE_ACTIVO', True):
+            return True
+
+        usuario = request.user
+        autenticado = usuario is not None and getattr(usuario, 'is_authenticated', False)
+        rol = getattr(usuario, 'rol', None) if autenticado else 'anonimo'
+        ambito = self.ambito(request, view)
+        tasa = self.tasa(ambito, rol)
+        if tasa is None:
+            return True
+
+        identidad = f'u{usuario.pk}' if autenticado else f'ip{self.get_ident(request)}'
+        capacidad, periodo = tasa
+        espera = obtener_almacen().consumir(
+            f'throttle:{ambito}:{identidad}', capacidad, periodo, time.time()
+        )
+        if espera:
+            self.espera = espera
+            return False
+        return True
+
+    def wait(self):
+        # DRF lo convierte en el header Retry-After
+        return self.espera
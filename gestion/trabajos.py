@@ -0,0 +1,283 @@
+"""
+Cola de trabajos diferidos.
+
+Los efectos secundarios pesados de las escrituras (compactar columnas del
+kanban, refrescar estadísticas, exportaciones...) se encolan y los ejecuta
+un worker fuera del request:
+
+    @trabajo('compactar_columna')
+    def compactar_columna(proyecto_id, empleado_id, estado): ...
+
+    encolar('compactar_columna', clave='...', proyecto_id=1, empleado_id=2, estado='pendiente')
+
+El backend se elige con TRABAJOS_BACKEND:
+
+- 'base_de_datos': tabla Trabajo, el encolado es parte de la transacción del
+  request y el worker es `manage.py procesar_trabajos`.
+- 'memoria': cola en proceso con un hilo worker; reemplazo local de un broker
+  tipo Redis para desarrollo. Los trabajos se pierden si el proceso termina.
+
+Los trabajos se reintentan con espera exponencial hasta `max_intentos`, la
+prioridad mayor se ejecuta antes, y una `clave` evita encolar dos veces el
+mismo trabajo mientras el primero siga pendiente. Uno en curso no bloquea la
+clave (pudo leer los datos antes del cambio que encola el siguiente); si
+falla y ya hay otro pendiente con su clave, no se reintenta.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .kanban import incrementar_versiones
+from .models import Trabajo, Tarea
+
+
+logger = logging.getLogger(__name__)
+
+REGISTRO = {}
+
+REEMPLAZADO = 'Reemplazado por un trabajo pendiente con la misma clave'
+
+
+def trabajo(nombre):
+    """Registra una función como trabajo diferido bajo `nombre`."""
+    def registrar(funcion):
+        REGISTRO[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def espera_reintento(intentos):
+    return timedelta(seconds=min(2 ** intentos, 3600))
+
+
+def ejecutar_trabajo(nombre, argumentos):
+    funcion = REGISTRO.get(nombre)
+    if funcion is None:
+        raise LookupError(f'Trabajo no registrado: {nombre}')
+    return funcion(**argumentos)
+
+
+# ----------------------------------------------------------------------
+# Backends
+# ----------------------------------------------------------------------
+class BackendBaseDeDatos:
+    def encolar(self, nombre, argumentos, clave=None, prioridad=0, retraso=None, max_intentos=None):
+        datos = {
+            'nombre': nombre,
+            'argumentos': argumentos,
+            'clave': clave,
+            'prioridad': prioridad,
+            'max_intentos': max_intentos or getattr(settings, 'TRABAJOS_MAX_INTENTOS', 5),
+            'disponible_en': timezone.now() + (retraso or timedelta(0)),
+        }
+        if clave is None:
+            return Trabajo.objects.create(**datos)
+        try:
+            # Savepoint propio: un duplicado no debe romper la transacción del request
+            with transaction.atomic():
+                return Trabajo.objects.create(**datos)
+        except IntegrityError:
+            return None
+
+    def reservar(self, limite=10):
+        """Toma hasta `limite` trabajos listos y los marca en curso para este worker."""
+        ahora = timezone.now()
+        token = uuid.uuid4().hex
+        vencido = ahora - timedelta(seconds=getattr(settings, 'TRABAJOS_TIMEOUT_SEGUNDOS', 300))
+
+        # Trabajos de un worker que murió a mitad de camino (si ya hay otro
+        # pendiente con la misma clave, ése lo reemplaza)
+        colgados = Trabajo.objects.filter(estado='en_curso', updated_at__lt=vencido)
+        colgados.filter(
+            clave__in=Trabajo.objects.filter(estado='pendiente', clave__isnull=False).values('clave')
+        ).update(estado='fallido', reservado_por=None, error=REEMPLAZADO, updated_at=ahora)
+        colgados.update(estado='pendiente', reservado_por=None, updated_at=ahora)
+
+        with transaction.atomic():
+            ids = list(
+                Trabajo.objects.select_for_update(skip_locked=True)
+                .filter(estado='pendiente', disponible_en__lte=ahora)
+                .order_by('-prioridad', 'disponible_en', 'id')
+                .values_list('id', flat=True)[:limite]
+            )
+            # La condición sobre el estado evita que dos workers tomen el mismo
+            # trabajo en bases sin SELECT ... FOR UPDATE (SQLite)
+            Trabajo.objects.filter(id__in=ids, estado='pendiente').update(
+                estado='en_curso', reservado_por=token, intentos=F('intentos') + 1, updated_at=ahora
+            )
+        return list(Trabajo.objects.filter(reservado_por=token, estado='en_curso').order_by('-prioridad', 'id'))
+
+    def completar(self, trabajo):
+        Trabajo.objects.filter(pk=trabajo.pk).update(
+            estado='completado', reservado_por=None, error='', updated_at=timezone.now()
+        )
+
+    def fallar(self, trabajo, error):
+        ahora = timezone.now()
+        filas = Trabajo.objects.filter(pk=trabajo.pk)
+        if trabajo.intentos >= trabajo.max_intentos:
+            filas.update(estado='fallido', reservado_por=None, error=error[:5000], updated_at=ahora)
+            return
+        try:
+            with transaction.atomic():
+                filas.update(
+                    estado='pendiente', disponible_en=ahora + espera_reintento(trabajo.intentos),
+                    reservado_por=None, error=error[:5000], updated_at=ahora
+                )
+        except IntegrityError:
+            filas.update(estado='fallido', reservado_por=None, error=REEMPLAZADO, updated_at=ahora)
+
+    def purgar(self, dias=7):
+        limite = timezone.now() - timedelta(days=dias)
+        eliminados, _ = Trabajo.objects.filter(estado='completado', updated_at__lt=limite).delete()
+        return eliminados
+
+
+class BackendMemoria:
+    """Cola en proceso con un hilo worker (reemplazo local de un broker)."""
+
+    def __init__(self):
+        self._lock = threading.Condition()
+        self._cola = []
+        self._claves = set()
+        self._secuencia = itertools.count()
+        self._hilo = None
+
+    def encolar(self, nombre, argumentos, clave=None, prioridad=0, retraso=None, max_intentos=None):
+        item = {
+            'nombre': nombre,
+            'argumentos': argumentos,
+            'clave': clave,
+            'prioridad': prioridad,
+            'intentos': 0,
+            'max_intentos': max_intentos or getattr(settings, 'TRABAJOS_MAX_INTENTOS', 5),
+            'disponible_en': timezone.now() + (retraso or timedelta(0)),
+        }
+        # Como en la base: sólo se ve después del commit del request
+        transaction.on_commit(lambda: self._agregar(item))
+        return item
+
+    def _agregar(self, item):
+        with self._lock:
+            if item['clave'] is not None:
+                if item['clave'] in self._claves:
+                    return
+                self._claves.add(item['clave'])
+            heapq.heappush(self._cola, (-item['prioridad'], item['disponible_en'], next(self._secuencia), item))
+            self._lock.notify()
+        self._arrancar()
+
+    def _arrancar(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._bucle, name='trabajos-memoria', daemon=True)
+            self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            with self._lock:
+                while not self._cola or self._cola[0][1] > timezone.now():
+                    espera = (self._cola[0][1] - timezone.now()).total_seconds() if self._cola else None
+                    self._lock.wait(timeout=espera)
+                _, _, _, item = heapq.heappop(self._cola)
+                # Deja de estar pendiente: se puede volver a encolar su clave
+                self._claves.discard(item['clave'])
+
+            item['intentos'] += 1
+            close_old_connections()
+            try:
+                ejecutar_trabajo(item['nombre'], item['argumentos'])
+            except Exception as e:
+                logger.exception('Trabajo %s falló (intento %s)', item['nombre'], item['intentos'])
+                if item['intentos'] < item['max_intentos']:
+                    item['disponible_en'] = timezone.now() + espera_reintento(item['intentos'])
+                    self._agregar(item)
+            finally:
+                close_old_connections()
+
+
+BACKENDS = {
+    'base_de_datos': BackendBaseDeDatos,
+    'memoria': BackendMemoria,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def obtener_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                nombre = getattr(settings, 'TRABAJOS_BACKEND', 'base_de_datos')
+                clase = BACKENDS[nombre] if nombre in BACKENDS else import_string(nombre)
+                _backend = clase()
+    return _backend
+
+
+def encolar(nombre, clave=None, prioridad=0, retraso=None, max_intentos=None, **argumentos):
+    """Encola el trabajo `nombre`. Con `clave`, no se duplica mientras haya uno pendiente."""
+    if nombre not in REGISTRO:
+        raise LookupError(f'Trabajo no registrado: {nombre}')
+    return obtener_backend().encolar(nombre, argumentos, clave, prioridad, retraso, max_intentos)
+
+
+# ----------------------------------------------------------------------
+# Trabajos de gestion
+# ----------------------------------------------------------------------
+@trabajo('compactar_columna')
+def compactar_columna(proyecto_id, empleado_id, estado):
+    """
+    Renumera el orden de una columna del kanban como 1..n, sin huecos.
+    Incrementa la versión de la columna, así un movimiento optimista que la
+    leyó antes de la renumeración es un conflicto y no cae en un lugar viejo.
+    """
+    columna = Tarea.objects.filter(proyecto_id=proyecto_id, empleado_id=empleado_id, estado=estado)
+    ordenes = list(columna.order_by('orden', 'id').values_list('orden', flat=True))
+    if ordenes == list(range(1, len(ordenes) + 1)):
+        # Ya está compacta: no se invalida la versión que tienen los clientes
+        return 0
+
+    with transaction.atomic():
+        # La versión antes que las tareas, en el mismo orden que los movimientos
+        incrementar_versiones(proyecto_id, empleado_id, [estado])
+        tareas = list(columna.select_for_update().order_by('orden', 'id').only('id', 'orden'))
+        cambiadas = []
+        for indice, tarea in enumerate(tareas, 1):
+            if tarea.orden != indice:
+                tarea.orden = indice
+                cambiadas.append(tarea)
+        if cambiadas:
+            ahora = timezone.now()
+            for tarea in cambiadas:
+                tarea.updated_at = ahora
+            Tarea.objects.bulk_update(cambiadas, ['orden', 'updated_at'])
+    return len(cambiadas)
+
+
+def encolar_compactacion(proyecto_id, empleado_id, estado):
+    encolar(
+        'compactar_columna',
+        clave=f'compactar_columna:{proyecto_id}:{empleado_id}:{estado}',
+        prioridad=-1,
+        proyecto_id=proyecto_id,
+        empleado_id=empleado_id,
+        estado=estado,
+    )
+
+
+@trabajo('purgar_tokens_revocados')
+def purgar_tokens_revocados():
+    """Borra los refresh tokens revocados que ya vencieron (ver gestion/revocacion.py)."""
+    from .revocacion import purgar_vencidos
+
+    return purgar_vencidos()
@@ -1,6 +1,3 @@
-from rest_framework_simplejwt.views import TokenRefreshView  # Añade esta importación
-
-
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
@@ -19,8 +16,13 @@ from .views import (
     ListarTareasUsuarioProyectoAPIView,
     LoginView,
     LoginView,
+    RefreshView,
     MeView,
-
+    BootstrapAPIView,
+    AnaliticaTiemposAPIView,
+    AnaliticaThroughputAPIView,
+    CronogramaAPIView,
+    MetricasAPIView,
 )
 
 router = DefaultRouter()
@@ -57,9 +59,22 @@ custom_urls = [
 
      # Autenticación
     path('auth/login/', LoginView.as_view(), name='token_obtain_pair'),
-    path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/refresh/', RefreshView.as_view(), name='token_refresh'),
     path('me/', MeView.as_view(), name='me'),
 
+    # Carga inicial del tablero en un solo request
+    path('bootstrap/', BootstrapAPIView.as_view(), name='bootstrap'),
+
+    # Proyectos y tareas de una ventana de fechas (Gantt)
+    path('cronograma/', CronogramaAPIView.as_view(), name='cronograma'),
+
+    # Lead/cycle time y throughput del kanban
+    path('analitica/tiempos/', AnaliticaTiemposAPIView.as_view(), name='analitica-tiempos'),
+    path('analitica/throughput/', AnaliticaThroughputAPIView.as_view(), name='analitica-throughput'),
+
+    # Métricas en formato Prometheus
+    path('metricas/', MetricasAPIView.as_view(), name='metricas'),
+
 ]
 
 urlpatterns = custom_urls + [path('', include(router.urls))]
\ No newline at end of file
@@ -1,13 +1,32 @@
 from rest_framework.viewsets import ModelViewSet
+from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.permissions import AllowAny
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.db import transaction
 from django.db.models import F
+from django.utils import timezone
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
 from .models import Usuario, Proyecto, Permiso, Tarea
+from .metricas import registro
+from .routers import LecturaReplicaMixin
+from .renderers import RespuestaNormalizableMixin
+from .expansion import CamposExpandiblesMixin, documentar_forma
+from .kanban import ConflictoColumna, incrementar_versiones, mover_tarea, orden_en_posicion, registrar_transicion
+from .trabajos import encolar_compactacion
+from .eventos import registrar_movimiento
+from .archivo import VALORES_VERDADEROS, tareas_con_archivadas
+from .particiones import filtro_fechas
+from .bootstrap import construir_bootstrap
+from .cronograma import construir_cronograma
+from .reportes import anotar_carga
+from . import analitica, ciclo_proyecto
+from .jerarquia import subordinados
 from .serializers import (
     UsuarioSerializer, 
     ProyectoSerializer, 
@@ -16,17 +35,21 @@ from .serializers import (
     ActualizarTareaSerializer,
     RegistroEmpleadoSerializer,
     EmpleadosPorEncargadoSerializer,
+    EmpleadosConCargaSerializer,
     ProyectosPorEncargadoSerializer,
     ProyectosAsignadosEmpleadoSerializer,
     TareasEmpleadoSerializer,
     TareasProyectoSerializer,
     TareasEmpleadosEncargadoSerializer,
     CustomTokenObtainPairSerializer,
+    RefreshRotativoSerializer,
+    ReasignarTareasSerializer,
+    QuitarEmpleadoSerializer,
 )
 
 from django.db.models import Max
 import logging
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from .documentacion import extend_schema, OpenApiParameter
 
 #JWT
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
@@ -37,6 +60,7 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 # Añade las nuevas vistas de autenticación
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'autenticacion'
     serializer_class = CustomTokenObtainPairSerializer
 
     def post(self, request, *args, **kwargs):
@@ -45,12 +69,17 @@ class LoginView(APIView):
         try:
             serializer.is_valid(raise_exception=True)
             return Response(serializer.validated_data)
-        except serializer.ValidationError as e:
+        except serializers.ValidationError as e:
             return Response(
                 {'error': e.detail},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+class RefreshView(TokenRefreshView):
+    """Refresh con rotación y lista de revocados propia (ver gestion/revocacion.py)."""
+    serializer_class = RefreshRotativoSerializer
+
+
 class MeView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -80,32 +109,95 @@ class MeView(APIView):
 logger = logging.getLogger(__name__)
 
 # Vistas para CRUD
-class UsuarioViewSet(ModelViewSet):
+@documentar_forma
+class UsuarioViewSet(CamposExpandiblesMixin, ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
 
-class ProyectoViewSet(ModelViewSet):
+class EscrituraAtomicaMixin:
+    """El cambio y sus eventos de dominio (outbox) se confirman en la misma transacción."""
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            super().perform_destroy(instance)
+
+
+@documentar_forma
+class ProyectoViewSet(CamposExpandiblesMixin, EscrituraAtomicaMixin, ModelViewSet):
     permission_classes = [IsAuthenticated]
-    queryset = Proyecto.objects.all()
+    queryset = Proyecto.objects.prefetch_related('empleados')
     serializer_class = ProyectoSerializer
+    # CRUD con lectura/escritura; as_view() solo acepta el throttle_scope de @action
+    # si la clase declara el atributo
+    throttle_scope = None
+
+    # Transiciones del ciclo de vida que mueven las tareas en lote (ver gestion/ciclo_proyecto.py)
+    @extend_schema(request=None)
+    @action(detail=True, methods=['post'], throttle_scope='ciclo_proyecto')
+    def completar(self, request, pk=None):
+        """Marca el proyecto como completado y completa todas sus tareas pendientes o en progreso."""
+        return Response(ciclo_proyecto.completar_proyecto(self.get_object(), request.user.pk))
+
+    @extend_schema(request=ReasignarTareasSerializer)
+    @action(detail=True, methods=['post'], url_path='reasignar-tareas', throttle_scope='ciclo_proyecto')
+    def reasignar_tareas(self, request, pk=None):
+        """Pasa todas las tareas de un empleado en el proyecto a otro, en el mismo estado."""
+        proyecto = self.get_object()
+        serializer = ReasignarTareasSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ciclo_proyecto.reasignar_tareas(
+            proyecto, serializer.validated_data['origen'].pk, serializer.validated_data['destino'].pk, request.user.pk
+        ))
+
+    @extend_schema(request=QuitarEmpleadoSerializer)
+    @action(detail=True, methods=['post'], url_path='quitar-empleado', throttle_scope='ciclo_proyecto')
+    def quitar_empleado(self, request, pk=None):
+        """Quita un empleado del proyecto, pasando antes sus tareas a `destino`."""
+        proyecto = self.get_object()
+        serializer = QuitarEmpleadoSerializer(data=request.data, context={'proyecto': proyecto})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        destino = serializer.validated_data.get('destino')
+        return Response(ciclo_proyecto.quitar_empleado(
+            proyecto, serializer.validated_data['empleado'].pk, destino and destino.pk, request.user.pk
+        ))
 
-class PermisoViewSet(ModelViewSet):
+@documentar_forma
+class PermisoViewSet(CamposExpandiblesMixin, ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Permiso.objects.all()
     serializer_class = PermisoSerializer
 
 
 
-class TareaViewSet(ModelViewSet):
+@documentar_forma
+class TareaViewSet(CamposExpandiblesMixin, EscrituraAtomicaMixin, ModelViewSet):
     permission_classes = [IsAuthenticated]
-    queryset = Tarea.objects.all()
+    queryset = Tarea.objects.select_related('empleado', 'proyecto__encargado')
     serializer_class = TareaSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.filter(**filtro_fechas(self.request))
+        return queryset
+
     def perform_create(self, serializer):
         with transaction.atomic():
             proyecto = serializer.validated_data.get('proyecto')
             empleado = serializer.validated_data.get('empleado')
+            # La versión de la columna antes de leer su orden (ver gestion/kanban.py)
+            incrementar_versiones(proyecto.id, empleado.id, ['pendiente'])
             
             # Obtener el máximo orden actual para este empleado y estado
             max_orden = Tarea.objects.filter(
@@ -122,18 +214,10 @@ class TareaViewSet(ModelViewSet):
                 estado='pendiente',
                 orden=nuevo_orden
             )
+            registrar_transicion(tarea, None, self.request.user.pk, tarea.created_at)
 
-            # Reordenar todas las tareas para asegurar secuencia consecutiva
-            tareas = Tarea.objects.filter(
-                proyecto=proyecto,
-                empleado=empleado,
-                estado='pendiente'
-            ).order_by('orden')
-            
-            for index, t in enumerate(tareas, 1):
-                if t.orden != index:
-                    t.orden = index
-                    t.save(update_fields=['orden'])
+            # La compactación de la columna (secuencia consecutiva) se hace fuera del request
+            encolar_compactacion(proyecto.id, empleado.id, 'pendiente')
 
     
 
@@ -147,10 +231,43 @@ class ActualizarTareaEmpleadoAPIView(APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+        # Concurrencia optimista: por configuración o si el cliente envía la versión
+        version = serializer.validated_data.get('version')
+        if_match = request.headers.get('If-Match')
+        if if_match:
+            try:
+                version = int(if_match.removeprefix('W/').strip('"'))
+            except ValueError:
+                return Response(
+                    {'error': 'If-Match debe contener la versión de la columna'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        if settings.KANBAN_CONCURRENCIA == 'optimista' or version is not None:
+            return self.mover_optimista(serializer, version, request.user.pk)
+
         try:
             with transaction.atomic():
                 data = serializer.validated_data
-                tarea = Tarea.objects.select_for_update().get(id=data['id'])
+                leida = serializer.context['tarea']
+                columna = (leida.proyecto_id, leida.empleado_id, leida.estado)
+                # Las versiones se toman antes que la tarea, en el mismo orden que el modo
+                # optimista. Si la tarea cambió de columna (estado o empleado) entre la
+                # lectura y el bloqueo, se vuelve al savepoint (que suelta las filas
+                # tomadas) y se reintenta con la columna que se leyó al bloquearla:
+                # desplazar una columna sin su versión arma deadlocks.
+                for _ in range(3):
+                    with transaction.atomic():
+                        proyecto_id, empleado_id, estado_leido = columna
+                        versiones = incrementar_versiones(
+                            proyecto_id, empleado_id, [estado_leido, data['nuevo_estado']]
+                        )
+                        tarea = Tarea.objects.select_for_update().get(id=data['id'])
+                        columna = (tarea.proyecto_id, tarea.empleado_id, tarea.estado)
+                        if columna == (proyecto_id, empleado_id, estado_leido):
+                            break
+                        transaction.set_rollback(True)
+                else:
+                    raise ConflictoColumna(None)
                 
                 estado_anterior = tarea.estado
                 orden_anterior = tarea.orden
@@ -165,16 +282,13 @@ class ActualizarTareaEmpleadoAPIView(APIView):
                         empleado=tarea.empleado,
                         estado=estado_anterior,
                         orden__gt=orden_anterior
-                    ).update(orden=F('orden') - 1)
+                    ).update(orden=F('orden') - 1, updated_at=timezone.now())
 
-                    # Calcular nuevo orden en nuevo estado
-                    if nuevo_orden is None:
-                        max_orden = Tarea.objects.filter(
-                            proyecto=tarea.proyecto,
-                            empleado=tarea.empleado,
-                            estado=nuevo_estado
-                        ).aggregate(Max('orden'))['orden__max']
-                        nuevo_orden = 1 if max_orden is None else max_orden + 1
+                    # Calcular nuevo orden en nuevo estado (la posición pedida, o al final)
+                    nuevo_orden = orden_en_posicion(
+                        Tarea.objects.filter(proyecto=tarea.proyecto, empleado=tarea.empleado, estado=nuevo_estado),
+                        tarea.pk, nuevo_orden,
+                    )
 
                     # Hacer espacio para la nueva posición
                     Tarea.objects.filter(
@@ -182,47 +296,47 @@ class ActualizarTareaEmpleadoAPIView(APIView):
                         empleado=tarea.empleado,
                         estado=nuevo_estado,
                         orden__gte=nuevo_orden
-                    ).update(orden=F('orden') + 1)
+                    ).update(orden=F('orden') + 1, updated_at=timezone.now())
 
                     tarea.estado = nuevo_estado
                     tarea.orden = nuevo_orden
 
-                # Si solo cambia el orden en el mismo estado
-                elif nuevo_orden and nuevo_orden != orden_anterior:
-                    if nuevo_orden > orden_anterior:
-                        # Mover hacia abajo
-                        Tarea.objects.filter(
-                            proyecto=tarea.proyecto,
-                            empleado=tarea.empleado,
-                            estado=estado_anterior,
-                            orden__gt=orden_anterior,
-                            orden__lte=nuevo_orden
-                        ).update(orden=F('orden') - 1)
-                    else:
-                        # Mover hacia arriba
-                        Tarea.objects.filter(
-                            proyecto=tarea.proyecto,
-                            empleado=tarea.empleado,
-                            estado=estado_anterior,
-                            orden__lt=orden_anterior,
-                            orden__gte=nuevo_orden
-                        ).update(orden=F('orden') + 1)
-
-                    tarea.orden = nuevo_orden
-
-                tarea.save()
-
-                # Reordenar para asegurar secuencia consecutiva
-                tareas = Tarea.objects.filter(
-                    proyecto=tarea.proyecto,
-                    empleado=tarea.empleado,
-                    estado=tarea.estado
-                ).order_by('orden')
-                
-                for index, t in enumerate(tareas, 1):
-                    if t.orden != index:
-                        t.orden = index
-                        t.save(update_fields=['orden'])
+                # Si solo cambia el orden en el mismo estado (la posición pedida se
+                # traduce al orden de la tarea que hoy ocupa ese lugar)
+                elif nuevo_orden:
+                    nuevo_orden = orden_en_posicion(
+                        Tarea.objects.filter(proyecto=tarea.proyecto, empleado=tarea.empleado, estado=estado_anterior),
+                        tarea.pk, nuevo_orden, orden_anterior,
+                    )
+                    if nuevo_orden != orden_anterior:
+                        if nuevo_orden > orden_anterior:
+                            # Mover hacia abajo
+                            Tarea.objects.filter(
+                                proyecto=tarea.proyecto,
+                                empleado=tarea.empleado,
+                                estado=estado_anterior,
+                                orden__gt=orden_anterior,
+                                orden__lte=nuevo_orden
+                            ).update(orden=F('orden') - 1, updated_at=timezone.now())
+                        else:
+                            # Mover hacia arriba
+                            Tarea.objects.filter(
+                                proyecto=tarea.proyecto,
+                                empleado=tarea.empleado,
+                                estado=estado_anterior,
+                                orden__lt=orden_anterior,
+                                orden__gte=nuevo_orden
+                            ).update(orden=F('orden') + 1, updated_at=timezone.now())
+
+                        tarea.orden = nuevo_orden
+
+                tarea.save(update_fields=['estado', 'orden', 'updated_at'])
+                registrar_movimiento(tarea, estado_anterior, orden_anterior)
+                registrar_transicion(tarea, estado_anterior, request.user.pk, tarea.updated_at)
+
+                # La compactación de las columnas (secuencia consecutiva) se hace fuera del request
+                for estado in {estado_anterior, tarea.estado}:
+                    encolar_compactacion(tarea.proyecto_id, tarea.empleado_id, estado)
 
                 return Response({
                     'message': 'Tarea actualizada correctamente',
@@ -230,19 +344,49 @@ class ActualizarTareaEmpleadoAPIView(APIView):
                         'id': tarea.id,
                         'estado': tarea.estado,
                         'orden': tarea.orden
-                    }
+                    },
+                    'versiones': versiones
                 })
 
+        except ConflictoColumna as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def mover_optimista(self, serializer, version, actor_id=None):
+        data = serializer.validated_data
+        tarea = serializer.context['tarea']
+        try:
+            estado, orden, versiones = mover_tarea(
+                tarea, data['nuevo_estado'], data.get('nuevo_orden'), version, actor_id
+            )
+        except ConflictoColumna as e:
+            return Response(
+                {
+                    'error': 'La columna fue modificada por otro usuario',
+                    'columnas': e.columnas
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response({
+            'message': 'Tarea actualizada correctamente',
+            'tarea': {
+                'id': tarea.id,
+                'estado': estado,
+                'orden': orden
+            },
+            'versiones': versiones
+        })
+
 
 
 class RegistroEmpleadoAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'autenticacion'
     def post(self, request, *args, **kwargs):
         serializer = RegistroEmpleadoSerializer(data=request.data)
         
@@ -263,21 +407,27 @@ class RegistroEmpleadoAPIView(APIView):
     
 
 
-class ListarEmpleadosPorEncargadoAPIView(APIView):
+class ListarEmpleadosPorEncargadoAPIView(RespuestaNormalizableMixin, LecturaReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'equipo'
     def get(self, request, encargado_id):
         try:
             # Verificar que el encargado existe y es un encargado
             encargado = Usuario.objects.get(id=encargado_id, rol='encargado')
             
-            # Obtener todos los empleados asociados a este encargado
-            empleados = Usuario.objects.filter(
-                encargado=encargado,
-                rol='empleado'
-            ).order_by('-created_at')  # Ordenados por fecha de creación, más recientes primero
+            # Obtener todos los empleados asociados a este encargado; con
+            # ?jerarquia=true también los de los encargados que dependen de él
+            if request.query_params.get('jerarquia', '').lower() in VALORES_VERDADEROS:
+                empleados = subordinados(encargado.id).filter(rol='empleado')
+            else:
+                empleados = Usuario.objects.filter(encargado=encargado, rol='empleado')
+            empleados = empleados.order_by('-created_at')  # Ordenados por fecha de creación, más recientes primero
             
-            # Serializar los datos
-            serializer = EmpleadosPorEncargadoSerializer(empleados, many=True)
+            # Con ?carga=true, tareas por estado, horas, proyectos y última actividad (misma consulta)
+            if request.query_params.get('carga', '').lower() in VALORES_VERDADEROS:
+                serializer = EmpleadosConCargaSerializer(anotar_carga(empleados), many=True)
+            else:
+                serializer = EmpleadosPorEncargadoSerializer(empleados, many=True)
             
             return Response({
                 'encargado': {
@@ -285,7 +435,7 @@ class ListarEmpleadosPorEncargadoAPIView(APIView):
                     'nombre': encargado.nombre,
                     'email': encargado.email
                 },
-                'total_empleados': empleados.count(),
+                'total_empleados': len(serializer.data),
                 'empleados': serializer.data
             })
             
@@ -301,7 +451,7 @@ class ListarEmpleadosPorEncargadoAPIView(APIView):
             )
         
 
-class ListarProyectosPorEncargadoAPIView(APIView):
+class ListarProyectosPorEncargadoAPIView(RespuestaNormalizableMixin, LecturaReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request, encargado_id):
         try:
@@ -311,7 +461,7 @@ class ListarProyectosPorEncargadoAPIView(APIView):
             # Obtener todos los proyectos donde este usuario es encargado
             proyectos = Proyecto.objects.filter(
                 encargado=encargado
-            ).order_by('-created_at')  # Ordenar por fecha de creación, más recientes primero
+            ).prefetch_related('empleados').order_by('-created_at')  # Ordenar por fecha de creación, más recientes primero
             
             # Serializar los datos
             serializer = ProyectosPorEncargadoSerializer(proyectos, many=True)
@@ -338,7 +488,7 @@ class ListarProyectosPorEncargadoAPIView(APIView):
             )
 
 
-class ListarProyectosAsignadosEmpleadoAPIView(APIView):
+class ListarProyectosAsignadosEmpleadoAPIView(RespuestaNormalizableMixin, LecturaReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request, empleado_id):
         try:
@@ -348,7 +498,7 @@ class ListarProyectosAsignadosEmpleadoAPIView(APIView):
             # Obtener todos los proyectos donde el empleado está asignado
             proyectos = Proyecto.objects.filter(
                 empleados=empleado
-            ).order_by('-created_at')
+            ).select_related('encargado').order_by('-created_at')
             
             # Serializar los datos
             serializer = ProyectosAsignadosEmpleadoSerializer(proyectos, many=True)
@@ -376,20 +526,22 @@ class ListarProyectosAsignadosEmpleadoAPIView(APIView):
 
 
 
-class ListarTareasEmpleadoAPIView(APIView):
+class ListarTareasEmpleadoAPIView(RespuestaNormalizableMixin, LecturaReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request, empleado_id):
+        rango = filtro_fechas(request)
         try:
             empleado = Usuario.objects.get(id=empleado_id, rol='empleado')
             
             # Usamos select_related para cargar los datos del proyecto eficientemente
             tareas = Tarea.objects.filter(
-                empleado=empleado
+                empleado=empleado, **rango
             ).select_related(
                 'empleado', 
                 'proyecto', 
                 'proyecto__encargado'  # Para cargar también los datos del encargado del proyecto
             ).order_by('created_at')
+            tareas = tareas_con_archivadas(request, tareas, ['created_at'], empleado=empleado, **rango)
             
             # Usar el TareaSerializer que ya incluye la información del proyecto
             serializer = TareaSerializer(tareas, many=True)
@@ -409,15 +561,17 @@ class ListarTareasEmpleadoAPIView(APIView):
         
 
 
-class ListarTareasProyectoAPIView(APIView):
+class ListarTareasProyectoAPIView(RespuestaNormalizableMixin, LecturaReplicaMixin, APIView):
    permission_classes = [IsAuthenticated]
    def get(self, request, proyecto_id):
+        rango = filtro_fechas(request)
         try:
-            proyecto = Proyecto.objects.get(id=proyecto_id)
+            proyecto = Proyecto.objects.select_related('encargado').get(id=proyecto_id)
             
             tareas = Tarea.objects.filter(
-                proyecto=proyecto
-            ).select_related('empleado', 'proyecto').order_by('estado', 'orden')  # Ordenado por estado y orden
+                proyecto=proyecto, **rango
+            ).select_related('empleado', 'proyecto__encargado').order_by('estado', 'orden')  # Ordenado por estado y orden
+            tareas = tareas_con_archivadas(request, tareas, ['estado', 'orden'], proyecto=proyecto, **rango)
             
             serializer = TareasProyectoSerializer(tareas, many=True)
             
@@ -434,7 +588,7 @@ class ListarTareasProyectoAPIView(APIView):
                         'rol': proyecto.encargado.rol
                     }
                 },
-                'total_tareas': tareas.count(),
+                'total_tareas': len(serializer.data),
                 'tareas': serializer.data
             })
             
@@ -447,20 +601,25 @@ class ListarTareasProyectoAPIView(APIView):
 
 
 # views.py
-class ListarTareasEmpleadosEncargadoAPIView(APIView):
+class ListarTareasEmpleadosEncargadoAPIView(RespuestaNormalizableMixin, LecturaReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request, encargado_id):
+        rango = filtro_fechas(request)
         try:
             # Verificar que el encargado existe
             encargado = Usuario.objects.get(id=encargado_id, rol='encargado')
             
-            # Obtener todos los empleados del encargado
-            empleados = Usuario.objects.filter(encargado=encargado, rol='empleado')
+            # Obtener todos los empleados del encargado (con ?jerarquia=true, de todos los niveles)
+            if request.query_params.get('jerarquia', '').lower() in VALORES_VERDADEROS:
+                empleados = subordinados(encargado.id).filter(rol='empleado')
+            else:
+                empleados = Usuario.objects.filter(encargado=encargado, rol='empleado')
             
             # Obtener todas las tareas de estos empleados
             tareas = Tarea.objects.filter(
-                empleado__in=empleados
-            ).select_related('empleado', 'proyecto').order_by('created_at')
+                empleado__in=empleados, **rango
+            ).select_related('empleado', 'proyecto__encargado').order_by('created_at')
+            tareas = tareas_con_archivadas(request, tareas, ['created_at'], empleado__in=empleados, **rango)
             
             # Serializar las tareas directamente
             serializer = TareasEmpleadosEncargadoSerializer(tareas, many=True)
@@ -479,9 +638,10 @@ class ListarTareasEmpleadosEncargadoAPIView(APIView):
             )
 
 
-class ListarTareasUsuarioProyectoAPIView(APIView):
+class ListarTareasUsuarioProyectoAPIView(RespuestaNormalizableMixin, LecturaReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request, empleado_id, proyecto_id):
+        rango = filtro_fechas(request)
         try:
             # Verificar que tanto el empleado como el proyecto existen
             empleado = Usuario.objects.get(id=empleado_id, rol='empleado')
@@ -497,8 +657,12 @@ class ListarTareasUsuarioProyectoAPIView(APIView):
             # Obtener las tareas
             tareas = Tarea.objects.filter(
                 empleado=empleado,
-                proyecto=proyecto
-            ).select_related('empleado', 'proyecto').order_by('estado', 'orden')
+                proyecto=proyecto,
+                **rango
+            ).select_related('empleado', 'proyecto__encargado').order_by('estado', 'orden')
+            tareas = tareas_con_archivadas(
+                request, tareas, ['estado', 'orden'], empleado=empleado, proyecto=proyecto, **rango
+            )
             
             # Usar el TareaSerializer existente
             serializer = TareaSerializer(tareas, many=True)
@@ -514,4 +678,107 @@ class ListarTareasUsuarioProyectoAPIView(APIView):
             return Response(
                 {'error': 'Proyecto no encontrado'},
                 status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+            )
+
+
+@extend_schema(tags=['Tablero'])
+class BootstrapAPIView(LecturaReplicaMixin, APIView):
+    """
+    Usuario, equipo, proyectos y columnas de tareas (por estado, ordenadas por
+    orden) en una sola respuesta, para la carga inicial del tablero.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'bootstrap'
+    def get(self, request):
+        return Response(construir_bootstrap(request.user, filtro_fechas(request)))
+
+
+@extend_schema(
+    tags=['Analítica'],
+    parameters=[
+        OpenApiParameter('desde', str, description='AAAA-MM-DD, por defecto 12 semanas antes de hasta'),
+        OpenApiParameter('hasta', str, description='AAAA-MM-DD inclusive, por defecto hoy'),
+        OpenApiParameter('proyecto', int),
+        OpenApiParameter('empleado', int),
+        OpenApiParameter('agrupar', str, enum=['proyecto', 'empleado', 'semana', 'total']),
+    ],
+)
+class AnaliticaTiemposAPIView(LecturaReplicaMixin, APIView):
+    """
+    Lead time, cycle time (media, p50 y p85, en horas) y tiempo medio en cada
+    estado de las tareas completadas en el rango.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'analitica'
+    def get(self, request):
+        consulta = analitica.consulta_desde_request(request, ['proyecto', 'empleado', 'semana', 'total'])
+        return Response({
+            'desde': consulta.desde,
+            'hasta': consulta.hasta,
+            'agrupar': consulta.agrupar,
+            'grupos': analitica.tiempos(consulta),
+        })
+
+
+@extend_schema(
+    tags=['Analítica'],
+    parameters=[
+        OpenApiParameter('desde', str, description='AAAA-MM-DD, por defecto 12 semanas antes de hasta'),
+        OpenApiParameter('hasta', str, description='AAAA-MM-DD inclusive, por defecto hoy'),
+        OpenApiParameter('proyecto', int),
+        OpenApiParameter('empleado', int),
+        OpenApiParameter('agrupar', str, enum=['total', 'proyecto', 'empleado']),
+    ],
+)
+class AnaliticaThroughputAPIView(LecturaReplicaMixin, APIView):
+    """Tareas completadas por semana, con media móvil de 4 semanas y acumulado."""
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'analitica'
+    def get(self, request):
+        consulta = analitica.consulta_desde_request(request, ['total', 'proyecto', 'empleado'])
+        return Response({
+            'desde': consulta.desde,
+            'hasta': consulta.hasta,
+            'agrupar': consulta.agrupar,
+            'grupos': analitica.throughput(consulta),
+        })
+
+
+@extend_schema(
+    tags=['Tablero'],
+    parameters=[
+        OpenApiParameter('desde', str, description='AAAA-MM-DD, por defecto hoy'),
+        OpenApiParameter('hasta', str, description='AAAA-MM-DD inclusive, por defecto 30 días desde desde'),
+        OpenApiParameter('encargado', int),
+        OpenApiParameter('empleado', int, description='Proyectos a los que está asignado'),
+        OpenApiParameter('include_archived', bool),
+    ],
+)
+class CronogramaAPIView(LecturaReplicaMixin, APIView):
+    """
+    Proyectos vigentes en la ventana [desde, hasta] con sus tareas de esos
+    días agrupadas por fecha (y las horas de cada día), para la vista Gantt.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'cronograma'
+    def get(self, request):
+        return Response(construir_cronograma(request))
+
+
+class AccesoMetricas(IsAuthenticated):
+    """Usuario autenticado, o el token de METRICAS_TOKEN para el scraper de Prometheus."""
+    def has_permission(self, request, view):
+        token = settings.METRICAS_TOKEN
+        if token and constant_time_compare(request.headers.get('X-Metricas-Token', ''), token):
+            return True
+        return super().has_permission(request, view)
+
+
+@extend_schema(exclude=True)
+class MetricasAPIView(APIView):
+    permission_classes = [AccesoMetricas]
+    def get(self, request):
+        return HttpResponse(
+            registro.exportar(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
@@ -11,9 +11,11 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 import dj_database_url
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,15 +52,72 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt', # para JWT
 ]
 
+# Perfil de arranque de los workers. 'produccion' no carga las apps de
+# desarrollo ni drf_spectacular y sirve el esquema OpenAPI precomputado en el
+# build con `manage.py precomputar_esquema` (ver `manage.py medir_arranque`).
+# Las anotaciones de las vistas no lo importan (ver gestion/documentacion.py);
+# de la app sólo hacen falta las plantillas de /api/docs/ y /api/redoc/.
+PERFIL_ARRANQUE = config("PERFIL_ARRANQUE", default="desarrollo" if DEBUG else "produccion")
+APPS_DESARROLLO = ['django_extensions', 'drf_spectacular']
+PLANTILLAS_EXTRA = []
+if PERFIL_ARRANQUE == "produccion":
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in APPS_DESARROLLO]
+    PLANTILLAS_EXTRA = [Path(find_spec('drf_spectacular').origin).parent / 'templates']
+ESQUEMA_OPENAPI_DIR = config("ESQUEMA_OPENAPI_DIR", default=str(BASE_DIR / "esquema"))
+
 # Rest Framework Configuration
+# Formatos binarios para clientes móviles, si la librería está instalada
+FORMATOS_BINARIOS = [
+    nombre for modulo, nombre in (("msgpack", "MessagePack"), ("cbor2", "CBOR")) if find_spec(modulo)
+]
+
 REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # El AutoSchema de drf_spectacular, importado recién al generar el esquema
+    'DEFAULT_SCHEMA_CLASS': 'gestion.documentacion.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'gestion.authentication.CustomJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'gestion.renderers.JSONRapidoRenderer',
+        *[f'gestion.renderers.{nombre}Renderer' for nombre in FORMATOS_BINARIOS],
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        *[f'gestion.parsers.{nombre}Parser' for nombre in FORMATOS_BINARIOS],
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'gestion.throttling.TokenBucketThrottle',
+    ],
+}
+
+# Límites de requests (token bucket) por ámbito y rol; None es sin límite.
+# 'autenticacion' se aplica a login (por IP) y a registro (autenticado, por usuario):
+# ambos verifican o generan hashes. Los endpoints caros tienen su propio ámbito
+# (`throttle_scope` de la vista o de la acción); el resto usa lectura/escritura
+THROTTLE_ACTIVO = config("THROTTLE_ACTIVO", default=True, cast=bool)
+# 'memoria' (un solo nodo) o 'cache' (caché de Django compartida entre nodos)
+THROTTLE_ALMACEN = config("THROTTLE_ALMACEN", default="memoria")
+THROTTLE_CACHE = config("THROTTLE_CACHE", default="default")
+# Con 'memoria', baldes activos que se conservan como máximo (los llenos se descartan antes)
+THROTTLE_MEMORIA_CLAVES = config("THROTTLE_MEMORIA_CLAVES", default=10000, cast=int)
+THROTTLE_TASAS = {
+    'autenticacion': {'*': '10/min'},
+    'lectura': {'administrador': None, 'encargado': '600/min', 'empleado': '300/min', '*': '60/min'},
+    'escritura': {'administrador': None, 'encargado': '240/min', 'empleado': '120/min', '*': '30/min'},
+    # Equipo de un encargado (con ?carga, agregados por empleado) y carga inicial del tablero
+    'equipo': {'administrador': None, 'encargado': '120/min', 'empleado': '60/min', '*': '20/min'},
+    'bootstrap': {'administrador': None, 'encargado': '60/min', 'empleado': '60/min', '*': '20/min'},
+    # Funciones de ventana sobre el registro de transiciones
+    'analitica': {'administrador': None, 'encargado': '60/min', 'empleado': '30/min', '*': '10/min'},
+    'cronograma': {'administrador': None, 'encargado': '120/min', 'empleado': '60/min', '*': '20/min'},
+    # Completar proyecto, reasignar tareas, quitar empleado: mueven columnas enteras
+    'ciclo_proyecto': {'administrador': None, 'encargado': '20/min', 'empleado': '10/min', '*': '5/min'},
 }
 
 # JWT Configuration
@@ -73,6 +132,38 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
 
+# Refresh tokens revocados por la rotación (ver gestion/revocacion.py): el
+# filtro de Bloom en memoria se dimensiona para esta cantidad de revocados
+# vigentes y se completa con los nuevos cada tantos segundos; los vencidos se
+# purgan en lotes cada REVOCACION_PURGA_HORAS
+REVOCACION_BLOOM_CAPACIDAD = config("REVOCACION_BLOOM_CAPACIDAD", default=100000, cast=int)
+REVOCACION_SINCRONIZAR_SEGUNDOS = config("REVOCACION_SINCRONIZAR_SEGUNDOS", default=5, cast=float)
+REVOCACION_LRU_TAMANO = config("REVOCACION_LRU_TAMANO", default=10000, cast=int)
+REVOCACION_PURGA_HORAS = config("REVOCACION_PURGA_HORAS", default=1, cast=float)
+REVOCACION_PURGA_LOTE = config("REVOCACION_PURGA_LOTE", default=1000, cast=int)
+
+# Niveles máximos que recorren las consultas recursivas de la jerarquía de
+# encargados (ver gestion/jerarquia.py)
+JERARQUIA_MAX_NIVELES = config("JERARQUIA_MAX_NIVELES", default=20, cast=int)
+
+# Días máximos de la ventana del cronograma de proyectos (ver gestion/cronograma.py)
+CRONOGRAMA_MAX_DIAS = config("CRONOGRAMA_MAX_DIAS", default=366, cast=int)
+
+# Varios sanatorios en un despliegue (ver gestion/tenencia.py): sin
+# sanatorio resuelto por host o token, las filas nuevas van a este
+SANATORIO_POR_DEFECTO = config("SANATORIO_POR_DEFECTO", default="principal")
+# Cada cuánto se relee el mapa dominio -> sanatorio en cada proceso
+SANATORIOS_CACHE_SEGUNDOS = config("SANATORIOS_CACHE_SEGUNDOS", default=60, cast=int)
+
+# Caché de Django con claves separadas por sanatorio
+CACHES = {
+    'default': {
+        'BACKEND': config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': config("CACHE_LOCATION", default=""),
+        'KEY_FUNCTION': 'gestion.tenencia.clave_cache',
+    }
+}
+
 # Swagger Configuration
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Sanatorium API',
@@ -82,10 +173,17 @@ SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
     'SCHEMA_PATH_PREFIX': '/api/',
     'SCHEMA_COERCE_PATH_PK_SUFFIX': True,
+    # Aplica las anotaciones diferidas de las vistas antes de generar
+    'PREPROCESSING_HOOKS': ['gestion.documentacion.aplicar_anotaciones'],
 }
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Para Cors
+    'gestion.middleware.SanatorioMiddleware',  # Sanatorio del request por host (o, luego, por el token)
+    'gestion.middleware.MetricasMiddleware',  # Métricas de rendimiento por endpoint
+    'gestion.middleware.CompresionMiddleware',  # gzip/brotli por encima de COMPRESION_MINIMO_BYTES
+    'gestion.middleware.DetectorConsultasMiddleware',  # N+1 y consultas lentas (desarrollo/staging)
+    'gestion.middleware.ReplicaMiddleware',  # Lecturas propias tras escribir (réplicas)
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # WhiteNoise middleware
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -96,12 +194,65 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Movimientos del kanban: 'bloqueo' (select_for_update) u 'optimista' (versión
+# por columna, 409 ante conflictos). Con If-Match siempre se usa el optimista.
+KANBAN_CONCURRENCIA = config("KANBAN_CONCURRENCIA", default="bloqueo")
+
+# Cola de trabajos diferidos: 'base_de_datos' (worker: manage.py procesar_trabajos)
+# o 'memoria' (hilo en proceso, sólo para desarrollo)
+TRABAJOS_BACKEND = config("TRABAJOS_BACKEND", default="base_de_datos")
+TRABAJOS_MAX_INTENTOS = config("TRABAJOS_MAX_INTENTOS", default=5, cast=int)
+# Un trabajo en curso por más de este tiempo se considera abandonado y se reencola
+TRABAJOS_TIMEOUT_SEGUNDOS = config("TRABAJOS_TIMEOUT_SEGUNDOS", default=300, cast=int)
+
+# Archivo de tareas completadas (manage.py archivar_tareas): se mueven a
+# TareaArchivada las completadas con fecha de hace más de estos días
+ARCHIVO_TAREAS_DIAS = config("ARCHIVO_TAREAS_DIAS", default=180, cast=int)
+ARCHIVO_TAREAS_LOTE = config("ARCHIVO_TAREAS_LOTE", default=500, cast=int)
+
+# Particionado de Tarea por fecha en PostgreSQL (manage.py particionar_tareas):
+# 'mensual' o 'anual', y cuántos periodos futuros mantener creados
+TAREAS_PARTICION_GRANULARIDAD = config("TAREAS_PARTICION_GRANULARIDAD", default="mensual")
+TAREAS_PARTICIONES_FUTURAS = config("TAREAS_PARTICIONES_FUTURAS", default=3, cast=int)
+
+# Eventos de dominio (outbox, despachador: manage.py despachar_eventos)
+# URLs de webhooks separadas por coma y/o un archivo JSONL como destino
+EVENTOS_WEBHOOK_SECRETO = config("EVENTOS_WEBHOOK_SECRETO", default="")
+EVENTOS_DESTINOS = [
+    {"tipo": "webhook", "url": url}
+    for url in filter(None, config("EVENTOS_WEBHOOK_URLS", default="").split(","))
+] + (
+    [{"tipo": "archivo", "ruta": config("EVENTOS_ARCHIVO")}]
+    if config("EVENTOS_ARCHIVO", default="") else []
+)
+
+# Compresión de respuestas (brotli si está instalado, si no gzip)
+COMPRESION_MINIMO_BYTES = config("COMPRESION_MINIMO_BYTES", default=1024, cast=int)
+COMPRESION_NIVEL_BROTLI = config("COMPRESION_NIVEL_BROTLI", default=4, cast=int)
+COMPRESION_NIVEL_GZIP = config("COMPRESION_NIVEL_GZIP", default=6, cast=int)
+
+# Métricas de rendimiento
+# Fracción de requests medidos en detalle (consultas, tiempo SQL y render)
+METRICAS_MUESTREO = config("METRICAS_MUESTREO", default=0.1, cast=float)
+METRICAS_SERVER_TIMING = config("METRICAS_SERVER_TIMING", default=DEBUG, cast=bool)
+METRICAS_UMBRAL_LENTO_MS = config("METRICAS_UMBRAL_LENTO_MS", default=1000, cast=int)
+# Si se define, /api/metricas/ acepta este token en el header X-Metricas-Token
+METRICAS_TOKEN = config("METRICAS_TOKEN", default="")
+
+# Detector de N+1 y consultas lentas
+DETECTOR_CONSULTAS = config("DETECTOR_CONSULTAS", default=DEBUG, cast=bool)
+DETECTOR_UMBRAL_REPETICIONES = config("DETECTOR_UMBRAL_REPETICIONES", default=5, cast=int)
+DETECTOR_UMBRAL_LENTO_MS = config("DETECTOR_UMBRAL_LENTO_MS", default=100, cast=int)
+DETECTOR_FALLAR = config("DETECTOR_FALLAR", default=False, cast=bool)
+# Archivo JSON donde se escribe el reporte por endpoint al terminar el proceso
+DETECTOR_REPORTE = config("DETECTOR_REPORTE", default="")
+
 ROOT_URLCONF = 'proyecto_sanatorium.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': PLANTILLAS_EXTRA,
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -124,7 +275,54 @@ DATABASES = {
     }
 }
 
-DATABASES["default"] = dj_database_url.parse(config("DATABASE_URL"))
+# Conexiones persistentes: cada worker reutiliza su conexión durante
+# DB_CONN_MAX_AGE segundos en lugar de abrir una nueva por request, y la
+# verifica antes de reutilizarla si DB_CONN_HEALTH_CHECKS está activo.
+DB_CONN_MAX_AGE = config("DB_CONN_MAX_AGE", default=600, cast=int)
+DB_CONN_HEALTH_CHECKS = config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool)
+
+# Pool de conexiones en proceso (psycopg 3 + psycopg_pool), pensado para ASGI,
+# donde las conexiones persistentes no se reutilizan entre requests.
+# No es compatible con conexiones persistentes: con el pool se usa CONN_MAX_AGE=0.
+# Dependencias opcionales: pip install -r requirements-pool.txt
+DB_POOL = config("DB_POOL", default=False, cast=bool)
+DB_POOL_MIN_SIZE = config("DB_POOL_MIN_SIZE", default=2, cast=int)
+DB_POOL_MAX_SIZE = config("DB_POOL_MAX_SIZE", default=10, cast=int)
+DB_POOL_TIMEOUT = config("DB_POOL_TIMEOUT", default=10, cast=int)
+
+DATABASES["default"] = dj_database_url.parse(
+    config("DATABASE_URL"),
+    conn_max_age=0 if DB_POOL else DB_CONN_MAX_AGE,
+    conn_health_checks=DB_CONN_HEALTH_CHECKS,
+)
+
+if DB_POOL and DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    if not (find_spec("psycopg") and find_spec("psycopg_pool")):
+        raise ImproperlyConfigured("DB_POOL requiere psycopg 3 y psycopg_pool (pip install -r requirements-pool.txt)")
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": DB_POOL_MAX_SIZE,
+        "timeout": DB_POOL_TIMEOUT,
+    }
+
+# Réplicas de lectura: URLs separadas por comas (alias replica1, replica2, ...)
+for indice, url in enumerate(filter(None, config("DATABASE_REPLICA_URLS", default="").split(",")), 1):
+    DATABASES[f"replica{indice}"] = dj_database_url.parse(
+        url.strip(),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        test_options={"MIRROR": "default"},
+    )
+
+DATABASE_ROUTERS = ['gestion.routers.ReplicaRouter']
+# Segundos que un usuario lee de la principal después de escribir, y la caché
+# donde se guarda ese pin: con réplicas tiene que ser compartida entre
+# workers (no LocMemCache), si no el arranque falla
+REPLICA_PIN_CACHE = config("REPLICA_PIN_CACHE", default="default")
+REPLICA_PIN_SEGUNDOS = config("REPLICA_PIN_SEGUNDOS", default=5, cast=int)
+# Atraso máximo tolerado antes de volver a leer de la principal
+REPLICA_MAX_LAG_SEGUNDOS = config("REPLICA_MAX_LAG_SEGUNDOS", default=10, cast=int)
+REPLICA_CHEQUEO_SEGUNDOS = config("REPLICA_CHEQUEO_SEGUNDOS", default=5, cast=int)
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -17,12 +17,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
-
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-    SpectacularRedocView,
-)
+# Las vistas de drf_spectacular se importan en el primer request a la documentación
+from gestion.esquema import EsquemaAPIView, vista_diferida
 
 
 
@@ -31,8 +27,8 @@ urlpatterns = [
     path('api/', include('gestion.urls')),
 
     # URLs de documentación
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('api/schema/', EsquemaAPIView.as_view(), name='schema'),
+    path('api/docs/', vista_diferida('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('api/redoc/', vista_diferida('drf_spectacular.views.SpectacularRedocView', url_name='schema'), name='redoc'),
 
 ]
\ No newline at end of file
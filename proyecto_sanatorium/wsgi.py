@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'proyecto_sanatorium.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.PERFIL_ARRANQUE == 'produccion':
+    # Importa la URLconf y las vistas antes de aceptar requests. Con
+    # `gunicorn --preload` se hace una sola vez en el master y los workers
+    # nacen con todo cargado, sin pagarlo en su primer request.
+    from django.urls import get_resolver  # noqa: E402
+
+    get_resolver().url_patterns